@@ -0,0 +1 @@
+"""Benchmarks for calc_example."""
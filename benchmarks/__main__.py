@@ -0,0 +1,132 @@
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from benchmarks.runner import compare, run
+from benchmarks.startup import measure_startup
+from benchmarks.suites import all_benchmarks
+
+
+def _format_result(result: Dict[str, Any]) -> str:
+    if "error" in result:
+        return f"ERROR {result['error']}"
+    line = (
+        f"{result['ops_per_sec']:>12.0f} ops/s"
+        f"  p50 {result['p50_us']:>9.1f}us  p99 {result['p99_us']:>9.1f}us"
+    )
+    if "peak_bytes_per_call" in result:
+        line += f"  peak {result['peak_bytes_per_call']:>8.0f}B/call"
+    return line
+
+
+def _run(args: argparse.Namespace) -> int:
+    report = run(
+        all_benchmarks(),
+        args.warmup,
+        args.iterations,
+        args.filter,
+        args.memory,
+    )
+    for name, result in report["results"].items():
+        print(f"{name:<40} {_format_result(result)}")  # noqa: WPS421
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+    return 0
+
+
+def _compare(args: argparse.Namespace) -> int:
+    baseline = json.loads(Path(args.baseline).read_text())
+    current = json.loads(Path(args.current).read_text())
+    rows = compare(baseline, current, args.threshold)
+    for row in rows:
+        marker = "REGRESSION" if row["regression"] else ""
+        print(  # noqa: WPS421
+            f"{row['name']:<40} {row['baseline_ops_per_sec']:>12.0f}"
+            f" -> {row['current_ops_per_sec']:>12.0f} ops/s"
+            f" {row['change']:>+8.1%} {marker}",
+        )
+    return 1 if any(row["regression"] for row in rows) else 0
+
+
+def _startup(args: argparse.Namespace) -> int:
+    modes = {"factory": [False], "preload": [True], "both": [False, True]}
+    report = {}
+    for preload in modes[args.mode]:
+        mode = "preload" if preload else "factory"
+        result = measure_startup(args.workers, preload, args.timeout)
+        report[mode] = result
+        print(  # noqa: WPS421
+            f"{mode:<8} first response {result['first_response_s'] * 1e3:>8.1f}ms"
+            f"  all workers {result['all_workers_s'] * 1e3:>8.1f}ms",
+        )
+        for pid, seconds in sorted(result["workers_first_request_s"].items()):
+            print(  # noqa: WPS421
+                f"  worker {pid:<8} first request {seconds * 1e3:>8.1f}ms",
+            )
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Entrypoint of the benchmark runner.
+
+    Usage::
+
+        python -m benchmarks run --output results.json
+        python -m benchmarks compare baseline.json results.json
+        python -m benchmarks startup --workers 4
+
+    :param argv: command line arguments.
+    :return: exit code, 1 if the comparison found a regression.
+    """
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run benchmarks")
+    run_parser.add_argument("--output", help="path of the JSON report")
+    run_parser.add_argument("--iterations", type=int, default=2000)
+    run_parser.add_argument("--warmup", type=int, default=200)
+    run_parser.add_argument("--filter", help="run benchmarks containing this text")
+    run_parser.add_argument(
+        "--memory",
+        action="store_true",
+        help="also measure memory allocated per call",
+    )
+    run_parser.set_defaults(handler=_run)
+
+    compare_parser = commands.add_parser("compare", help="compare two reports")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="relative throughput drop reported as a regression",
+    )
+    compare_parser.set_defaults(handler=_compare)
+
+    startup_parser = commands.add_parser(
+        "startup",
+        help="measure time to the first request of every worker",
+    )
+    startup_parser.add_argument("--workers", type=int, default=4)
+    startup_parser.add_argument(
+        "--mode",
+        choices=("factory", "preload", "both"),
+        default="both",
+        help="whether workers call the factory or the master preloads the app",
+    )
+    startup_parser.add_argument("--timeout", type=float, default=60)
+    startup_parser.add_argument("--output", help="path of the JSON report")
+    startup_parser.set_defaults(handler=_startup)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
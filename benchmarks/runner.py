@@ -0,0 +1,224 @@
+import asyncio
+import inspect
+import platform
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from importlib import metadata
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Union
+
+Operation = Callable[[], Union[Any, Awaitable[Any]]]
+
+
+class Benchmark(NamedTuple):
+    """A named operation to measure."""
+
+    name: str
+    operation: Operation
+
+
+class Measurement(NamedTuple):
+    """Throughput and latency percentiles of a benchmark."""
+
+    iterations: int
+    ops_per_sec: float
+    mean_us: float
+    p50_us: float
+    p90_us: float
+    p99_us: float
+
+
+def percentile(sorted_samples: List[int], fraction: float) -> int:
+    """
+    Nearest-rank percentile.
+
+    :param sorted_samples: samples sorted in ascending order.
+    :param fraction: percentile as a fraction of one.
+    :return: the sample at the percentile.
+    """
+    index = round(fraction * (len(sorted_samples) - 1))
+    return sorted_samples[index]
+
+
+def summarize(samples_ns: List[int]) -> Measurement:
+    """
+    Build a measurement from per-call timings.
+
+    :param samples_ns: duration of every call in nanoseconds.
+    :return: the measurement.
+    """
+    samples_ns = sorted(samples_ns)
+    total_ns = sum(samples_ns)
+    return Measurement(
+        iterations=len(samples_ns),
+        ops_per_sec=len(samples_ns) / (total_ns / 1e9) if total_ns else 0,
+        mean_us=total_ns / len(samples_ns) / 1e3,
+        p50_us=percentile(samples_ns, 0.5) / 1e3,
+        p90_us=percentile(samples_ns, 0.9) / 1e3,
+        p99_us=percentile(samples_ns, 0.99) / 1e3,
+    )
+
+
+def _measure_sync(operation: Operation, warmup: int, iterations: int) -> List[int]:
+    for _ in range(warmup):
+        operation()
+    samples = []
+    clock = time.perf_counter_ns
+    for _ in range(iterations):  # noqa: WPS440
+        start = clock()
+        operation()
+        samples.append(clock() - start)
+    return samples
+
+
+async def _measure_async(
+    operation: Operation,
+    warmup: int,
+    iterations: int,
+) -> List[int]:
+    for _ in range(warmup):
+        await operation()  # type: ignore
+    samples = []
+    clock = time.perf_counter_ns
+    for _ in range(iterations):  # noqa: WPS440
+        start = clock()
+        await operation()  # type: ignore
+        samples.append(clock() - start)
+    return samples
+
+
+def measure(benchmark: Benchmark, warmup: int, iterations: int) -> Measurement:
+    """
+    Measure a benchmark, awaiting the operation if it's a coroutine function.
+
+    :param benchmark: benchmark to measure.
+    :param warmup: quantity of unmeasured calls.
+    :param iterations: quantity of measured calls.
+    :return: the measurement.
+    """
+    if inspect.iscoroutinefunction(benchmark.operation):
+        samples = asyncio.run(_measure_async(benchmark.operation, warmup, iterations))
+    else:
+        samples = _measure_sync(benchmark.operation, warmup, iterations)
+    return summarize(samples)
+
+
+def measure_allocations(benchmark: Benchmark, iterations: int) -> Dict[str, float]:
+    """
+    Measure memory allocated by every call of a synchronous benchmark.
+
+    Peak traced memory above the memory in use before the call counts
+    short-lived objects as well, which don't show up in snapshots.
+
+    :param benchmark: benchmark to measure.
+    :param iterations: quantity of measured calls.
+    :return: mean peak bytes and mean retained bytes per call.
+    """
+    benchmark.operation()
+    peak_total = 0
+    tracemalloc.start()
+    try:
+        start, _ = tracemalloc.get_traced_memory()
+        for _ in range(iterations):
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            benchmark.operation()
+            _, peak = tracemalloc.get_traced_memory()
+            peak_total += peak - before
+        end, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "peak_bytes_per_call": peak_total / iterations,
+        "retained_bytes_per_call": (end - start) / iterations,
+    }
+
+
+def _measure_result(
+    benchmark: Benchmark,
+    warmup: int,
+    iterations: int,
+    memory: bool,
+) -> Dict[str, Any]:
+    result = measure(benchmark, warmup, iterations)._asdict()
+    if memory and not inspect.iscoroutinefunction(benchmark.operation):
+        result.update(measure_allocations(benchmark, iterations))
+    return result
+
+
+def run(
+    benchmarks: List[Benchmark],
+    warmup: int,
+    iterations: int,
+    name_filter: Optional[str] = None,
+    memory: bool = False,
+) -> Dict[str, Any]:
+    """
+    Run benchmarks and collect a machine-readable report.
+
+    A benchmark that raises is reported with its error instead
+    of a measurement, so one broken case doesn't hide the others.
+
+    :param benchmarks: benchmarks to run.
+    :param warmup: quantity of unmeasured calls of every benchmark.
+    :param iterations: quantity of measured calls of every benchmark.
+    :param name_filter: substring of names of benchmarks to run.
+    :param memory: also measure allocations of synchronous benchmarks.
+    :return: report with environment metadata and results by benchmark name.
+    """
+    results: Dict[str, Any] = {}
+    for benchmark in benchmarks:
+        if name_filter and name_filter not in benchmark.name:
+            continue
+        try:
+            results[benchmark.name] = _measure_result(
+                benchmark,
+                warmup,
+                iterations,
+                memory,
+            )
+        except Exception as exc:  # noqa: WPS440
+            results[benchmark.name] = {"error": f"{type(exc).__name__}: {exc}"}
+    return {
+        "meta": {
+            "version": metadata.version("calc_example"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "warmup": warmup,
+            "iterations": iterations,
+            "memory": memory,
+        },
+        "results": results,
+    }
+
+
+def compare(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    threshold: float,
+) -> List[Dict[str, Any]]:
+    """
+    Compare throughput of two reports.
+
+    :param baseline: earlier report.
+    :param current: new report.
+    :param threshold: relative throughput drop considered a regression.
+    :return: comparison rows for benchmarks measured in both reports.
+    """
+    rows = []
+    for name, result in current["results"].items():
+        old_result = baseline["results"].get(name, {})
+        if "ops_per_sec" not in result or not old_result.get("ops_per_sec"):
+            continue
+        change = result["ops_per_sec"] / old_result["ops_per_sec"] - 1
+        rows.append(
+            {
+                "name": name,
+                "baseline_ops_per_sec": old_result["ops_per_sec"],
+                "current_ops_per_sec": result["ops_per_sec"],
+                "change": change,
+                "regression": change < -threshold,
+            },
+        )
+    return rows
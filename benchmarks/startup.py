@@ -0,0 +1,139 @@
+import http.client
+import os
+import re
+import socket
+import subprocess  # noqa: S404
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+FIRST_REQUEST_SAMPLE = re.compile(
+    r"calc_example_worker_first_request_seconds\{(?P<labels>[^}]*)\} (?P<value>\S+)",
+)
+PID_LABEL = re.compile(r'pid="(\d+)"')
+CALCULATION = b'{"expression": "1+2"}'
+
+
+def free_port() -> int:
+    """
+    Find a free local TCP port.
+
+    :return: the port.
+    """
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _request(port: int, method: str, path: str, body: Optional[bytes] = None) -> bytes:
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    try:
+        connection.request(
+            method,
+            path,
+            body,
+            {"Content-Type": "application/json"},
+        )
+        return connection.getresponse().read()
+    finally:
+        connection.close()
+
+
+def _calculate(port: int) -> bool:
+    try:
+        _request(port, "POST", "/api/calculate", CALCULATION)
+    except OSError:
+        return False
+    return True
+
+
+def first_request_times(metrics: str) -> Dict[int, float]:
+    """
+    Parse time to the first request of every worker from /metrics.
+
+    :param metrics: metrics in the Prometheus text format.
+    :return: seconds by pid of the worker.
+    """
+    times = {}
+    for sample in FIRST_REQUEST_SAMPLE.finditer(metrics):
+        pid = PID_LABEL.search(sample.group("labels"))
+        if pid is not None:
+            times[int(pid.group(1))] = float(sample.group("value"))
+    return times
+
+
+def _server_env(
+    port: int,
+    workers: int,
+    preload: bool,
+    directory: str,
+) -> Dict[str, str]:
+    return {
+        **os.environ,
+        "CALC_EXAMPLE_PORT": str(port),
+        "CALC_EXAMPLE_WORKERS_COUNT": str(workers),
+        "CALC_EXAMPLE_PRELOAD": str(preload).lower(),
+        "CALC_EXAMPLE_RELOAD": "false",
+        "CALC_EXAMPLE_LOG_LEVEL": "WARNING",
+        "CALC_EXAMPLE_PROMETHEUS_DIR": str(Path(directory) / "prom"),
+        "CALC_EXAMPLE_RESULT_CACHE_PATH": str(Path(directory) / "results"),
+    }
+
+
+def measure_startup(workers: int, preload: bool, timeout: float) -> Dict[str, Any]:
+    """
+    Start the server and measure how soon its workers handle requests.
+
+    Concurrent calculations are sent until every worker reports its
+    time to the first request, so the times include up to one polling
+    interval of waiting for a request.
+
+    :param workers: quantity of gunicorn workers.
+    :param preload: whether the master preloads the application.
+    :param timeout: seconds to wait for all workers.
+    :return: time to the first response of the server and
+        time to the first request by worker pid.
+    :raises TimeoutError: if the workers don't handle requests in time.
+    """
+    port = free_port()
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        server = subprocess.Popen(  # noqa: S603
+            [sys.executable, "-m", "calc_example"],
+            env=_server_env(port, workers, preload, directory),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            return _poll_workers(port, workers, start, timeout)
+        finally:
+            server.terminate()
+            server.wait()
+
+
+def _poll_workers(
+    port: int,
+    workers: int,
+    start: float,
+    timeout: float,
+) -> Dict[str, Any]:
+    first_response: Optional[float] = None
+    with ThreadPoolExecutor(max_workers=workers * 2) as pool:
+        while time.perf_counter() - start < timeout:
+            handled = list(pool.map(_calculate, [port] * workers * 2))
+            if any(handled) and first_response is None:
+                first_response = time.perf_counter() - start
+            if first_response is not None:
+                metrics = _request(port, "GET", "/metrics").decode()
+                times = first_request_times(metrics)
+                if len(times) >= workers:
+                    return {
+                        "first_response_s": first_response,
+                        "all_workers_s": time.perf_counter() - start,
+                        "workers_first_request_s": times,
+                    }
+            time.sleep(0.01)
+    raise TimeoutError(f"Workers didn't handle requests in {timeout} seconds.")
@@ -0,0 +1,483 @@
+from typing import Any, Callable, Dict, List, Optional
+
+import ujson
+from benchmarks.runner import Benchmark
+from fastapi import FastAPI
+from fastapi.responses import UJSONResponse
+from fastapi.routing import APIRoute, serialize_response
+from fastapi.templating import Jinja2Templates
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Mount, Route
+from starlette.staticfiles import StaticFiles
+
+from calc_example.services.calculator import (
+    CalculatorFactory,
+    IncrementalExpression,
+    LRUCache,
+    RPNCalculator,
+    TemplateCalculator,
+    TemplateRegistry,
+    calculator_factory,
+    evaluate,
+    get_arithmetic,
+)
+from calc_example.services.executor.lifetime import init_executor
+from calc_example.services.result_cache.lifetime import init_result_cache
+from calc_example.settings import NumericBackend, settings
+from calc_example.web.api.calculator.encoding import MSGPACK, msgpack
+from calc_example.web.api.calculator.views import make_result, result_response
+from calc_example.web.application import get_app
+from calc_example.web.assets import HOME_TEMPLATE, STATIC_DIR, TEMPLATES_DIR
+
+EXPRESSION_LENGTHS = (3, 11, 51, 201)
+INCREMENTAL_LENGTHS = (11, 201, 2001)
+NESTING_DEPTHS = (1, 5, 25)
+
+
+def flat_expression(operands: int, operators: str = "+*-") -> str:
+    """
+    Build an expression with alternating operators.
+
+    :param operands: quantity of operands.
+    :param operators: operators to alternate.
+    :return: the expression.
+    """
+    parts = ["1"]
+    for index in range(1, operands):
+        parts.append(operators[index % len(operators)])
+        parts.append(str(index % 9 + 1))
+    return "".join(parts)
+
+
+def nested_expression(depth: int) -> str:
+    """
+    Build an expression with parentheses nested to the given depth.
+
+    :param depth: nesting depth.
+    :return: the expression.
+    """
+    return "(" * depth + "1+2" + "*3)" * depth
+
+
+def _call(func: Callable[..., Any], *args: Any) -> Callable[[], Any]:
+    return lambda: func(*args)
+
+
+def calculator_benchmarks() -> List[Benchmark]:
+    """
+    Benchmarks of the calculator services.
+
+    :return: list of benchmarks.
+    """
+    rpn_calculator = RPNCalculator()
+    uncached_calculator = RPNCalculator(cache=LRUCache(0))
+    unoptimized_calculator = RPNCalculator(cache=LRUCache(1024), optimize=False)
+    benchmarks = [
+        Benchmark(
+            "factory.from_string",
+            _call(calculator_factory.from_string, "12+34"),
+        ),
+        Benchmark(
+            "factory.from_string+calculate",
+            lambda: calculator_factory.from_string("12/34").calculate(),
+        ),
+        Benchmark(
+            "factory.new+from_string+calculate",
+            lambda: CalculatorFactory().from_string("12/34").calculate(),
+        ),
+        Benchmark("evaluate", _call(evaluate, 12.0, "/", 34.0)),
+    ]
+    for operands in EXPRESSION_LENGTHS:
+        benchmarks.append(
+            Benchmark(
+                f"rpn.calculate[length={operands}]",
+                _call(rpn_calculator.calculate, flat_expression(operands)),
+            ),
+        )
+        benchmarks.append(
+            Benchmark(
+                f"rpn.calculate[length={operands},uncached]",
+                _call(uncached_calculator.calculate, flat_expression(operands)),
+            ),
+        )
+        benchmarks.append(
+            Benchmark(
+                f"rpn.calculate[length={operands},unoptimized]",
+                _call(unoptimized_calculator.calculate, flat_expression(operands)),
+            ),
+        )
+    # Cached nested expressions fold into a single number,
+    # so nesting is measured on the uncached path.
+    for depth in NESTING_DEPTHS:
+        benchmarks.append(
+            Benchmark(
+                f"rpn.calculate[depth={depth}]",
+                _call(uncached_calculator.calculate, nested_expression(depth)),
+            ),
+        )
+    return benchmarks
+
+
+def backend_benchmarks() -> List[Benchmark]:
+    """
+    Benchmarks of evaluating compiled expressions with every numeric backend.
+
+    Programs are compiled once without optimization, otherwise
+    constant folding leaves a single number to evaluate
+    and every backend measures the same work.
+
+    :return: list of benchmarks.
+    """
+    benchmarks = []
+    for backend in NumericBackend:
+        calculator = RPNCalculator(
+            cache=LRUCache(0),
+            arithmetic=get_arithmetic(backend, settings.decimal_precision),
+            optimize=False,
+        )
+        for operands in (11, 51):
+            compiled = calculator.compile(flat_expression(operands, "+*-/"))
+            benchmarks.append(
+                Benchmark(
+                    f"backend.{backend.value}[length={operands}]",
+                    _call(calculator.evaluate, compiled),
+                ),
+            )
+    return benchmarks
+
+
+def _keystroke(operands: int) -> Callable[[], Any]:
+    """
+    Edit the last operand of an expression like a user typing at its end.
+
+    :param operands: quantity of operands.
+    :return: operation which applies one edit.
+    """
+    incremental = IncrementalExpression(flat_expression(operands))
+    digits = iter("123456789" * 10**6)
+
+    def operation() -> float:  # noqa: WPS430
+        end = len(incremental.expression)
+        incremental.apply(end - 1, end, next(digits))
+        return incremental.result
+
+    return operation
+
+
+def incremental_benchmarks() -> List[Benchmark]:
+    """
+    Benchmarks of incremental re-evaluation against evaluation from scratch.
+
+    :return: list of benchmarks.
+    """
+    uncached_calculator = RPNCalculator(cache=LRUCache(0))
+    benchmarks = []
+    for operands in INCREMENTAL_LENGTHS:
+        benchmarks.append(
+            Benchmark(f"incremental.edit[length={operands}]", _keystroke(operands)),
+        )
+        benchmarks.append(
+            Benchmark(
+                f"incremental.full[length={operands}]",
+                _call(uncached_calculator.calculate, flat_expression(operands)),
+            ),
+        )
+    return benchmarks
+
+
+def _cycle(func: Callable[[str], Any], expressions: List[str]) -> Callable[[], Any]:
+    index = iter(range(10**9))
+    return lambda: func(expressions[next(index) % len(expressions)])
+
+
+def template_benchmarks() -> List[Benchmark]:
+    """
+    Benchmarks of a template evaluated with different numbers on every call.
+
+    :return: list of benchmarks.
+    """
+    benchmarks = []
+    for operands in (3, 11, 51):
+        template = flat_expression(operands)
+        expressions = [
+            template.replace("1", str(number), 1) for number in range(1, 5000)
+        ]
+        interpreted = TemplateCalculator(
+            RPNCalculator(cache=LRUCache(0)),
+            TemplateRegistry(threshold=0, max_templates=16, max_operands=64),
+        )
+        compiled = TemplateCalculator(
+            RPNCalculator(cache=LRUCache(0)),
+            TemplateRegistry(threshold=1, max_templates=16, max_operands=64),
+        )
+        benchmarks.append(
+            Benchmark(
+                f"template.interpreted[length={operands}]",
+                _cycle(interpreted.calculate, expressions),
+            ),
+        )
+        benchmarks.append(
+            Benchmark(
+                f"template.compiled[length={operands}]",
+                _cycle(compiled.calculate, expressions),
+            ),
+        )
+    return benchmarks
+
+
+class ASGIClient:
+    """Minimal in-process ASGI client without any transport overhead."""
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        body: bytes = b"",
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Send a request to the application.
+
+        :param method: HTTP method.
+        :param path: request path.
+        :param body: request body.
+        :param headers: request headers.
+        :return: status, headers and body of the response.
+        """
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": b"",
+            "root_path": "",
+            "headers": [
+                (name.lower().encode(), header_value.encode())
+                for name, header_value in (headers or {}).items()
+            ],
+            "client": ("127.0.0.1", 0),
+            "server": ("test", 80),
+        }
+        response: Dict[str, Any] = {"body": b""}
+        messages = [{"type": "http.request", "body": body, "more_body": False}]
+
+        async def receive() -> Dict[str, Any]:  # noqa: WPS430
+            if messages:
+                return messages.pop()
+            return {"type": "http.disconnect"}
+
+        async def send(message: Dict[str, Any]) -> None:  # noqa: WPS430
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = message.get("headers", [])
+            else:
+                response["body"] += message.get("body", b"")
+
+        await self.app(scope, receive, send)
+        return response
+
+
+def _serialize_model(field: Any, color: bool) -> Callable[[], Any]:
+    async def operation() -> Any:  # noqa: WPS430
+        content = await serialize_response(
+            field=field,
+            response_content=make_result(0.4286, color),
+            is_coroutine=True,
+        )
+        return UJSONResponse(content)
+
+    return operation
+
+
+def response_benchmarks() -> List[Benchmark]:
+    """
+    Benchmarks of building the response of a calculation.
+
+    The model path is what FastAPI does with a returned model:
+    validation against the response model, encoding and rendering.
+
+    :return: list of benchmarks.
+    """
+    route = next(
+        route
+        for route in get_app().routes
+        if isinstance(route, APIRoute) and route.path == "/api/calculate"
+    )
+    benchmarks = []
+    for color in (False, True):
+        model = _serialize_model(route.secure_cloned_response_field, color)
+        benchmarks.append(Benchmark(f"response.model[color={color}]", model))
+        benchmarks.append(
+            Benchmark(
+                f"response.preserialized[color={color}]",
+                _call(result_response, 0.4286, color),
+            ),
+        )
+    return benchmarks
+
+
+def api_benchmarks() -> List[Benchmark]:
+    """
+    Benchmarks of the full HTTP path through the ASGI application.
+
+    :return: list of benchmarks.
+    """
+    app = get_app()
+    init_executor(app)
+    init_result_cache(app)
+    client = ASGIClient(app)
+    json_headers = {"content-type": "application/json"}
+    msgpack_headers = {"content-type": MSGPACK}
+
+    def post(  # noqa: WPS430
+        path: str,
+        body: bytes,
+        expected_status: int = 200,
+        headers: Dict[str, str] = json_headers,
+    ) -> Callable[[], Any]:
+        async def operation() -> None:  # noqa: WPS430
+            response = await client.request("POST", path, body, headers)
+            if response["status"] != expected_status:
+                raise RuntimeError(response["body"].decode())
+
+        return operation
+
+    batch = {"items": [{"expression": f"{item}/7+1"} for item in range(100)]}
+    benchmarks = [
+        Benchmark("api.calculate", post("/api/calculate", b'{"expression":"3+3"}')),
+        Benchmark(
+            "api.calculate[color]",
+            post("/api/calculate", b'{"expression":"3/7","color":true}'),
+        ),
+        Benchmark(
+            "api.calculate[invalid]",
+            post("/api/calculate", b'{"expression":"3+a"}', 422),
+        ),
+        Benchmark(
+            "api.calculate[misplaced]",
+            post("/api/calculate", b'{"expression":"2(+3)"}', 422),
+        ),
+        Benchmark(
+            "api.batch[items=100]",
+            post("/api/calculate/batch", ujson.dumps(batch).encode()),
+        ),
+    ]
+    if msgpack is None:
+        return benchmarks
+    return benchmarks + [
+        Benchmark(
+            "api.calculate[msgpack]",
+            post(
+                "/api/calculate",
+                msgpack.packb({"expression": "3+3"}),
+                headers=msgpack_headers,
+            ),
+        ),
+        Benchmark(
+            "api.batch[items=100,msgpack]",
+            post(
+                "/api/calculate/batch",
+                msgpack.packb(batch),
+                headers=msgpack_headers,
+            ),
+        ),
+    ]
+
+
+def _disk_app() -> FastAPI:
+    """
+    The application rendering the home page on every request
+    and reading static files from the disk.
+
+    :return: the application.
+    """
+    app = get_app()
+    templates = Jinja2Templates(directory=str(TEMPLATES_DIR))
+
+    async def home(request: Request) -> Response:  # noqa: WPS430
+        return templates.TemplateResponse(
+            HOME_TEMPLATE,
+            {"request": request, "static_url": lambda name: f"/static/{name}"},
+        )
+
+    disk_routes = {
+        "/": Route("/", home),
+        "/static/{path:path}": Mount("/static", StaticFiles(directory=STATIC_DIR)),
+    }
+    app.router.routes = [
+        disk_routes.get(getattr(route, "path", ""), route) for route in app.routes
+    ]
+    return app
+
+
+def _get(
+    client: ASGIClient,
+    path: str,
+    headers: Dict[str, str],
+    expected_status: int = 200,
+) -> Callable[[], Any]:
+    async def operation() -> None:  # noqa: WPS430
+        response = await client.request("GET", path, headers=headers)
+        if response["status"] != expected_status:
+            raise RuntimeError(f"Unexpected status {response['status']}")
+
+    return operation
+
+
+def asset_benchmarks() -> List[Benchmark]:
+    """
+    Benchmarks of the home page and static assets.
+
+    The disk variants render the page and read files on every
+    request, the others serve precompressed bodies from memory.
+
+    :return: list of benchmarks.
+    """
+    app = get_app()
+    client = ASGIClient(app)
+    disk_client = ASGIClient(_disk_app())
+    gzip = {"accept-encoding": "gzip"}
+    css = app.state.assets.url("style/calculator.css")
+    home_etag = app.state.home_page.negotiate("gzip").headers["etag"]
+    css_etag = app.state.assets.get(css.removeprefix("/static/")).etags
+    return [
+        Benchmark("assets.home[disk]", _get(disk_client, "/", gzip)),
+        Benchmark("assets.home", _get(client, "/", gzip)),
+        Benchmark(
+            "assets.home[304]",
+            _get(client, "/", {**gzip, "if-none-match": home_etag}, 304),
+        ),
+        Benchmark(
+            "assets.css[disk]",
+            _get(disk_client, "/static/style/calculator.css", gzip),
+        ),
+        Benchmark("assets.css", _get(client, css, gzip)),
+        Benchmark(
+            "assets.css[304]",
+            _get(client, css, {**gzip, "if-none-match": ", ".join(css_etag)}, 304),
+        ),
+    ]
+
+
+def all_benchmarks() -> List[Benchmark]:
+    """
+    All registered benchmarks.
+
+    :return: list of benchmarks.
+    """
+    return (
+        calculator_benchmarks()
+        + backend_benchmarks()
+        + incremental_benchmarks()
+        + template_benchmarks()
+        + response_benchmarks()
+        + api_benchmarks()
+        + asset_benchmarks()
+    )
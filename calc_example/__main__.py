@@ -1,11 +1,44 @@
+import argparse
+import os
+import shutil
+import sys
+from pathlib import Path
+from typing import List, Optional
+
 import uvicorn
 
-from calc_example.gunicorn_runner import GunicornApplication
+from calc_example.gunicorn_runner import GunicornApplication, mark_worker_dead
 from calc_example.settings import settings
 
 
-def main() -> None:
-    """Entrypoint of the application."""
+def set_multiproc_dir() -> None:
+    """
+    Sets mutiproc_dir env variable.
+
+    This function cleans up the multiprocess directory
+    and recreates it. This actions are required by prometheus-client
+    to share metrics between processes.
+
+    After cleanup, it sets two variables.
+    Uppercase and lowercase because different
+    versions of the prometheus-client library
+    depend on different environment variables,
+    so I've decided to export all needed variables,
+    to avoid undefined behaviour.
+    """
+    shutil.rmtree(settings.prometheus_dir, ignore_errors=True)
+    os.makedirs(settings.prometheus_dir, exist_ok=True)
+    os.environ["prometheus_multiproc_dir"] = str(
+        settings.prometheus_dir.expanduser().absolute(),
+    )
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = str(
+        settings.prometheus_dir.expanduser().absolute(),
+    )
+
+
+def serve() -> None:
+    """Starts the server."""
+    set_multiproc_dir()
     if settings.reload:
         uvicorn.run(
             "calc_example.web.application:get_app",
@@ -20,17 +53,92 @@ def main() -> None:
         # We choose gunicorn only if reload
         # option is not used, because reload
         # feature doen't work with Uvicorn workers.
+        factory = "get_preloaded_app" if settings.preload else "get_app"
         GunicornApplication(
-            "calc_example.web.application:get_app",
+            f"calc_example.web.application:{factory}",
             host=settings.host,
             port=settings.port,
             workers=settings.workers_count,
-            factory=True,
+            preload=settings.preload,
             accesslog="-",
             loglevel=settings.log_level.value.lower(),
             access_log_format='%r "-" %s "-" %Tf',  # noqa: WPS323
+            child_exit=mark_worker_dead,
         ).run()
 
 
+def eval_file(args: argparse.Namespace) -> None:
+    """
+    Evaluates a file of expressions without the server.
+
+    Every line is evaluated like a line of `/api/calculate/stream`
+    and its outcome is written to the output as an NDJSON line
+    in the input order. Blank lines get an error outcome,
+    so the outcomes are aligned with the input lines.
+
+    :param args: parsed command line arguments.
+    """
+    # Imported here, so the server doesn't load the bulk evaluator.
+    from calc_example.services.bulk import evaluate_file  # noqa: WPS433
+    from calc_example.web.api.calculator.views import (  # noqa: WPS433
+        encode_line_outcome,
+    )
+
+    report = evaluate_file(
+        Path(args.input),
+        Path(args.output),
+        encode_line_outcome,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+    )
+    print(  # noqa: WPS421
+        f"{report.lines} lines in {report.seconds:.2f}s:"
+        f" {report.lines_per_sec:.0f} lines/s,"
+        f" {report.bytes_per_sec / 2**20:.1f} MiB/s",
+        file=sys.stderr,
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Entrypoint of the application.
+
+    Usage::
+
+        python -m calc_example
+        python -m calc_example eval-file in.txt out.ndjson --workers 8
+
+    :param argv: command line arguments.
+    """
+    parser = argparse.ArgumentParser(prog="python -m calc_example")
+    commands = parser.add_subparsers(dest="command")
+    commands.add_parser("serve", help="start the server, the default command")
+
+    eval_parser = commands.add_parser(
+        "eval-file",
+        help="evaluate a file with an expression per line",
+    )
+    eval_parser.add_argument("input", help="file with an expression per line")
+    eval_parser.add_argument("output", help="file for NDJSON results and errors")
+    eval_parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="quantity of processes, 1 evaluates inline",
+    )
+    eval_parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=2**20,
+        help="approximate size in bytes of the input sent to a process at once",
+    )
+
+    args = parser.parse_args(argv)
+    if args.command == "eval-file":
+        eval_file(args)
+    else:
+        serve()
+
+
 if __name__ == "__main__":
     main()
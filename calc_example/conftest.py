@@ -1,9 +1,16 @@
-from typing import Any, AsyncGenerator
+from pathlib import Path
+from typing import Any, AsyncGenerator, Generator
 
 import pytest
 from fastapi import FastAPI
 from httpx import AsyncClient
 
+from calc_example.services.executor.lifetime import init_executor, shutdown_executor
+from calc_example.services.result_cache.lifetime import (
+    init_result_cache,
+    shutdown_result_cache,
+)
+from calc_example.settings import settings
 from calc_example.web.application import get_app
 
 
@@ -18,14 +25,24 @@ def anyio_backend() -> str:
 
 
 @pytest.fixture
-def fastapi_app() -> FastAPI:
+def fastapi_app(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> Generator[FastAPI, None, None]:
     """
     Fixture for creating FastAPI app.
 
-    :return: fastapi app with mocked dependencies.
+    :param tmp_path: directory of the test.
+    :param monkeypatch: pytest monkeypatch fixture.
+    :yield: fastapi app with mocked dependencies.
     """
+    monkeypatch.setattr(settings, "result_cache_path", tmp_path / "results")
     application = get_app()
-    return application  # noqa: WPS331
+    init_executor(application)
+    init_result_cache(application)
+    yield application
+    shutdown_result_cache(application)
+    shutdown_executor(application)
 
 
 @pytest.fixture
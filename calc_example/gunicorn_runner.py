@@ -1,7 +1,9 @@
 from typing import Any
 
 from gunicorn.app.base import BaseApplication
+from gunicorn.arbiter import Arbiter
 from gunicorn.util import import_app
+from gunicorn.workers.base import Worker
 from uvicorn.workers import UvicornWorker as BaseUvicornWorker
 
 try:
@@ -10,6 +12,20 @@ except ImportError:
     uvloop = None  # type: ignore  # noqa: WPS440 (variables overlap)
 
 
+def mark_worker_dead(server: Arbiter, worker: Worker) -> None:
+    """
+    Gunicorn hook which removes live metrics of an exited worker.
+
+    :param server: gunicorn arbiter.
+    :param worker: exited worker.
+    """
+    # prometheus-client chooses the multiprocess mode on import,
+    # so it's imported after main() has set the metrics directory.
+    from prometheus_client import multiprocess  # noqa: WPS433
+
+    multiprocess.mark_process_dead(worker.pid)
+
+
 class UvicornWorker(BaseUvicornWorker):
     """
     Configuration for uvicorn workers.
@@ -27,6 +43,27 @@ class UvicornWorker(BaseUvicornWorker):
         "proxy_headers": False,
     }
 
+    def init_process(self) -> None:
+        """Record the start of the worker before it loads the application."""
+        from calc_example.services.metrics import record_worker_start  # noqa: WPS433
+
+        record_worker_start(preloaded=self.cfg.preload_app)
+        super().init_process()
+
+
+class PreloadedUvicornWorker(UvicornWorker):
+    """
+    Uvicorn worker forked with an application loaded by the master.
+
+    The master calls the factory once, so workers get
+    the application instead of the factory.
+    """
+
+    CONFIG_KWARGS = {  # noqa: WPS115 (upper-case constant in a class)
+        **UvicornWorker.CONFIG_KWARGS,
+        "factory": False,
+    }
+
 
 class GunicornApplication(BaseApplication):
     """
@@ -42,15 +79,19 @@ class GunicornApplication(BaseApplication):
         host: str,
         port: int,
         workers: int,
+        preload: bool = False,
         **kwargs: Any,
     ):
+        worker_class = PreloadedUvicornWorker if preload else UvicornWorker
         self.options = {
             "bind": f"{host}:{port}",
             "workers": workers,
-            "worker_class": "calc_example.gunicorn_runner.UvicornWorker",
+            "worker_class": f"{__name__}.{worker_class.__name__}",
+            "preload_app": preload,
             **kwargs,
         }
         self.app = app
+        self.preload = preload
         super().__init__()
 
     def load_config(self) -> None:
@@ -71,9 +112,13 @@ class GunicornApplication(BaseApplication):
         Load actual application.
 
         Gunicorn loads application based on this
-        function's returns. We return python's path to
-        the app's factory.
+        function's returns. We return the app's factory,
+        which is called by every worker. In the preload mode
+        the master calls it once and we return the application.
 
-        :returns: python path to app factory.
+        :returns: app factory or the application.
         """
-        return import_app(self.app)
+        factory = import_app(self.app)
+        if self.preload:
+            return factory()
+        return factory
@@ -0,0 +1,3 @@
+from .controller import AdmissionController, estimate_cost
+
+__all__ = ["AdmissionController", "estimate_cost"]
@@ -0,0 +1,90 @@
+import asyncio
+import math
+import time
+from typing import Optional
+
+from calc_example.services.calculator.tokenizer import TokenKind, tokenize
+from calc_example.services.metrics import QUEUEING_DELAY, SHED_REQUESTS
+
+COSTLY_TOKEN_KINDS = frozenset((TokenKind.OPERATOR, TokenKind.LPAREN))
+
+
+def estimate_cost(expression: str) -> int:
+    """
+    Estimates the work of an expression from its tokens.
+
+    Every operation and every level of parentheses costs a unit,
+    so "2+3" costs 1 and deep or long expressions cost more.
+
+    :param expression: raw expression.
+    :return: the cost, at least 1.
+    """
+    cost = sum(token.kind in COSTLY_TOKEN_KINDS for token in tokenize(expression))
+    return max(cost, 1)
+
+
+class AdmissionController:
+    """
+    Decides which requests of a worker are handled under overload.
+
+    The queueing delay is the time callbacks wait in the ready queue
+    of the event loop, sampled at the start of every request and
+    smoothed. A worker is overloaded when the delay exceeds the target
+    or too many requests are in flight. Then only cheap requests are
+    admitted, until the delay exceeds the maximum and everything is shed.
+    """
+
+    def __init__(
+        self,
+        target_delay: float,
+        max_delay: float,
+        max_in_flight: int,
+        cheap_cost: int,
+        smoothing: float = 0.2,
+    ) -> None:
+        self.target_delay = target_delay
+        self.max_delay = max_delay
+        self.max_in_flight = max_in_flight
+        self.cheap_cost = cheap_cost
+        self.smoothing = smoothing
+        self.delay = 0.0
+        self.in_flight = 0
+        self.shed = 0
+
+    def probe(self) -> None:
+        """Samples the queueing delay once the event loop reaches a new callback."""
+        asyncio.get_running_loop().call_soon(self.observe, time.perf_counter())
+
+    def observe(self, scheduled: float) -> None:
+        """
+        Records a sample of the queueing delay.
+
+        :param scheduled: when the sample was scheduled.
+        """
+        sample = time.perf_counter() - scheduled
+        self.delay += self.smoothing * (sample - self.delay)
+        QUEUEING_DELAY.observe(sample)
+
+    @property
+    def is_overloaded(self) -> bool:
+        """Whether requests have to be checked before they are admitted."""
+        return self.delay > self.target_delay or self.in_flight >= self.max_in_flight
+
+    def admit(self, cost: Optional[int]) -> bool:
+        """
+        Decides whether a request is handled while the worker is overloaded.
+
+        :param cost: estimated cost of the request, None if it's unknown.
+        :return: whether the request is admitted.
+        """
+        if cost is not None and cost <= self.cheap_cost:
+            if self.delay <= self.max_delay:
+                return True
+        self.shed += 1
+        SHED_REQUESTS.inc()
+        return False
+
+    @property
+    def retry_after(self) -> int:
+        """Seconds a shed client should wait before retrying."""
+        return max(1, math.ceil(self.delay))
@@ -0,0 +1,3 @@
+from .catalog import Asset, AssetCatalog, Representation
+
+__all__ = ["Asset", "AssetCatalog", "Representation"]
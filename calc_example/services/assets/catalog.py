@@ -0,0 +1,264 @@
+import gzip
+import hashlib
+import mimetypes
+from functools import lru_cache
+from pathlib import Path, PurePosixPath
+from typing import Dict, FrozenSet, Optional
+
+try:
+    import brotli  # noqa: WPS433 (Found nested import)
+except ImportError:
+    brotli = None  # type: ignore  # noqa: WPS440 (variables overlap)
+
+# Hashed URLs change with the content, so clients keep them forever.
+IMMUTABLE = "public, max-age=31536000, immutable"
+# Other URLs are revalidated with their ETag on every use.
+REVALIDATE = "no-cache"
+
+IDENTITY = "identity"
+# Content encodings in the order of preference.
+ENCODINGS = ("br", "gzip")
+COMPRESSIBLE_TYPES = frozenset(
+    (
+        "application/javascript",
+        "application/json",
+        "image/svg+xml",
+        "text/css",
+        "text/html",
+        "text/javascript",
+        "text/plain",
+    ),
+)
+
+
+def content_hash(content: bytes) -> str:
+    """
+    Short hash identifying the content of an asset.
+
+    :param content: the content.
+    :return: hex digest.
+    """
+    return hashlib.sha256(content).hexdigest()[:16]
+
+
+def hashed_name(path: str, digest: str) -> str:
+    """
+    Name of an asset with the hash of its content, e.g. js/app.0123abcd.js.
+
+    :param path: relative path of the asset.
+    :param digest: hash of its content.
+    :return: the hashed path.
+    """
+    posix_path = PurePosixPath(path)
+    return str(posix_path.with_name(f"{posix_path.stem}.{digest}{posix_path.suffix}"))
+
+
+def guess_media_type(name: str) -> str:
+    """
+    Media type of a file by its name.
+
+    :param name: name of the file.
+    :return: the media type, application/octet-stream if it's unknown.
+    """
+    return mimetypes.guess_type(name)[0] or "application/octet-stream"
+
+
+def compress(content: bytes, media_type: str) -> Dict[str, bytes]:
+    """
+    Compresses text content with every available encoding.
+
+    Encodings which don't make the content smaller are left out.
+
+    :param content: the content.
+    :param media_type: type of the content.
+    :return: compressed bodies by content encoding.
+    """
+    if media_type not in COMPRESSIBLE_TYPES:
+        return {}
+    bodies = {"gzip": gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        bodies["br"] = brotli.compress(content, quality=11)
+    return {
+        encoding: body for encoding, body in bodies.items() if len(body) < len(content)
+    }
+
+
+def _is_rejected(parameters: str) -> bool:
+    for parameter in parameters.split(";"):
+        name, _, value = parameter.partition("=")
+        if name.strip() != "q":
+            continue
+        try:
+            return float(value) <= 0
+        except ValueError:
+            return True
+    return False
+
+
+@lru_cache(maxsize=64)
+def accepted_values(header: str) -> FrozenSet[str]:
+    """
+    Values accepted by a client in an Accept or Accept-Encoding header.
+
+    Values with q=0 are rejected, other weights are ignored.
+
+    :param header: value of the header.
+    :return: lowercase accepted values, e.g. media types or encodings.
+    """
+    accepted = set()
+    for item in header.split(","):
+        name, _, parameters = item.partition(";")
+        if name.strip() and not _is_rejected(parameters):
+            accepted.add(name.strip().lower())
+    return frozenset(accepted)
+
+
+class Representation:
+    """Body of an asset in a content encoding with its response headers."""
+
+    __slots__ = ("encoding", "body", "headers", "not_modified_headers")
+
+    def __init__(
+        self,
+        encoding: str,
+        body: bytes,
+        media_type: str,
+        etag: str,
+        cache_control: str,
+    ) -> None:
+        self.encoding = encoding
+        self.body = body
+        self.not_modified_headers = {
+            "etag": etag,
+            "cache-control": cache_control,
+            "vary": "Accept-Encoding",
+        }
+        self.headers = {
+            **self.not_modified_headers,
+            "content-type": media_type,
+            "content-length": str(len(body)),
+        }
+        if encoding != IDENTITY:
+            self.headers["content-encoding"] = encoding
+
+
+class Asset:
+    """
+    Content kept in memory with its compressed representations.
+
+    Every representation has its own strong ETag, derived from
+    the hash of the content and the encoding.
+    """
+
+    __slots__ = ("digest", "representations", "etags")
+
+    def __init__(
+        self,
+        content: bytes,
+        media_type: str,
+        cache_control: str,
+        compressed: Optional[Dict[str, bytes]] = None,
+    ) -> None:
+        self.digest = content_hash(content)
+        if compressed is None:
+            compressed = compress(content, media_type)
+        if media_type.startswith("text/"):
+            media_type = f"{media_type}; charset=utf-8"
+        bodies = {IDENTITY: content, **compressed}
+        self.representations = {
+            encoding: Representation(
+                encoding,
+                body,
+                media_type,
+                self._etag(encoding),
+                cache_control,
+            )
+            for encoding, body in bodies.items()
+        }
+        self.etags = frozenset(
+            representation.not_modified_headers["etag"]
+            for representation in self.representations.values()
+        )
+
+    def negotiate(self, accept_encoding: str) -> Representation:
+        """
+        Chooses the smallest representation the client accepts.
+
+        :param accept_encoding: value of the Accept-Encoding header.
+        :return: the representation.
+        """
+        accepted = accepted_values(accept_encoding)
+        for encoding in ENCODINGS:
+            acceptable = encoding in accepted or "*" in accepted
+            if acceptable and encoding in self.representations:
+                return self.representations[encoding]
+        return self.representations[IDENTITY]
+
+    def is_fresh(self, if_none_match: Optional[str]) -> bool:
+        """
+        Whether the client's copy is current, so 304 can be sent.
+
+        :param if_none_match: value of the If-None-Match header.
+        :return: True if any of the ETags matches.
+        """
+        if not if_none_match:
+            return False
+        for tag in if_none_match.split(","):
+            tag = tag.strip()
+            if tag == "*" or tag.removeprefix("W/") in self.etags:
+                return True
+        return False
+
+    def _etag(self, encoding: str) -> str:
+        if encoding == IDENTITY:
+            return f'"{self.digest}"'
+        return f'"{self.digest}-{encoding}"'
+
+
+class AssetCatalog:
+    """
+    Files of a directory served from memory.
+
+    Every file is read and compressed once. It's available under
+    its hashed name, which is cached forever, and under its name,
+    which is revalidated.
+    """
+
+    def __init__(self, directory: Path, prefix: str) -> None:
+        self.prefix = prefix
+        self.assets: Dict[str, Asset] = {}
+        self.hashed_names: Dict[str, str] = {}
+        for file_path in sorted(directory.rglob("*")):
+            if file_path.is_file():
+                name = file_path.relative_to(directory).as_posix()
+                self._add(name, file_path.read_bytes())
+
+    def get(self, name: str) -> Optional[Asset]:
+        """
+        Finds an asset by its name or hashed name.
+
+        :param name: path relative to the directory.
+        :return: the asset or None if it's unknown.
+        """
+        return self.assets.get(name)
+
+    def url(self, name: str) -> str:
+        """
+        URL of the hashed name of an asset, for pages referencing it.
+
+        :param name: path relative to the directory.
+        :return: the URL.
+        :raises ValueError: if the asset is unknown.
+        """
+        try:
+            return f"{self.prefix}/{self.hashed_names[name]}"
+        except KeyError:
+            raise ValueError(f"Unknown asset '{name}'.")
+
+    def _add(self, name: str, content: bytes) -> None:
+        media_type = guess_media_type(name)
+        compressed = compress(content, media_type)
+        immutable = Asset(content, media_type, IMMUTABLE, compressed)
+        self.hashed_names[name] = hashed_name(name, immutable.digest)
+        self.assets[self.hashed_names[name]] = immutable
+        self.assets[name] = Asset(content, media_type, REVALIDATE, compressed)
@@ -0,0 +1,3 @@
+from .evaluator import BulkReport, evaluate_chunk, evaluate_file, split_chunks
+
+__all__ = ["BulkReport", "evaluate_chunk", "evaluate_file", "split_chunks"]
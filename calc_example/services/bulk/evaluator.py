@@ -0,0 +1,135 @@
+import mmap
+import multiprocessing
+import time
+from functools import partial
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterator, List, NamedTuple, Tuple
+
+# Evaluates a stripped line and returns the encoded outcome.
+LineEvaluator = Callable[[bytes], bytes]
+
+
+class BulkReport(NamedTuple):
+    """Throughput of a bulk evaluation."""
+
+    lines: int
+    input_bytes: int
+    seconds: float
+
+    @property
+    def lines_per_sec(self) -> float:
+        """Evaluated lines per second."""
+        return self.lines / self.seconds if self.seconds else 0
+
+    @property
+    def bytes_per_sec(self) -> float:
+        """Read input bytes per second."""
+        return self.input_bytes / self.seconds if self.seconds else 0
+
+
+def split_chunks(data: mmap.mmap, chunk_size: int) -> List[Tuple[int, int]]:
+    """
+    Split the input into chunks which end at line separators.
+
+    A chunk is extended to the end of the line it cuts,
+    so no line is shared by two chunks.
+
+    :param data: mapped input.
+    :param chunk_size: approximate size of a chunk in bytes.
+    :return: start and end offsets of the chunks.
+    """
+    chunks = []
+    start = 0
+    size = len(data)
+    while start < size:
+        end = data.find(b"\n", min(start + max(chunk_size, 1), size) - 1)
+        end = size if end == -1 else end + 1
+        chunks.append((start, end))
+        start = end
+    return chunks
+
+
+def evaluate_chunk(
+    evaluate_line: LineEvaluator,
+    path: str,
+    chunk: Tuple[int, int],
+) -> Tuple[bytes, int]:
+    """
+    Evaluate lines of a chunk of the input.
+
+    Every line gets an outcome, blank ones included, so the n-th
+    line of the output is the outcome of the n-th line of the input.
+
+    :param evaluate_line: picklable line evaluator.
+    :param path: path of the input.
+    :param chunk: start and end offsets of the chunk.
+    :return: encoded outcomes of the lines and their quantity.
+    """
+    start, end = chunk
+    with open(path, "rb") as input_file:
+        with mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            lines = data[start:end].split(b"\n")
+    if not lines[-1]:
+        # The chunk ends with a line separator, not with an empty line.
+        lines.pop()
+    outcomes = [evaluate_line(line.strip()) for line in lines]
+    return b"".join(outcomes), len(outcomes)
+
+
+def _map_chunks(
+    evaluate: Callable[[Tuple[int, int]], Tuple[bytes, int]],
+    chunks: List[Tuple[int, int]],
+    workers: int,
+) -> Iterator[Tuple[bytes, int]]:
+    if workers <= 1 or len(chunks) <= 1:
+        yield from map(evaluate, chunks)
+        return
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(min(workers, len(chunks))) as pool:
+        yield from pool.imap(evaluate, chunks)
+
+
+def _write_outcomes(
+    output: BinaryIO,
+    outcomes: Iterator[Tuple[bytes, int]],
+) -> int:
+    lines = 0
+    for encoded, count in outcomes:
+        output.write(encoded)
+        lines += count
+    return lines
+
+
+def evaluate_file(
+    input_path: Path,
+    output_path: Path,
+    evaluate_line: LineEvaluator,
+    workers: int,
+    chunk_size: int,
+) -> BulkReport:
+    """
+    Evaluate every line of a file and write the outcomes in the input order.
+
+    The input is memory mapped and split into line aligned chunks,
+    which are evaluated by a pool of processes, so a file much larger
+    than the memory is read once and only by the workers. Outcomes
+    of a chunk are written as soon as all previous chunks are written.
+
+    :param input_path: file with an expression per line.
+    :param output_path: file for the outcomes.
+    :param evaluate_line: picklable line evaluator.
+    :param workers: quantity of processes, 1 evaluates inline.
+    :param chunk_size: approximate size of a chunk in bytes.
+    :return: throughput of the evaluation.
+    """
+    started = time.perf_counter()
+    input_bytes = input_path.stat().st_size
+    chunks: List[Tuple[int, int]] = []
+    if input_bytes:
+        with open(input_path, "rb") as input_file:
+            with mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                chunks = split_chunks(data, chunk_size)
+    evaluate = partial(evaluate_chunk, evaluate_line, str(input_path))
+    with open(output_path, "wb") as output:
+        lines = _write_outcomes(output, _map_chunks(evaluate, chunks, workers))
+    return BulkReport(lines, input_bytes, time.perf_counter() - started)
@@ -1,15 +1,49 @@
+from .cache import LRUCache
 from .calculator import (
     AddCalculator,
     CalculatorFactory,
     DivideCalculator,
     MultiplyCalculator,
     SubtractCalculator,
+    calculator_factory,
+    evaluate,
 )
+from .incremental import IncrementalCalculator, IncrementalExpression
+from .jit import TemplateCalculator, TemplateRegistry
+from .numeric import Arithmetic, get_arithmetic, serialize_number
+from .prepared import PreparedExpression, make_handle, parse_handle, prepared_cache
+from .rpn_calculation import (
+    CompiledExpression,
+    RPNCalculator,
+    expression_cache,
+    get_rpn_calculator,
+)
+from .vectorized import VectorizedCalculator, VectorizedExpression
 
 __all__ = [
     "CalculatorFactory",
+    "calculator_factory",
+    "evaluate",
     "AddCalculator",
     "SubtractCalculator",
     "MultiplyCalculator",
     "DivideCalculator",
+    "RPNCalculator",
+    "CompiledExpression",
+    "LRUCache",
+    "expression_cache",
+    "get_rpn_calculator",
+    "Arithmetic",
+    "get_arithmetic",
+    "serialize_number",
+    "VectorizedCalculator",
+    "VectorizedExpression",
+    "IncrementalCalculator",
+    "IncrementalExpression",
+    "TemplateCalculator",
+    "TemplateRegistry",
+    "PreparedExpression",
+    "make_handle",
+    "parse_handle",
+    "prepared_cache",
 ]
@@ -0,0 +1,90 @@
+from collections import OrderedDict
+from typing import Dict, Generic, Hashable, List, Optional, TypeVar
+
+KeyT = TypeVar("KeyT", bound=Hashable)
+ValueT = TypeVar("ValueT")
+
+
+class LRUCache(Generic[KeyT, ValueT]):
+    """
+    Bounded mapping which evicts the least recently used entry.
+
+    Keeps hit, miss and eviction counters so the cache
+    efficiency can be inspected at runtime.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        if maxsize < 0:
+            raise ValueError("Cache size must not be negative.")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: "OrderedDict[KeyT, ValueT]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._data
+
+    def get(self, key: KeyT) -> Optional[ValueT]:
+        """
+        Get a value and mark it as recently used.
+
+        :param key: cache key.
+        :return: cached value or None if the key is missing.
+        """
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: KeyT, value: ValueT) -> None:
+        """
+        Store a value, evicting the oldest entry when the cache is full.
+
+        :param key: cache key.
+        :param value: value to store.
+        """
+        if self.maxsize == 0:
+            return
+        if key in self._data:
+            self._data.move_to_end(key)
+        self._data[key] = value
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def values(self) -> List[ValueT]:
+        """
+        Cached values without marking them as used.
+
+        :return: values from the least to the most recently used.
+        """
+        return list(self._data.values())
+
+    def clear(self) -> None:
+        """Drop all entries and reset the counters."""
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Current cache counters.
+
+        :return: size, capacity, hits, misses and evictions.
+        """
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -1,11 +1,69 @@
-import re
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import Callable, Dict, List, Optional
+
+from calc_example.services.calculator.tokenizer import Token, TokenKind, tokenize
+
+DEFAULT_DECIMAL_PLACES = 4
+
+Operation = Callable[[float, float], float]
+
+
+def add(a: float, b: float) -> float:
+    """Add two numbers."""
+    return a + b
+
+
+def subtract(a: float, b: float) -> float:
+    """Subtract b from a."""
+    return a - b
+
+
+def multiply(a: float, b: float) -> float:
+    """Multiply two numbers."""
+    return a * b
+
+
+def divide(a: float, b: float) -> float:
+    """
+    Divide a by b, rounding to DEFAULT_DECIMAL_PLACES.
+
+    :raises ValueError: if the divisor is zero.
+    """
+    if b == 0:
+        raise ValueError("Cannot divide by zero.")
+    return round(a / b, DEFAULT_DECIMAL_PLACES)
+
+
+OPERATIONS: Dict[str, Operation] = {
+    "+": add,
+    "-": subtract,
+    "*": multiply,
+    "/": divide,
+}
+
+
+def evaluate(a: float, operation: str, b: float) -> float:
+    """
+    Apply a binary operation without creating calculator objects.
+
+    :param a: left operand.
+    :param operation: one of "+", "-", "*" and "/".
+    :param b: right operand.
+    :return: the result of the operation.
+    :raises ValueError: if the operation is unknown or the divisor is zero.
+    """
+    try:
+        func = OPERATIONS[operation]
+    except KeyError:
+        raise ValueError(f"Invalid operation {operation}.")
+    return func(a, b)
 
 
 class Calculator(ABC):
     """Abstract base class for calculator classes."""
 
+    __slots__ = ("a", "b", "expression")
+
     def __init__(self, a: float, b: float, expression: Optional[str] = None) -> None:
         self.a = a
         self.b = b
@@ -19,44 +77,51 @@ class Calculator(ABC):
 class AddCalculator(Calculator):
     """Class for performing addition."""
 
+    __slots__ = ()
+
     def calculate(self) -> float:
-        return self.a + self.b
+        return add(self.a, self.b)
 
 
 class SubtractCalculator(Calculator):
     """Class for performing subtraction."""
 
+    __slots__ = ()
+
     def calculate(self) -> float:
-        return self.a - self.b
+        return subtract(self.a, self.b)
 
 
 class MultiplyCalculator(Calculator):
     """Class for performing multiplication."""
 
+    __slots__ = ()
+
     def calculate(self) -> float:
-        return self.a * self.b
+        return multiply(self.a, self.b)
 
 
 class DivideCalculator(Calculator):
     """Class for performing division."""
 
-    DEFAULT_DECIMAL_PLACES = 4
+    __slots__ = ()
 
-    def calculate(self) -> float:
-        self._validate_input()
-        return round(self.a / self.b, self.DEFAULT_DECIMAL_PLACES)
+    DEFAULT_DECIMAL_PLACES = DEFAULT_DECIMAL_PLACES
 
-    def _validate_input(self) -> None:
-        """Validate if the divisor is non-zero."""
-        if self.b == 0:
-            raise ValueError("Cannot divide by zero.")
+    def calculate(self) -> float:
+        return divide(self.a, self.b)
 
 
 class CalculatorFactory:
     """
     Factory class for creating calculator instances based on operation.
+
+    The factory is stateless, use the module-level `calculator_factory`
+    instead of creating new instances.
     """
 
+    __slots__ = ()
+
     operation_dict = {
         "+": AddCalculator,
         "-": SubtractCalculator,
@@ -68,11 +133,21 @@ class CalculatorFactory:
         """
         Create a Calculator instance from a string expression.
         """
-        parts = re.split(r"([+\-*/])", expression)
-        if len(parts) != 3:
+        return self.from_tokens(tokenize(expression))
+
+    def from_tokens(self, tokens: List[Token]) -> Calculator:
+        """
+        Create a Calculator instance from an already tokenized expression.
+        """
+        if len(tokens) != 3:
+            raise ValueError("Invalid expression.")
+        a, operation, b = tokens
+        if a.kind is not TokenKind.NUMBER or b.kind is not TokenKind.NUMBER:
             raise ValueError("Invalid expression.")
-        a, operation, b = parts
-        calculator_class = self.operation_dict.get(operation)
+        calculator_class = self.operation_dict.get(operation.value)
         if not calculator_class:
-            raise ValueError(f"Invalid operation {operation}.")
-        return calculator_class(float(a), float(b))
+            raise ValueError(f"Invalid operation {operation.value}.")
+        return calculator_class(float(a.value), float(b.value))
+
+
+calculator_factory = CalculatorFactory()
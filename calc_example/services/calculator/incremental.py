@@ -0,0 +1,351 @@
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from calc_example.services.calculator.cache import LRUCache
+from calc_example.services.calculator.rpn_calculation import RPNCalculator
+from calc_example.services.calculator.tokenizer import Token, TokenKind, tokenize
+
+GROUP = "("
+
+Edit = Tuple[int, int, str]
+
+
+class Node:
+    """
+    A node of the expression tree with its cached partial result.
+
+    Numbers have no operator, groups in parentheses have the "("
+    operator and a single child on the left. Only lengths are stored,
+    positions are derived while descending from the root, so an edit
+    updates only the nodes on the path to the changed subtree.
+    """
+
+    __slots__ = ("operator", "left", "right", "length", "value", "error")
+
+    def __init__(
+        self,
+        operator: Optional[str],
+        length: int,
+        left: Optional["Node"] = None,
+        right: Optional["Node"] = None,
+    ) -> None:
+        self.operator = operator
+        self.length = length
+        self.left = left
+        self.right = right
+        self.value = 0.0
+        self.error: Optional[str] = None
+
+    def evaluate(self) -> None:
+        """Recompute the partial result from the partial results of the children."""
+        if self.left is None:
+            return
+        if self.right is None:
+            self.value, self.error = self.left.value, self.left.error
+            return
+        self.error = self.left.error or self.right.error
+        if self.error is not None:
+            return
+        func = RPNCalculator.operators[self.operator][1]  # type: ignore
+        try:
+            self.value = func(self.left.value, self.right.value)
+        except ValueError as exc:
+            self.error = str(exc)
+
+
+class _Parser:
+    """Precedence climbing parser building an evaluated tree."""
+
+    def __init__(self, tokens: List[Token]) -> None:
+        self.tokens = tokens
+        self.index = 0
+
+    def parse(self) -> Node:
+        if not self.tokens:
+            raise ValueError("Invalid expression")
+        try:
+            root = self._parse_expression(1)
+        except RecursionError:
+            raise ValueError("Expression is too deeply nested")
+        self._expect_end()
+        return root
+
+    def _expect_end(self) -> None:
+        token = self._peek()
+        if token is None:
+            return
+        if token.kind is TokenKind.RPAREN:
+            raise ValueError("Mismatched parentheses")
+        raise ValueError("Invalid expression")
+
+    def _peek(self) -> Optional[Token]:
+        if self.index < len(self.tokens):
+            return self.tokens[self.index]
+        return None
+
+    def _parse_expression(self, min_precedence: int) -> Node:
+        left = self._parse_operand()
+        token = self._peek()
+        while token is not None and token.kind is TokenKind.OPERATOR:
+            precedence = RPNCalculator.operators[token.value][0]
+            if precedence < min_precedence:
+                break
+            self.index += 1
+            right = self._parse_expression(precedence + 1)
+            left = Node(token.value, left.length + 1 + right.length, left, right)
+            left.evaluate()
+            token = self._peek()
+        return left
+
+    def _parse_operand(self) -> Node:
+        token = self._peek()
+        self.index += 1
+        if token is None or token.kind in {TokenKind.OPERATOR, TokenKind.RPAREN}:
+            raise ValueError("Invalid expression")
+        if token.kind is TokenKind.NUMBER:
+            node = Node(None, len(token.value))
+            node.value = float(token.value)
+            return node
+        if token.kind is not TokenKind.LPAREN:
+            raise ValueError(f"Invalid character: {token.value}")
+        child = self._parse_expression(1)
+        closing = self._peek()
+        if closing is None or closing.kind is not TokenKind.RPAREN:
+            raise ValueError("Mismatched parentheses")
+        self.index += 1
+        node = Node(GROUP, child.length + 2, child)
+        node.evaluate()
+        return node
+
+
+def parse_tree(expression: str) -> Node:
+    """
+    Parses an expression without spaces into an evaluated tree.
+
+    :param expression: A string of the mathematical expression
+    :return: The root of the tree
+    :raises ValueError: if the expression is malformed
+    """
+    return _Parser(tokenize(expression)).parse()
+
+
+def _fits(node: Node, parent: Optional[Node], replaced: Node) -> bool:
+    """
+    Whether a separately parsed subtree can replace a child of the parent.
+
+    A subtree keeps the meaning of the whole expression unless its root
+    operator binds weaker than the parent's one; on the right side,
+    an equal precedence would also change the associativity.
+    """
+    if parent is None or parent.operator == GROUP:
+        return True
+    if node.operator is None or node.operator == GROUP:
+        return True
+    precedence = RPNCalculator.operators[node.operator][0]
+    parent_precedence = RPNCalculator.operators[parent.operator][0]  # type: ignore
+    if parent.left is replaced:
+        return precedence >= parent_precedence
+    return precedence > parent_precedence
+
+
+def _child_spans(node: Node, offset: int) -> List[Tuple[Node, int]]:
+    if node.left is None:
+        return []
+    if node.right is None:
+        return [(node.left, offset + 1)]
+    return [(node.left, offset), (node.right, offset + node.left.length + 1)]
+
+
+def _extend_window(
+    window: Optional[Tuple[int, int, int]],
+    start: int,
+    end: int,
+    size: int,
+) -> Tuple[int, int, int]:
+    """
+    Extends the changed range by an edit.
+
+    :param window: start, end in the original text and end in the edited
+        text of the range changed by previous edits.
+    :param start: start of the edit in the edited text.
+    :param end: end of the edit in the edited text.
+    :param size: length of the new text of the edit.
+    :return: the changed range including the edit.
+    """
+    if window is None:
+        return start, end, start + size
+    low, original_high, high = window
+    if end > high:
+        original_high += end - high
+        high = end
+    return min(low, start), original_high, high + size - (end - start)
+
+
+class IncrementalExpression:
+    """
+    An expression which is re-evaluated incrementally after edits.
+
+    An edit replaces a range of the expression text. Only the smallest
+    subtree which contains the range is parsed again, and only the
+    partial results on the path from it to the root are recomputed,
+    so the cost of an edit depends on the depth of the tree rather
+    than on the length of the expression.
+
+    Spaces are dropped, positions of edits refer to the expression
+    without spaces.
+    """
+
+    def __init__(self, expression: str) -> None:
+        self.expression = expression.replace(" ", "")
+        self.root = parse_tree(self.expression)
+
+    @property
+    def result(self) -> float:
+        """
+        The result of the current expression.
+
+        :raises ValueError: if the expression can't be evaluated,
+            e.g. because of a division by zero.
+        """
+        if self.root.error is not None:
+            raise ValueError(self.root.error)
+        return self.root.value
+
+    def apply_all(
+        self,
+        edits: Iterable[Edit],
+        check: Optional[Callable[[str], None]] = None,
+    ) -> None:
+        """
+        Applies edits in order as a single change.
+
+        Positions of every edit refer to the text after the previous
+        edits, intermediate texts don't have to be valid expressions.
+
+        :param edits: (start, end, text) replacements.
+        :param check: validation of the edited text, which raises
+            ValueError before the expression is changed.
+        :raises ValueError: if an edit is out of the expression or
+            the edited expression is malformed.
+        """
+        expression = self.expression
+        window: Optional[Tuple[int, int, int]] = None
+        for start, end, text in edits:
+            if not 0 <= start <= end <= len(expression):
+                raise ValueError("Edit is out of the expression.")
+            text = text.replace(" ", "")
+            expression = expression[:start] + text + expression[end:]
+            window = _extend_window(window, start, end, len(text))
+        if check is not None:
+            check(expression)
+        if window is not None:
+            low, original_high, high = window
+            self.apply(low, original_high, expression[low:high])
+
+    def apply(self, start: int, end: int, text: str) -> None:
+        """
+        Replaces the range of the expression with the text.
+
+        The expression doesn't change if the edit makes it malformed.
+
+        :param start: start of the range.
+        :param end: end of the range, exclusive.
+        :param text: new text of the range.
+        :raises ValueError: if the range is out of the expression or
+            the edited expression is malformed.
+        """
+        if not 0 <= start <= end <= len(self.expression):
+            raise ValueError("Edit is out of the expression.")
+        text = text.replace(" ", "")
+        expression = self.expression[:start] + text + self.expression[end:]
+        delta = len(text) - (end - start)
+        path = self._find_path(start, end)
+        for depth in range(len(path) - 1, 0, -1):
+            node, offset = path[depth]
+            try:
+                replaced = self._replace(path[:depth], node, expression, offset, delta)
+            except ValueError:
+                # Malformed ranges, e.g. with unbalanced parentheses,
+                # are only resolved by the whole expression.
+                break
+            if replaced:
+                self.expression = expression
+                return
+        self.root = parse_tree(expression)
+        self.expression = expression
+
+    def _find_path(self, start: int, end: int) -> List[Tuple[Node, int]]:
+        """Nodes and their offsets down to the smallest one containing the range."""
+        path = [(self.root, 0)]
+        node, offset = self.root, 0
+        while True:  # noqa: WPS457
+            for child, child_offset in _child_spans(node, offset):
+                if child_offset <= start and end <= child_offset + child.length:
+                    node, offset = child, child_offset
+                    path.append((node, offset))
+                    break
+            else:
+                return path
+
+    def _replace(
+        self,
+        ancestors: List[Tuple[Node, int]],
+        node: Node,
+        expression: str,
+        offset: int,
+        delta: int,
+    ) -> bool:
+        """Replaces the node with its reparsed range if the tree keeps its meaning."""
+        parent = ancestors[-1][0]
+        subtree = parse_tree(expression[offset : offset + node.length + delta])
+        if not _fits(subtree, parent, node):
+            return False
+        if parent.left is node:
+            parent.left = subtree
+        else:
+            parent.right = subtree
+        for ancestor, _ in reversed(ancestors):
+            ancestor.length += delta
+            ancestor.evaluate()
+        return True
+
+
+class IncrementalCalculator:
+    """Keeps incrementally evaluated expressions of interactive sessions."""
+
+    def __init__(self, max_sessions: int) -> None:
+        self.sessions: LRUCache[str, IncrementalExpression] = LRUCache(max_sessions)
+
+    def open(self, session_id: str, expression: str) -> IncrementalExpression:
+        """
+        Starts or restarts a session with a full expression.
+
+        :param session_id: identifier of the session.
+        :param expression: A string of the mathematical expression
+        :return: the expression of the session
+        """
+        incremental = IncrementalExpression(expression)
+        self.sessions.put(session_id, incremental)
+        return incremental
+
+    def edit(
+        self,
+        session_id: str,
+        edits: Iterable[Edit],
+        check: Optional[Callable[[str], None]] = None,
+    ) -> IncrementalExpression:
+        """
+        Applies edits to the expression of a session as a single change.
+
+        The expression doesn't change if any of the edits is invalid.
+
+        :param session_id: identifier of the session.
+        :param edits: (start, end, text) replacements.
+        :param check: validation of the edited text.
+        :return: the expression of the session
+        :raises ValueError: if the session is unknown or an edit is invalid.
+        """
+        incremental = self.sessions.get(session_id)
+        if incremental is None:
+            raise ValueError(f"Unknown session '{session_id}'.")
+        incremental.apply_all(edits, check)
+        return incremental
@@ -0,0 +1,279 @@
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from calc_example.services.calculator.cache import LRUCache
+from calc_example.services.calculator.calculator import divide
+from calc_example.services.calculator.opcodes import DIVIDE, OPCODES, PUSH
+from calc_example.services.calculator.rpn_calculation import (
+    CompiledExpression,
+    RPNCalculator,
+)
+from calc_example.services.calculator.tokenizer import (
+    Token,
+    TokenKind,
+    tokenize,
+    tokens_to_text,
+)
+from calc_example.services.metrics import (
+    TEMPLATE_EVALUATIONS,
+    TEMPLATE_PROMOTIONS,
+    stage_timer,
+)
+from calc_example.settings import settings
+
+OPERAND = "#"
+
+SYMBOLS = {opcode: symbol for symbol, opcode in OPCODES.items()}
+
+TemplateFunction = Callable[..., float]
+
+_interpreted = TEMPLATE_EVALUATIONS.labels("interpreted")
+_compiled = TEMPLATE_EVALUATIONS.labels("compiled")
+
+# Optimized programs don't have an operand per number of the
+# expression, templates are generated from the plain ones.
+_structure = RPNCalculator(cache=LRUCache(0), optimize=False)
+
+
+def split_template(tokens: List[Token]) -> Tuple[str, List[float]]:
+    """
+    Splits tokens into the structure of the expression and its numbers.
+
+    :param tokens: tokens of the expression.
+    :return: the template with numbers replaced by OPERAND, and the numbers.
+    """
+    parts = []
+    operands = []
+    for token in tokens:
+        if token.kind is TokenKind.NUMBER:
+            parts.append(OPERAND)
+            operands.append(float(token.value))
+        else:
+            parts.append(token.value)
+    return "".join(parts), operands
+
+
+def generate_source(compiled: CompiledExpression) -> str:
+    """
+    Generates Python source of a function evaluating the template of a program.
+
+    Operands keep the order of numbers in the expression, so
+    the function takes them as positional arguments.
+
+    :param compiled: unoptimized program of an expression with the template.
+    :return: source of the `template` function.
+    """
+    stack: List[str] = []
+    arguments: List[str] = []
+    for opcode, _ in compiled.program:
+        if opcode == PUSH:
+            name = f"x{len(arguments)}"
+            arguments.append(name)
+            stack.append(name)
+            continue
+        right = stack.pop()
+        left = stack.pop()
+        if opcode == DIVIDE:
+            stack.append(f"divide({left}, {right})")
+        else:
+            stack.append(f"({left} {SYMBOLS[opcode]} {right})")
+    return f"def template({', '.join(arguments)}):\n    return {stack[0]}\n"
+
+
+def compile_template(compiled: CompiledExpression) -> TemplateFunction:
+    """
+    Compiles the template of a program into a Python function.
+
+    :param compiled: unoptimized program of an expression with the template.
+    :return: function taking the numbers of the expression.
+    :raises ValueError: if the generated source can't be compiled,
+        e.g. because the expression is too deeply nested.
+    """
+    source = generate_source(compiled)
+    namespace: Dict[str, object] = {"divide": divide}
+    try:
+        code = compile(source, f"<template {compiled.expression}>", "exec")
+    except (SyntaxError, RecursionError, MemoryError) as exc:
+        raise ValueError(f"Template can't be compiled: {exc}")
+    exec(code, namespace)  # noqa: S102, WPS421
+    return namespace["template"]  # type: ignore
+
+
+class TemplateEntry:
+    """Counters and the compiled function of an expression template."""
+
+    __slots__ = ("template", "hits", "function", "failed")
+
+    def __init__(self, template: str) -> None:
+        self.template = template
+        self.hits = 0
+        self.function: Optional[TemplateFunction] = None
+        self.failed = False
+
+
+class TemplateRegistry:
+    """
+    Tracks how often expression templates are evaluated.
+
+    A template which reaches the threshold is promoted: its program
+    is compiled into a Python function, and later evaluations of the
+    template with any numbers call the function directly.
+    """
+
+    def __init__(self, threshold: int, max_templates: int, max_operands: int) -> None:
+        self.threshold = threshold
+        self.max_operands = max_operands
+        self.entries: LRUCache[str, TemplateEntry] = LRUCache(max_templates)
+        self.promotions = 0
+
+    def lookup(self, template: str) -> Optional[TemplateFunction]:
+        """
+        Counts an evaluation of the template.
+
+        :param template: the template.
+        :return: the compiled function if the template is promoted.
+        """
+        entry = self.entries.get(template)
+        if entry is None:
+            return None
+        entry.hits += 1
+        return entry.function
+
+    def record(self, template: str, tokens: List[Token]) -> None:
+        """
+        Records an interpreted evaluation and promotes the template if it's hot.
+
+        :param template: the template.
+        :param tokens: tokens of the evaluated expression.
+        """
+        entry = self.entries.get(template)
+        if entry is None:
+            entry = TemplateEntry(template)
+            entry.hits = 1
+            self.entries.put(template, entry)
+        if entry.hits >= self.threshold:
+            self._promote(entry, tokens)
+
+    def promote(self, template: str, tokens: List[Token]) -> bool:
+        """
+        Promotes the template before its evaluations, e.g. on startup.
+
+        :param template: the template.
+        :param tokens: tokens of an expression with the template.
+        :return: whether the template is compiled.
+        """
+        entry = self.entries.get(template)
+        if entry is None:
+            entry = TemplateEntry(template)
+            self.entries.put(template, entry)
+        if entry.function is None:
+            self._promote(entry, tokens)
+        return entry.function is not None
+
+    def _promote(self, entry: TemplateEntry, tokens: List[Token]) -> None:
+        if entry.failed:
+            return
+        if entry.template.count(OPERAND) > self.max_operands:
+            entry.failed = True
+            return
+        try:
+            compiled = _structure.compile(tokens_to_text(tokens), tokens)
+            entry.function = compile_template(compiled)
+        except ValueError:
+            entry.failed = True
+            return
+        self.promotions += 1
+        TEMPLATE_PROMOTIONS.inc()
+
+    def promoted(self) -> Dict[str, int]:
+        """
+        Promoted templates with their evaluation counts.
+
+        :return: evaluations by template.
+        """
+        return {
+            entry.template: entry.hits
+            for entry in self.entries.values()
+            if entry.function is not None
+        }
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Registry counters.
+
+        :return: quantity of tracked and promoted templates and of promotions.
+        """
+        return {
+            "templates": len(self.entries),
+            "promoted": len(self.promoted()),
+            "promotions": self.promotions,
+        }
+
+
+class TemplateCalculator:
+    """
+    A two-tier calculator for expressions sharing a structure.
+
+    Cold templates are interpreted by RPNCalculator, hot templates
+    are evaluated by functions generated for them by the registry.
+    """
+
+    def __init__(
+        self,
+        rpn_calculator: Optional[RPNCalculator] = None,
+        registry: Optional[TemplateRegistry] = None,
+    ) -> None:
+        self.rpn_calculator = rpn_calculator or RPNCalculator()
+        self.registry = registry or TemplateRegistry(
+            threshold=settings.template_jit_threshold,
+            max_templates=settings.template_jit_max_templates,
+            max_operands=settings.template_jit_max_operands,
+        )
+
+    def calculate(self, expression: str, tokens: Optional[List[Token]] = None) -> float:
+        """
+        Calculates the result of the expression using the fastest available tier.
+
+        :param expression: A string of the mathematical expression
+        :param tokens: Already tokenized expression, if available
+        :return: The result of the calculation
+        """
+        if self.registry.threshold <= 0:
+            compiled = self.rpn_calculator.compile(expression, tokens)
+            with stage_timer("evaluation"):
+                return self.rpn_calculator.evaluate(compiled)
+        if tokens is None:
+            with stage_timer("parsing"):
+                tokens = tokenize(expression)
+        template, operands = split_template(tokens)
+        function = self.registry.lookup(template)
+        if function is not None:
+            _compiled.inc()
+            with stage_timer("evaluation"):
+                return function(*operands)
+        compiled = self.rpn_calculator.compile(expression, tokens)
+        with stage_timer("evaluation"):
+            result = self.rpn_calculator.evaluate(compiled)
+        _interpreted.inc()
+        self.registry.record(template, tokens)
+        return result
+
+    def warm(self, expressions: Iterable[str]) -> int:
+        """
+        Compiles expressions and promotes their templates ahead of requests.
+
+        Invalid expressions are skipped.
+
+        :param expressions: expressions of expected requests.
+        :return: quantity of compiled expressions.
+        """
+        warmed = 0
+        for expression in expressions:
+            tokens = tokenize(expression.replace(" ", ""))
+            try:
+                self.rpn_calculator.compile(expression, tokens)
+            except ValueError:
+                continue
+            if self.registry.threshold > 0:
+                self.registry.promote(split_template(tokens)[0], tokens)
+            warmed += 1
+        return warmed
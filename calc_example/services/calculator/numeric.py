@@ -0,0 +1,123 @@
+from decimal import MAX_EMAX, MIN_EMIN, Context, Decimal
+from fractions import Fraction
+from functools import lru_cache
+from typing import Any, Callable, Dict, Union
+
+from calc_example.services.calculator.calculator import add, divide, multiply, subtract
+from calc_example.settings import NumericBackend
+
+Number = Union[float, Decimal, Fraction]
+
+
+class Arithmetic:
+    """
+    Numbers and operations of a numeric backend.
+
+    `number` converts the text of an integer literal,
+    `operations` maps operators to binary operations.
+    """
+
+    __slots__ = ("backend", "number", "operations")
+
+    def __init__(
+        self,
+        backend: NumericBackend,
+        number: Callable[[str], Any],
+        operations: Dict[str, Callable[[Any, Any], Any]],
+    ) -> None:
+        self.backend = backend
+        self.number = number
+        self.operations = operations
+
+    def __repr__(self) -> str:
+        return f"Arithmetic({self.backend.value!r})"
+
+
+FLOAT_ARITHMETIC = Arithmetic(
+    NumericBackend.FLOAT,
+    float,
+    {"+": add, "-": subtract, "*": multiply, "/": divide},
+)
+
+
+def _divide_fractions(a: Fraction, b: Fraction) -> Fraction:
+    """
+    Divide a by b exactly.
+
+    :raises ValueError: if the divisor is zero.
+    """
+    if not b:
+        raise ValueError("Cannot divide by zero.")
+    return a / b
+
+
+FRACTION_ARITHMETIC = Arithmetic(
+    NumericBackend.FRACTION,
+    Fraction,
+    {
+        "+": add,
+        "-": subtract,
+        "*": multiply,
+        "/": _divide_fractions,
+    },
+)
+
+
+def decimal_arithmetic(precision: int) -> Arithmetic:
+    """
+    Decimal arithmetic rounding every result to significant digits.
+
+    The exponent range is the widest one, so results of integer
+    expressions never overflow.
+
+    :param precision: quantity of significant digits.
+    :return: the arithmetic.
+    """
+    context = Context(prec=precision, Emax=MAX_EMAX, Emin=MIN_EMIN)
+
+    def divide_decimals(a: Decimal, b: Decimal) -> Decimal:  # noqa: WPS430
+        if not b:
+            raise ValueError("Cannot divide by zero.")
+        return context.divide(a, b)
+
+    return Arithmetic(
+        NumericBackend.DECIMAL,
+        context.create_decimal,
+        {
+            "+": context.add,
+            "-": context.subtract,
+            "*": context.multiply,
+            "/": divide_decimals,
+        },
+    )
+
+
+@lru_cache(maxsize=16)
+def get_arithmetic(backend: NumericBackend, precision: int) -> Arithmetic:
+    """
+    Arithmetic of a numeric backend.
+
+    :param backend: the numeric backend.
+    :param precision: significant digits of the decimal backend.
+    :return: the arithmetic.
+    """
+    if backend is NumericBackend.DECIMAL:
+        return decimal_arithmetic(precision)
+    if backend is NumericBackend.FRACTION:
+        return FRACTION_ARITHMETIC
+    return FLOAT_ARITHMETIC
+
+
+def serialize_number(number: Number) -> Union[float, str]:
+    """
+    JSON value of a result.
+
+    Exact results are strings, e.g. "0.4285714285714285714285714286"
+    or "3/7", so clients don't lose digits to binary floats.
+
+    :param number: the result.
+    :return: the JSON value.
+    """
+    if isinstance(number, float):
+        return number
+    return str(number)
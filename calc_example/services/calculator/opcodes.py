@@ -0,0 +1,21 @@
+from typing import Any, Tuple
+
+# Opcodes of compiled programs.
+PUSH = 0
+ADD = 1
+SUBTRACT = 2
+MULTIPLY = 3
+DIVIDE = 4
+# Push the value of a memory slot.
+LOAD = 5
+# Copy the top of the stack into a memory slot.
+STORE = 6
+# Push the value bound to a variable of a prepared expression.
+VARIABLE = 7
+
+# Opcodes which push a value.
+LEAVES = frozenset((PUSH, VARIABLE))
+
+OPCODES = {"+": ADD, "-": SUBTRACT, "*": MULTIPLY, "/": DIVIDE}
+
+Instruction = Tuple[int, Any]
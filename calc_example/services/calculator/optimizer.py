@@ -0,0 +1,214 @@
+from decimal import Decimal
+from fractions import Fraction
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from calc_example.services.calculator.opcodes import (
+    ADD,
+    DIVIDE,
+    LEAVES,
+    LOAD,
+    MULTIPLY,
+    PUSH,
+    STORE,
+    SUBTRACT,
+    VARIABLE,
+    Instruction,
+)
+from calc_example.settings import NumericBackend
+
+Operation = Callable[[Any, Any], Any]
+
+# Constants which leave the other operand unchanged, by opcode. They
+# must have the same type and representation as the constant, so
+# -0 and decimals with more places, e.g. 1.0, don't count. x + 0 isn't
+# exact for floats and decimals, as it turns -0 into 0, and x / 1 isn't
+# exact for floats, as the float division rounds.
+RIGHT_IDENTITIES: Dict[NumericBackend, Dict[int, Any]] = {
+    NumericBackend.FLOAT: {SUBTRACT: 0.0, MULTIPLY: 1.0},  # noqa: WPS358
+    NumericBackend.DECIMAL: {
+        SUBTRACT: Decimal(0),
+        MULTIPLY: Decimal(1),
+        DIVIDE: Decimal(1),
+    },
+    NumericBackend.FRACTION: {
+        ADD: Fraction(0),
+        SUBTRACT: Fraction(0),
+        MULTIPLY: Fraction(1),
+        DIVIDE: Fraction(1),
+    },
+}
+LEFT_IDENTITIES: Dict[NumericBackend, Dict[int, Any]] = {
+    NumericBackend.FLOAT: {MULTIPLY: 1.0},
+    NumericBackend.DECIMAL: {MULTIPLY: Decimal(1)},
+    NumericBackend.FRACTION: {ADD: Fraction(0), MULTIPLY: Fraction(1)},
+}
+COMMUTATIVE = frozenset((ADD, MULTIPLY))
+
+
+class Node:
+    """
+    A node of the expression DAG which couldn't be folded into a constant.
+
+    Constants have the PUSH opcode and their value on the left,
+    variables have the VARIABLE opcode and their index on the left.
+    """
+
+    __slots__ = ("opcode", "left", "right", "uses", "slot")
+
+    def __init__(self, opcode: int, left: Any, right: Optional["Node"] = None) -> None:
+        self.opcode = opcode
+        self.left = left
+        self.right = right
+        self.uses = 0
+        self.slot: Optional[int] = None
+
+    def children(self) -> Tuple["Node", ...]:
+        """Operands of the node."""
+        if self.opcode in LEAVES:
+            return ()
+        return self.left, self.right  # type: ignore
+
+
+class Optimizer:
+    """
+    Optimizes RPN programs.
+
+    Operations on constants are folded, identical subexpressions
+    are shared, and operations with an identity constant are dropped
+    where this is exact for the backend. Operations which fail, e.g.
+    divisions by zero, are kept, so they fail on evaluation as before.
+
+    An optimizer is used for a single program.
+    """
+
+    def __init__(self, operations: List[Operation], backend: NumericBackend) -> None:
+        self.operations = operations
+        self.right_identities = RIGHT_IDENTITIES[backend]
+        self.left_identities = LEFT_IDENTITIES[backend]
+        self._nodes: Dict[Tuple[Any, ...], Node] = {}
+
+    def optimize(self, program: List[Instruction]) -> Tuple[List[Instruction], int]:
+        """
+        Optimizes a validated program.
+
+        :param program: the program.
+        :return: the optimized program and the quantity of its memory slots.
+        """
+        stack: List[Any] = []
+        for opcode, operand in program:
+            if opcode == PUSH:
+                stack.append(operand)
+            elif opcode == VARIABLE:
+                stack.append(self._variable(operand))
+            else:
+                right = stack.pop()
+                stack[-1] = self._combine(opcode, stack[-1], right)
+        root = stack[0]
+        if not isinstance(root, Node):
+            return [(PUSH, root)], 0
+        _count_uses(root)
+        return _emit(root)
+
+    def _combine(self, opcode: int, left: Any, right: Any) -> Any:
+        left_is_constant = not isinstance(left, Node)
+        right_is_constant = not isinstance(right, Node)
+        if left_is_constant and right_is_constant:
+            return self._fold(opcode, left, right)
+        if right_is_constant and _same(right, self.right_identities.get(opcode)):
+            return left
+        if left_is_constant and _same(left, self.left_identities.get(opcode)):
+            return right
+        return self._intern(opcode, self._constant(left), self._constant(right))
+
+    def _fold(self, opcode: int, left: Any, right: Any) -> Any:
+        try:
+            return self.operations[opcode](left, right)
+        except (ValueError, ArithmeticError):
+            return self._intern(opcode, self._constant(left), self._constant(right))
+
+    def _constant(self, value: Any) -> Node:
+        if isinstance(value, Node):
+            return value
+        # Equal numbers may differ in the sign of zero or in decimal places.
+        key = (PUSH, type(value), repr(value))
+        node = self._nodes.get(key)
+        if node is None:
+            node = Node(PUSH, value)
+            self._nodes[key] = node
+        return node
+
+    def _variable(self, index: int) -> Node:
+        key = (VARIABLE, index)
+        node = self._nodes.get(key)
+        if node is None:
+            node = Node(VARIABLE, index)
+            self._nodes[key] = node
+        return node
+
+    def _intern(self, opcode: int, left: Node, right: Node) -> Node:
+        if opcode in COMMUTATIVE and id(right) < id(left):
+            left, right = right, left
+        key = (opcode, id(left), id(right))
+        node = self._nodes.get(key)
+        if node is None:
+            node = Node(opcode, left, right)
+            self._nodes[key] = node
+        return node
+
+
+def _same(value: Any, constant: Any) -> bool:
+    return isinstance(value, type(constant)) and repr(value) == repr(constant)
+
+
+def _count_uses(root: Node) -> None:
+    root.uses = 1
+    pending = [root]
+    while pending:
+        for child in pending.pop().children():
+            child.uses += 1
+            if child.uses == 1:
+                pending.append(child)
+
+
+def _emit(root: Node) -> Tuple[List[Instruction], int]:
+    """
+    Emits the program of a DAG.
+
+    A shared operation is computed once and stored into a memory
+    slot, its other uses load the slot.
+
+    :param root: the root with counted uses of the nodes.
+    :return: the program and the quantity of its memory slots.
+    """
+    program: List[Instruction] = []
+    slots = 0
+    pending = [(root, False)]
+    while pending:
+        node, expanded = pending.pop()
+        if expanded:
+            slots = _emit_operation(node, program, slots)
+        elif node.slot is not None:
+            program.append((LOAD, node.slot))
+        elif node.opcode in LEAVES:
+            program.append((node.opcode, node.left))
+        else:
+            pending.append((node, True))
+            pending.extend((child, False) for child in reversed(node.children()))
+    return program, slots
+
+
+def _emit_operation(node: Node, program: List[Instruction], slots: int) -> int:
+    """
+    Emits an operation whose operands are on the stack.
+
+    :param node: the operation.
+    :param program: the program to extend.
+    :param slots: memory slots used so far.
+    :return: memory slots used with the operation.
+    """
+    program.append((node.opcode, 0))
+    if node.uses == 1:
+        return slots
+    node.slot = slots
+    program.append((STORE, slots))
+    return slots + 1
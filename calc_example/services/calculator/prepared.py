@@ -0,0 +1,105 @@
+import binascii
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from typing import Any, Callable, List, Mapping, Tuple
+
+from calc_example.services.calculator.cache import LRUCache
+from calc_example.services.calculator.rpn_calculation import (
+    CompiledExpression,
+    RPNCalculator,
+)
+from calc_example.settings import NumericBackend, settings
+
+
+class PreparedExpression:
+    """
+    An expression with variables compiled once and executed with many bindings.
+
+    Executions only convert the values of variables,
+    the text of the expression is never parsed again.
+    """
+
+    __slots__ = ("calculator", "compiled", "_indexes", "_convert")
+
+    def __init__(self, calculator: RPNCalculator, compiled: CompiledExpression) -> None:
+        self.calculator = calculator
+        self.compiled = compiled
+        self._indexes = {name: index for index, name in enumerate(compiled.variables)}
+        self._convert: Callable[[Any], Any] = float
+        if calculator.arithmetic.backend is not NumericBackend.FLOAT:
+            number = calculator.arithmetic.number
+            # Exact backends take the shortest text of a float, so 0.1 is 1/10.
+            self._convert = lambda value: number(repr(value))
+
+    def __repr__(self) -> str:
+        return f"PreparedExpression({self.compiled.expression!r})"
+
+    @property
+    def variables(self) -> Tuple[str, ...]:
+        """Names of variables in the order of their first appearance."""
+        return self.compiled.variables
+
+    def bind(self, bindings: Mapping[str, Any]) -> List[Any]:
+        """
+        Convert bindings into values of variables.
+
+        :param bindings: numbers by variable name.
+        :return: numbers of the arithmetic in the order of variables.
+        :raises ValueError: if a variable isn't bound or a name is unknown.
+        """
+        values: List[Any] = [None] * len(self._indexes)
+        for name, value in bindings.items():
+            index = self._indexes.get(name)
+            if index is None:
+                raise ValueError(f"Unknown variable '{name}'.")
+            values[index] = self._convert(value)
+        if len(bindings) < len(values):
+            missing = next(
+                name for name, index in self._indexes.items() if values[index] is None
+            )
+            raise ValueError(f"Variable '{missing}' is not bound.")
+        return values
+
+    def execute(self, bindings: Mapping[str, Any]) -> Any:
+        """
+        Evaluate the expression with values of its variables.
+
+        :param bindings: numbers by variable name.
+        :return: the result of the calculation.
+        """
+        return self.calculator.execute(self.compiled, self.bind(bindings))
+
+
+def make_handle(expression: str, backend: NumericBackend) -> str:
+    """
+    Handle of a prepared expression.
+
+    The handle encodes the normalized expression, so any worker
+    can prepare it again if it wasn't prepared by this worker.
+
+    :param expression: normalized expression.
+    :param backend: numeric backend of the expression.
+    :return: URL safe handle.
+    """
+    text = f"{backend.value}:{expression}".encode()
+    return urlsafe_b64encode(text).rstrip(b"=").decode()
+
+
+def parse_handle(handle: str) -> Tuple[str, NumericBackend]:
+    """
+    Decode a handle made by make_handle.
+
+    :param handle: the handle.
+    :return: the expression and its numeric backend.
+    :raises ValueError: if the handle is malformed.
+    """
+    try:
+        text = urlsafe_b64decode(handle + "=" * (-len(handle) % 4)).decode()
+    except (binascii.Error, UnicodeDecodeError) as exc:
+        raise ValueError("Malformed handle.") from exc
+    backend, _, expression = text.partition(":")
+    return expression, NumericBackend(backend)
+
+
+prepared_cache: LRUCache[str, PreparedExpression] = LRUCache(
+    settings.prepared_cache_size,
+)
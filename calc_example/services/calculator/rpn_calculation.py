@@ -1,84 +1,423 @@
-import re
 from collections import deque
-from typing import Callable, Dict, List, Tuple
+from functools import lru_cache
+from types import MappingProxyType
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from calc_example.services.calculator.cache import LRUCache
+from calc_example.services.calculator.calculator import add, divide, multiply, subtract
+from calc_example.services.calculator.numeric import (
+    FLOAT_ARITHMETIC,
+    Arithmetic,
+    get_arithmetic,
+)
+from calc_example.services.calculator.opcodes import (
+    LEAVES,
+    LOAD,
+    OPCODES,
+    PUSH,
+    STORE,
+    VARIABLE,
+    Instruction,
+)
+from calc_example.services.calculator.optimizer import Optimizer
+from calc_example.services.calculator.tokenizer import (
+    Token,
+    TokenKind,
+    tokenize,
+    tokens_to_text,
+)
+from calc_example.services.metrics import stage_timer
+from calc_example.settings import NumericBackend, settings
+
+
+def normalize_expression(expression: str) -> str:
+    """
+    Normalize expression text so equal expressions share a cache key.
+
+    :param expression: A string of the mathematical expression
+    :return: The expression without spaces
+    """
+    return expression.replace(" ", "")
+
+
+# Operators indexed by opcode, PUSH has no operation.
+OPCODE_OPERATORS = ("+", "+", "-", "*", "/")  # noqa: WPS317
+
+
+class CompiledExpression:
+    """
+    An expression compiled once into a flat instruction array.
+
+    Every instruction is an (opcode, operand) pair, the operand
+    is a number of the arithmetic of the calculator for PUSH,
+    a memory slot for LOAD and STORE and an index of `variables`
+    for VARIABLE. Only programs with shared subexpressions use
+    the memory and only prepared expressions have variables.
+    The program is validated on compilation, so evaluation
+    doesn't check the stack depth.
+    """
+
+    __slots__ = ("expression", "program", "slots", "variables")
+
+    def __init__(
+        self,
+        expression: str,
+        program: List[Instruction],
+        slots: int = 0,
+        variables: Tuple[str, ...] = (),
+    ) -> None:
+        self.expression = expression
+        self.program = program
+        self.slots = slots
+        self.variables = variables
+
+    def __repr__(self) -> str:
+        return f"CompiledExpression({self.expression!r})"
+
+
+ExpressionCache = LRUCache[str, CompiledExpression]
+
+expression_cache: ExpressionCache = LRUCache(settings.expression_cache_size)
 
 
 class RPNCalculator:
     """A class for performing calculations using Reverse Polish Notation (RPN)."""
 
     operators: Dict[str, Tuple[int, Callable[[float, float], float]]] = {
-        "+": (1, lambda x, y: x + y),  # Addition operation
-        "-": (1, lambda x, y: x - y),  # Subtraction operation
-        "*": (2, lambda x, y: x * y),  # Multiplication operation
-        "/": (2, lambda x, y: x / y if y != 0 else float("inf")),
-        # Division operation with check for division by zero
+        "+": (1, add),  # Addition operation
+        "-": (1, subtract),  # Subtraction operation
+        "*": (2, multiply),  # Multiplication operation
+        "/": (2, divide),  # Division operation with check for division by zero
     }
 
-    def _parse(self, expression: str) -> List[str]:
+    def __init__(
+        self,
+        cache: Optional[ExpressionCache] = None,
+        arithmetic: Arithmetic = FLOAT_ARITHMETIC,
+        optimize: bool = True,
+    ) -> None:
+        self.cache = expression_cache if cache is None else cache
+        self.arithmetic = arithmetic
+        self.optimize = optimize
+        # Binary operations indexed by opcode.
+        self.operations = [
+            arithmetic.operations[operator] for operator in OPCODE_OPERATORS
+        ]
+
+    def _parse(self, expression: str) -> List[Token]:
         """
         Parses the expression into a list of tokens.
 
         :param expression: A string of the mathematical expression
         :return: A list of tokens
         """
-        tokens = re.split("([+\-*/()])", expression)
-        return [token for token in tokens if token != " "]
+        return tokenize(expression)
 
-    def _infix_to_rpn(self, parsed_formula: List[str]) -> List[str]:
+    def _infix_to_rpn(self, parsed_formula: List[Token]) -> List[Token]:
         """
         Converts the parsed formula into Reverse Polish Notation.
 
         :param parsed_formula: A list of tokens representing the formula
         :return: A list of tokens in Reverse Polish Notation
+        :raises ValueError: if parentheses are not balanced or operands
+            and operators are misplaced, e.g. "2(+3)" or "()5"
         """
-        stack, queue = [], deque()
+        stack: List[Token] = []
+        queue: Deque[Token] = deque()
+        expects_operand = True
 
         for token in parsed_formula:
-            if token not in self.operators:
-                queue.append(token)
-            elif token in self.operators:
-                while (
-                    stack and self.operators[token][0] <= self.operators[stack[-1]][0]
-                ):
-                    queue.append(stack.pop())
+            expects_operand = check_placement(token, expects_operand)
+            if token.kind is TokenKind.OPERATOR:
+                self._push_operator(token, stack, queue)
+            elif token.kind is TokenKind.LPAREN:
                 stack.append(token)
+            elif token.kind is TokenKind.RPAREN:
+                self._close_parenthesis(stack, queue)
+            else:
+                queue.append(token)
+
+        if expects_operand:
+            raise ValueError("Invalid expression")
+        self._drain(stack, queue)
+        return list(queue)
 
+    def _drain(self, stack: List[Token], queue: Deque[Token]) -> None:
+        """
+        Moves the remaining operators to the queue.
+
+        :param stack: The operator stack
+        :param queue: The output queue
+        :raises ValueError: if an opening parenthesis wasn't closed
+        """
         while stack:
+            operator_token = stack.pop()
+            if operator_token.kind is TokenKind.LPAREN:
+                raise ValueError("Mismatched parentheses")
+            queue.append(operator_token)
+
+    def _push_operator(
+        self,
+        token: Token,
+        stack: List[Token],
+        queue: Deque[Token],
+    ) -> None:
+        """
+        Moves operators of higher or equal precedence to the queue and stacks the token.
+
+        :param token: An operator token
+        :param stack: The operator stack
+        :param queue: The output queue
+        """
+        precedence = self.operators[token.value][0]
+        while (
+            stack
+            and stack[-1].kind is TokenKind.OPERATOR
+            and self.operators[stack[-1].value][0] >= precedence
+        ):
             queue.append(stack.pop())
+        stack.append(token)
 
-        return list(queue)
+    def _close_parenthesis(self, stack: List[Token], queue: Deque[Token]) -> None:
+        """
+        Moves operators up to the matching opening parenthesis to the queue.
+
+        :param stack: The operator stack
+        :param queue: The output queue
+        :raises ValueError: if there is no opening parenthesis
+        """
+        while stack and stack[-1].kind is not TokenKind.LPAREN:
+            queue.append(stack.pop())
+        if not stack:
+            raise ValueError("Mismatched parentheses")
+        stack.pop()
+
+    def to_rpn(
+        self,
+        expression: str,
+        tokens: Optional[List[Token]] = None,
+    ) -> List[Token]:
+        """
+        Converts the expression into a list of RPN tokens.
+
+        :param expression: A string of the mathematical expression
+        :param tokens: Already tokenized expression, if available
+        :return: A list of tokens in Reverse Polish Notation
+        """
+        if tokens is None:
+            with stage_timer("parsing"):
+                tokens = self._parse(expression)
+        with stage_timer("rpn_conversion"):
+            return self._infix_to_rpn(tokens)
 
-    def calculate(self, expression: str) -> float:
+    def compile(
+        self,
+        expression: str,
+        tokens: Optional[List[Token]] = None,
+    ) -> CompiledExpression:
+        """
+        Compiles the expression into an RPN program, reusing cached programs.
+
+        The program is optimized before it's cached, unless
+        the calculator was created without optimization.
+
+        :param expression: A string of the mathematical expression
+        :param tokens: Already tokenized expression, if available
+        :return: The compiled expression
+        """
+        if tokens is None:
+            key = normalize_expression(expression)
+        else:
+            key = tokens_to_text(tokens)
+        compiled = self.cache.get(key)
+        if compiled is None:
+            rpn_queue = self.to_rpn(key, tokens)
+            compiled = self._optimize(key, self._to_program(rpn_queue))
+            self.cache.put(key, compiled)
+        return compiled
+
+    def prepare(
+        self,
+        expression: str,
+        tokens: Optional[List[Token]] = None,
+    ) -> CompiledExpression:
+        """
+        Compiles an expression with variables, e.g. "(a+b)*2", for execute.
+
+        Identifiers are variables, numbered in the order of their first
+        appearance. Prepared programs aren't cached by the calculator,
+        as the same text without variables is an invalid expression.
+
+        :param expression: A string of the mathematical expression
+        :param tokens: Already tokenized expression, if available
+        :return: The compiled expression with its variables
+        """
+        if tokens is None:
+            with stage_timer("parsing"):
+                tokens = self._parse(expression)
+        key = tokens_to_text(tokens)
+        variables: Dict[str, int] = {}
+        for token in tokens:
+            if token.kind is TokenKind.IDENTIFIER:
+                variables.setdefault(token.value, len(variables))
+        compiled = self._optimize(
+            key,
+            self._to_program(self.to_rpn(key, tokens), variables),
+        )
+        compiled.variables = tuple(variables)
+        return compiled
+
+    def _to_program(
+        self,
+        rpn_queue: List[Token],
+        variables: Mapping[str, int] = MappingProxyType({}),
+    ) -> List[Instruction]:
+        """
+        Converts the RPN queue into a flat instruction array.
+
+        :param rpn_queue: A list of tokens in Reverse Polish Notation
+        :param variables: Indexes of variables, identifiers are invalid without them
+        :return: A list of instructions
+        :raises ValueError: if the expression is malformed
+        """
+        number = self.arithmetic.number
+        program = [_to_instruction(token, number, variables) for token in rpn_queue]
+        depth = 0
+        for opcode, _ in program:
+            depth += 1 if opcode in LEAVES else -1
+            if depth < 1:
+                raise ValueError("Invalid expression")
+        if depth != 1:
+            raise ValueError("Invalid expression")
+        return program
+
+    def _optimize(self, key: str, program: List[Instruction]) -> CompiledExpression:
+        if not self.optimize:
+            return CompiledExpression(key, program)
+        optimizer = Optimizer(self.operations, self.arithmetic.backend)
+        with stage_timer("optimization"):
+            return CompiledExpression(key, *optimizer.optimize(program))
+
+    def calculate(self, expression: str, tokens: Optional[List[Token]] = None) -> Any:
         """
         Calculates the result of the expression using Reverse Polish Notation.
 
         :param expression: A string of the mathematical expression
+        :param tokens: Already tokenized expression, if available
         :return: The result of the calculation
         """
-        parsed_exp = self._parse(expression)
-        rpn_queue = self._infix_to_rpn(parsed_exp)
+        compiled = self.compile(expression, tokens)
+        with stage_timer("evaluation"):
+            return self.evaluate(compiled)
 
-        stack = []
+    def evaluate(self, compiled: CompiledExpression) -> Any:
+        """
+        Evaluates a compiled expression.
 
-        for token in rpn_queue:
-            if token in self.operators:
-                if len(stack) < 2:
-                    raise ValueError("Invalid expression")
+        :param compiled: The compiled expression
+        :return: The result of the calculation
+        """
+        if compiled.slots:
+            return self.execute(compiled)
+        stack: List[Any] = []
+        push = stack.append
+        pop = stack.pop
+        operations = self.operations
 
-                y, x = stack.pop(), stack.pop()
-                result = self.operators[token][1](x, y)
+        for opcode, operand in compiled.program:
+            if opcode == PUSH:
+                push(operand)
+            else:
+                y = pop()
+                stack[-1] = operations[opcode](stack[-1], y)
 
-                if result is float("inf"):
-                    raise ValueError("Division by zero")
+        return stack[0]
 
-                stack.append(result)
-            else:
-                if not token.isnumeric():
-                    raise ValueError(f"Invalid character: {token}")
+    def execute(self, compiled: CompiledExpression, values: Sequence[Any] = ()) -> Any:
+        """
+        Evaluates a program with shared subexpressions or variables.
 
-                stack.append(float(token))
+        :param compiled: The compiled or prepared expression
+        :param values: Numbers of the arithmetic in the order of `variables`
+        :return: The result of the calculation
+        """
+        stack: List[Any] = []
+        memory: List[Any] = [None] * compiled.slots
+        operations = self.operations
 
-        if len(stack) != 1:
-            raise ValueError("Invalid expression")
+        for opcode, operand in compiled.program:
+            if opcode == PUSH:
+                stack.append(operand)
+            elif opcode == VARIABLE:
+                stack.append(values[operand])
+            elif opcode == LOAD:
+                stack.append(memory[operand])
+            elif opcode == STORE:
+                memory[operand] = stack[-1]
+            else:
+                y = stack.pop()
+                stack[-1] = operations[opcode](stack[-1], y)
 
         return stack[0]
+
+
+def check_placement(token: Token, expects_operand: bool) -> bool:
+    """
+    Checks that an operand or an operator is where the grammar expects it.
+
+    An operand is a number, an identifier or a parenthesized expression,
+    so "(" starts an operand, while ")" and operators follow one.
+
+    :param token: The next token of the infix expression
+    :param expects_operand: Whether an operand is expected
+    :return: Whether an operand is expected after the token
+    :raises ValueError: if the token can't follow the previous one
+    """
+    follows_operand = token.kind in {TokenKind.OPERATOR, TokenKind.RPAREN}
+    if follows_operand is expects_operand:
+        raise ValueError("Invalid expression")
+    return token.kind in {TokenKind.OPERATOR, TokenKind.LPAREN}
+
+
+def _to_instruction(
+    token: Token,
+    number: Callable[[str], Any],
+    variables: Mapping[str, int],
+) -> Instruction:
+    if token.kind is TokenKind.OPERATOR:
+        return OPCODES[token.value], 0
+    if token.kind is TokenKind.NUMBER:
+        return PUSH, number(token.value)
+    if token.kind is TokenKind.IDENTIFIER and token.value in variables:
+        return VARIABLE, variables[token.value]
+    raise ValueError(f"Invalid character: {token.value}")
+
+
+@lru_cache(maxsize=16)
+def get_rpn_calculator(backend: NumericBackend, precision: int) -> RPNCalculator:
+    """
+    Calculator of a numeric backend with its own cache of compiled expressions.
+
+    Programs hold numbers of the backend, so they are never shared
+    between backends. The float backend uses the shared expression cache.
+
+    :param backend: the numeric backend.
+    :param precision: significant digits of the decimal backend.
+    :return: the calculator.
+    """
+    if backend is NumericBackend.FLOAT:
+        return RPNCalculator()
+    return RPNCalculator(
+        cache=LRUCache(settings.expression_cache_size),
+        arithmetic=get_arithmetic(backend, precision),
+    )
@@ -0,0 +1,97 @@
+import enum
+from typing import FrozenSet, List, NamedTuple
+
+OPERATORS = frozenset("+-*/")
+DIGITS = frozenset("0123456789")
+IDENTIFIER_START = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ_")
+IDENTIFIER_CHARS = IDENTIFIER_START | DIGITS
+
+
+class TokenKind(str, enum.Enum):  # noqa: WPS600
+    """Possible kinds of expression tokens."""
+
+    NUMBER = "NUMBER"
+    OPERATOR = "OPERATOR"
+    LPAREN = "LPAREN"
+    RPAREN = "RPAREN"
+    IDENTIFIER = "IDENTIFIER"
+    UNKNOWN = "UNKNOWN"
+
+
+SINGLE_CHAR_KINDS = {
+    **dict.fromkeys(OPERATORS, TokenKind.OPERATOR),
+    "(": TokenKind.LPAREN,
+    ")": TokenKind.RPAREN,
+}
+
+
+class Token(NamedTuple):
+    """A typed piece of an expression with its position in the source text."""
+
+    kind: TokenKind
+    value: str
+    position: int
+
+
+def _scan_while(expression: str, index: int, chars: FrozenSet[str]) -> int:
+    length = len(expression)
+    while index < length and expression[index] in chars:
+        index += 1
+    return index
+
+
+def _scan_number(expression: str, index: int) -> int:
+    index = _scan_while(expression, index, DIGITS)
+    if (
+        index + 1 < len(expression)
+        and expression[index] == "."
+        and expression[index + 1] in DIGITS
+    ):
+        index = _scan_while(expression, index + 1, DIGITS)
+    return index
+
+
+def _scan_token(expression: str, index: int) -> Token:
+    char = expression[index]
+    if char in DIGITS:
+        end = _scan_number(expression, index)
+        return Token(TokenKind.NUMBER, expression[index:end], index)
+    if char in IDENTIFIER_START:
+        end = _scan_while(expression, index + 1, IDENTIFIER_CHARS)
+        return Token(TokenKind.IDENTIFIER, expression[index:end], index)
+    return Token(SINGLE_CHAR_KINDS.get(char, TokenKind.UNKNOWN), char, index)
+
+
+def tokenize(expression: str) -> List[Token]:
+    """
+    Splits an expression into typed tokens in a single pass.
+
+    Spaces are insignificant and are dropped before the scan,
+    so "1 2+3" is the same expression as "12+3" and token
+    positions refer to the expression without spaces.
+    Numbers are digits with an optional fractional part.
+    Characters that don't belong to the grammar become UNKNOWN
+    tokens, so every consumer can decide how to report them.
+
+    :param expression: A string of the mathematical expression
+    :return: A list of tokens in the order of appearance
+    """
+    expression = expression.replace(" ", "")
+    tokens: List[Token] = []
+    index = 0
+    length = len(expression)
+    while index < length:
+        token = _scan_token(expression, index)
+        tokens.append(token)
+        index += len(token.value)
+    return tokens
+
+
+def tokens_to_text(tokens: List[Token]) -> str:
+    """
+    Joins tokens back into expression text without spaces.
+
+    :param tokens: A list of tokens
+    :return: The normalized expression
+    """
+    return "".join(token.value for token in tokens)
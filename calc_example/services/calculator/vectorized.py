@@ -0,0 +1,186 @@
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple, Union
+
+from calc_example.services.calculator.cache import LRUCache
+from calc_example.services.calculator.calculator import DivideCalculator
+from calc_example.services.calculator.rpn_calculation import (
+    RPNCalculator,
+    normalize_expression,
+)
+from calc_example.services.calculator.tokenizer import Token, TokenKind
+from calc_example.settings import settings
+
+VectorToken = Union[float, str]
+
+
+@lru_cache(maxsize=None)
+def _numpy() -> Any:
+    """
+    Imports NumPy on the first vectorized evaluation.
+
+    The web application doesn't evaluate vectors, so its
+    workers don't pay for the import on startup.
+
+    :return: the numpy module.
+    :raises RuntimeError: if numpy isn't installed.
+    """
+    try:
+        import numpy  # noqa: WPS433 (Found nested import)
+    except ImportError:
+        raise RuntimeError(
+            "numpy is required for vectorized evaluation, "
+            "install calc_example with the 'vectorized' extra.",
+        )
+    return numpy
+
+
+def _divide(x: Any, y: Any) -> Any:
+    np = _numpy()
+    if np.any(y == 0):
+        raise ValueError("Cannot divide by zero.")
+    places = DivideCalculator.DEFAULT_DECIMAL_PLACES
+    quotients = np.asarray(x / y, dtype=float)
+    rounded = np.round(quotients, places, out=np.empty_like(quotients))
+    # np.round scales quotients by 10**places, which can tip one close
+    # to a tie the other way than round() of the scalar divide does.
+    # Those, and non-finite ones, are rounded by round() instead.
+    scaled = quotients * 10**places
+    distance = np.abs(scaled - np.floor(scaled) - 0.5)
+    near_ties = ~(distance > 4 * np.spacing(np.abs(scaled)))
+    for index in np.flatnonzero(near_ties):
+        rounded.flat[index] = round(float(quotients.flat[index]), places)
+    # Scalar operands get a scalar back, arrays stay arrays.
+    return rounded[()]
+
+
+VECTOR_OPERATORS: Dict[str, Callable[[Any, Any], Any]] = {
+    "+": lambda x, y: x + y,
+    "-": lambda x, y: x - y,
+    "*": lambda x, y: x * y,
+    "/": _divide,
+}
+
+
+class VectorizedExpression:
+    """
+    An expression template compiled once and evaluated over NumPy arrays.
+
+    Operands of the template are either numbers or variable
+    names, e.g. ``a*b+c``, which are bound to arrays on evaluation.
+    """
+
+    __slots__ = ("template", "program", "variables")
+
+    def __init__(self, template: str, program: List[VectorToken]) -> None:
+        self.template = template
+        self.program = program
+        self.variables: Tuple[str, ...] = tuple(
+            dict.fromkeys(
+                token
+                for token in program
+                if isinstance(token, str) and token not in VECTOR_OPERATORS
+            ),
+        )
+
+    def __repr__(self) -> str:
+        return f"VectorizedExpression({self.template!r})"
+
+    def evaluate(self, operands: Mapping[str, Any]) -> Any:
+        """
+        Evaluates the template over columns of operands.
+
+        :param operands: arrays (or scalars) for every variable of the template.
+        :return: float64 array of results.
+        :raises ValueError: if an operand is missing or a divisor is zero.
+        """
+        np = _numpy()
+        columns = {}
+        for name in self.variables:
+            if name not in operands:
+                raise ValueError(f"Missing operand '{name}'.")
+            columns[name] = np.asarray(operands[name], dtype=np.float64)
+
+        stack: List[Any] = []
+        for token in self.program:
+            if isinstance(token, float):
+                stack.append(token)
+            elif token in VECTOR_OPERATORS:
+                y, x = stack.pop(), stack.pop()
+                stack.append(VECTOR_OPERATORS[token](x, y))
+            else:
+                stack.append(columns[token])
+
+        return np.asarray(stack[0], dtype=np.float64)
+
+
+class VectorizedCalculator:
+    """A calculator that evaluates expression templates over columnar batches."""
+
+    def __init__(
+        self,
+        cache: Optional[LRUCache[str, VectorizedExpression]] = None,
+    ) -> None:
+        _numpy()
+        self.cache = (
+            LRUCache(settings.expression_cache_size) if cache is None else cache
+        )
+        self._rpn_calculator = RPNCalculator()
+
+    def compile(self, template: str) -> VectorizedExpression:
+        """
+        Compiles the template into a vectorized program, reusing cached programs.
+
+        :param template: expression with numbers and variable names.
+        :return: the compiled template.
+        """
+        key = normalize_expression(template)
+        compiled = self.cache.get(key)
+        if compiled is None:
+            compiled = VectorizedExpression(key, self._to_program(key))
+            self.cache.put(key, compiled)
+        return compiled
+
+    def calculate(self, template: str, operands: Mapping[str, Any]) -> Any:
+        """
+        Calculates the template for every row of the operands.
+
+        :param template: expression with numbers and variable names.
+        :param operands: arrays (or scalars) for every variable of the template.
+        :return: float64 array of results.
+        """
+        return self.compile(template).evaluate(operands)
+
+    def _to_program(self, template: str) -> List[VectorToken]:
+        program: List[VectorToken] = []
+        depth = 0
+        for token in self._rpn_calculator.to_rpn(template):
+            if token.kind is TokenKind.OPERATOR:
+                depth -= 1
+                program.append(token.value)
+            else:
+                depth += 1
+                program.append(_to_operand(token))
+            if depth < 1:
+                raise ValueError("Invalid expression")
+        if depth != 1:
+            raise ValueError("Invalid expression")
+        return program
+
+
+def _to_operand(token: Token) -> VectorToken:
+    if token.kind is TokenKind.NUMBER:
+        return float(token.value)
+    if token.kind is TokenKind.IDENTIFIER:
+        return token.value
+    raise ValueError(f"Invalid character: {token.value}")
+
+
+def get_result_colors(results: Any) -> Any:
+    """
+    Vectorized version of the API's get_result_color.
+
+    :param results: array of results.
+    :return: array of "red" for odd results and "green" for even results.
+    """
+    np = _numpy()
+    return np.where(np.mod(results, 2) != 0, "red", "green")
@@ -0,0 +1,4 @@
+from .coalescing import SingleFlight
+from .executor import EvaluationExecutor
+
+__all__ = ["EvaluationExecutor", "SingleFlight"]
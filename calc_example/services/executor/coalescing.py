@@ -0,0 +1,66 @@
+import asyncio
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+from calc_example.services.metrics import COALESCED_EVALUATIONS
+
+ResultT = TypeVar("ResultT")
+
+
+class SingleFlight:
+    """
+    Shares a single computation between concurrent calls with the same key.
+
+    The first call starts the computation as a task, and later calls
+    with the key await the same task until it's finished. The task is
+    shielded, so a cancelled caller, e.g. of a disconnected client,
+    doesn't cancel it for the others.
+    """
+
+    def __init__(self) -> None:
+        self._tasks: Dict[Hashable, "asyncio.Future[Any]"] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def run(
+        self,
+        key: Hashable,
+        func: Callable[[], Awaitable[ResultT]],
+    ) -> ResultT:
+        """
+        Run the computation of the key, unless it's already running.
+
+        :param key: key of identical computations.
+        :param func: function starting the computation.
+        :return: result of the computation.
+        """
+        task = self._tasks.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(func())
+            self._tasks[key] = task
+            task.add_done_callback(partial(self._forget, key))
+        else:
+            self.coalesced += 1
+            COALESCED_EVALUATIONS.inc()
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Counters of the computations.
+
+        :return: quantity of running, started and coalesced computations.
+        """
+        return {
+            "in_flight": len(self._tasks),
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+        }
+
+    def _forget(self, key: Hashable, task: "asyncio.Future[Any]") -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]  # noqa: WPS420
+        if not task.cancelled():
+            # Callers may all be gone, the exception is retrieved
+            # so that it isn't logged as never retrieved.
+            task.exception()
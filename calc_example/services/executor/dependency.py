@@ -0,0 +1,22 @@
+from starlette.requests import Request
+
+from calc_example.services.executor.executor import EvaluationExecutor
+
+
+async def get_executor(
+    request: Request,
+) -> EvaluationExecutor:  # pragma: no cover
+    """
+    Returns the evaluation executor of the application.
+
+    The dependency is async, so FastAPI doesn't run it in the threadpool.
+
+    You can use it like this:
+
+    >>> async def handler(executor: EvaluationExecutor = Depends(get_executor)):
+    >>>     await executor.run(evaluate_expression, "2+2", size=3)
+
+    :param request: current request.
+    :returns: evaluation executor.
+    """
+    return request.app.state.executor
@@ -0,0 +1,113 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, Callable, Hashable, List, Optional, Sequence, TypeVar
+
+from calc_example.services.executor.coalescing import SingleFlight
+
+ItemT = TypeVar("ItemT")
+ResultT = TypeVar("ResultT")
+
+
+class EvaluationExecutor:
+    """
+    Runs evaluations inline or in a process pool depending on their size.
+
+    Small work stays on the event loop, because sending it to
+    another process costs more than computing it. Large expressions
+    and batches are offloaded to the pool, so they don't block
+    other requests of the worker. Concurrent offloaded evaluations
+    with the same key are computed once.
+    """
+
+    def __init__(
+        self,
+        pool_size: int,
+        chunk_size: int,
+        min_batch_size: int,
+        min_expression_length: int,
+    ) -> None:
+        self.pool_size = pool_size
+        self.chunk_size = max(chunk_size, 1)
+        self.min_batch_size = min_batch_size
+        self.min_expression_length = min_expression_length
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.single_flight = SingleFlight()
+
+    @property
+    def is_running(self) -> bool:
+        """Whether the process pool is started."""
+        return self._pool is not None
+
+    def start(self) -> None:
+        """Start the process pool, unless it's disabled with zero pool size."""
+        if self.pool_size > 0 and self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.pool_size,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+
+    def shutdown(self) -> None:
+        """Stop the process pool and wait for the running tasks."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    async def run(
+        self,
+        func: Callable[..., ResultT],
+        *args: Any,
+        size: int,
+        key: Optional[Hashable] = None,
+    ) -> ResultT:
+        """
+        Run a single evaluation.
+
+        Inline evaluations don't yield to the event loop, so only
+        offloaded ones may be coalesced.
+
+        :param func: picklable function to call.
+        :param args: arguments of the function.
+        :param size: size of the work, e.g. the expression length.
+        :param key: key of identical evaluations, which share the result
+            while one of them is running. Evaluations without a key are
+            never coalesced.
+        :return: result of the function.
+        """
+        if self._pool is None or size < self.min_expression_length:
+            return func(*args)
+        if key is None:
+            return await self._submit(func, *args)
+        return await self.single_flight.run(key, partial(self._submit, func, *args))
+
+    async def _submit(self, func: Callable[..., ResultT], *args: Any) -> ResultT:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, func, *args)  # type: ignore
+
+    async def run_batch(
+        self,
+        func: Callable[[Sequence[ItemT]], List[ResultT]],
+        items: Sequence[ItemT],
+    ) -> List[ResultT]:
+        """
+        Run a batch evaluation, splitting large batches into chunks across the pool.
+
+        :param func: picklable function which evaluates a sequence of items.
+        :param items: items to evaluate.
+        :return: results in the order of the items.
+        """
+        if self._pool is None or len(items) < self.min_batch_size:
+            return func(items)
+        loop = asyncio.get_running_loop()
+        chunks = await asyncio.gather(
+            *(
+                loop.run_in_executor(
+                    self._pool,
+                    func,
+                    items[start : start + self.chunk_size],  # noqa: E203
+                )
+                for start in range(0, len(items), self.chunk_size)
+            ),
+        )
+        return [result for chunk in chunks for result in chunk]
@@ -0,0 +1,29 @@
+from fastapi import FastAPI
+
+from calc_example.services.executor.executor import EvaluationExecutor
+from calc_example.settings import settings
+
+
+def init_executor(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Creates the evaluation executor and starts its process pool.
+
+    :param app: current fastapi application.
+    """
+    executor = EvaluationExecutor(
+        pool_size=settings.process_pool_size,
+        chunk_size=settings.process_pool_chunk_size,
+        min_batch_size=settings.process_pool_min_batch_size,
+        min_expression_length=settings.process_pool_min_expression_length,
+    )
+    executor.start()
+    app.state.executor = executor
+
+
+def shutdown_executor(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Stops the process pool of the evaluation executor.
+
+    :param app: current fastapi application.
+    """
+    app.state.executor.shutdown()
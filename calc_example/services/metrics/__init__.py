@@ -0,0 +1,35 @@
+from .metrics import (
+    COALESCED_EVALUATIONS,
+    ERRORS,
+    QUEUEING_DELAY,
+    REQUEST_LATENCY,
+    REQUESTS,
+    SHED_REQUESTS,
+    STAGE_LATENCY,
+    TEMPLATE_EVALUATIONS,
+    TEMPLATE_PROMOTIONS,
+    WORKER_FIRST_REQUEST,
+    record_error,
+    record_error_type,
+    record_first_request,
+    record_worker_start,
+    stage_timer,
+)
+
+__all__ = [
+    "REQUESTS",
+    "REQUEST_LATENCY",
+    "ERRORS",
+    "STAGE_LATENCY",
+    "TEMPLATE_EVALUATIONS",
+    "TEMPLATE_PROMOTIONS",
+    "COALESCED_EVALUATIONS",
+    "QUEUEING_DELAY",
+    "SHED_REQUESTS",
+    "WORKER_FIRST_REQUEST",
+    "record_error",
+    "record_error_type",
+    "record_worker_start",
+    "record_first_request",
+    "stage_timer",
+]
@@ -0,0 +1,136 @@
+import time
+from typing import ContextManager, Dict, Tuple
+
+from prometheus_client import Counter, Gauge, Histogram
+
+# Latency buckets in seconds, tuned for sub-millisecond evaluations.
+FAST_BUCKETS = (
+    0.00001,
+    0.000025,
+    0.00005,
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+)
+
+STAGES = ("validation", "parsing", "rpn_conversion", "optimization", "evaluation")
+
+REQUESTS = Counter(
+    "calc_example_requests",
+    "Quantity of handled HTTP requests.",
+    ["method", "path", "status"],
+)
+REQUEST_LATENCY = Histogram(
+    "calc_example_request_duration_seconds",
+    "Duration of HTTP requests.",
+    ["method", "path"],
+    buckets=FAST_BUCKETS,
+)
+ERRORS = Counter(
+    "calc_example_errors",
+    "Quantity of errors by exception type.",
+    ["type"],
+)
+STAGE_LATENCY = Histogram(
+    "calc_example_stage_duration_seconds",
+    "Duration of expression processing stages.",
+    ["stage"],
+    buckets=FAST_BUCKETS,
+)
+TEMPLATE_EVALUATIONS = Counter(
+    "calc_example_template_evaluations",
+    "Quantity of evaluations by tier of the expression template.",
+    ["tier"],
+)
+TEMPLATE_PROMOTIONS = Counter(
+    "calc_example_template_promotions",
+    "Quantity of expression templates compiled into Python functions.",
+)
+COALESCED_EVALUATIONS = Counter(
+    "calc_example_coalesced_evaluations",
+    "Quantity of evaluations which awaited an identical running evaluation.",
+)
+QUEUEING_DELAY = Histogram(
+    "calc_example_queueing_delay_seconds",
+    "Time callbacks wait for the event loop of a worker.",
+    buckets=FAST_BUCKETS,
+)
+SHED_REQUESTS = Counter(
+    "calc_example_shed_requests",
+    "Quantity of requests rejected by the admission control.",
+)
+WORKER_FIRST_REQUEST = Gauge(
+    "calc_example_worker_first_request_seconds",
+    "Time from the start of a worker process to its first handled request.",
+    ["preloaded"],
+    multiprocess_mode="liveall",
+)
+
+# Children are bound once, so hot paths don't look labels up on every call.
+_stage_histograms: Dict[str, Histogram] = {
+    stage: STAGE_LATENCY.labels(stage) for stage in STAGES
+}
+
+
+def stage_timer(stage: str) -> ContextManager[None]:
+    """
+    Time a stage of expression processing.
+
+    >>> with stage_timer("parsing"):
+    >>>     tokens = tokenize(expression)
+
+    :param stage: one of STAGES.
+    :return: context manager which observes the duration of its block.
+    """
+    return _stage_histograms[stage].time()  # type: ignore
+
+
+def record_error(exc: BaseException) -> None:
+    """
+    Count an error by its exception type.
+
+    :param exc: the error.
+    """
+    record_error_type(type(exc).__name__)
+
+
+def record_error_type(error_type: str) -> None:
+    """
+    Count an error which was detected without raising an exception.
+
+    :param error_type: name of the exception type the error is reported as.
+    """
+    ERRORS.labels(error_type).inc()
+
+
+# Start of the current worker process until its first request is handled.
+_worker_start: Dict[str, Tuple[float, bool]] = {}
+
+
+def record_worker_start(preloaded: bool) -> None:
+    """
+    Remember the start of a worker process, before it loads the application.
+
+    :param preloaded: whether the application was loaded by the master.
+    """
+    _worker_start["worker"] = (time.monotonic(), preloaded)
+
+
+def record_first_request() -> None:
+    """Report the time to the first request of the worker, once per worker."""
+    started = _worker_start.pop("worker", None)
+    if started is not None:
+        start, preloaded = started
+        WORKER_FIRST_REQUEST.labels(str(preloaded).lower()).set(
+            time.monotonic() - start,
+        )
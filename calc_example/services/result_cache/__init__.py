@@ -0,0 +1,3 @@
+from .cache import SharedResultCache
+
+__all__ = ["SharedResultCache"]
@@ -0,0 +1,211 @@
+import fcntl
+import mmap
+import os
+import struct
+import time
+from hashlib import blake2b
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+MAGIC = b"CALCRC01"
+# magic, quantity of slots, slot size, associativity
+FILE_HEADER = struct.Struct("<8sIII")
+FILE_HEADER_SIZE = 64
+# sequence, key hash, expiration time, last use time, value, key length
+SLOT_HEADER = struct.Struct("<QQdddH")
+SLOT_SIZE = 256
+MAX_KEY_SIZE = SLOT_SIZE - SLOT_HEADER.size
+USED_OFFSET = 24
+TIMESTAMP = struct.Struct("<d")
+SEQUENCE = struct.Struct("<Q")
+FILE_MODE = 0o600
+
+
+def _hash_key(key: bytes) -> int:
+    # hash() is randomized per process, so it can't be shared by workers.
+    key_hash = int.from_bytes(blake2b(key, digest_size=8).digest(), "little")
+    return key_hash or 1
+
+
+class SharedResultCache:
+    """
+    Results of expressions shared by all workers of a host.
+
+    The cache is a set-associative hash table in a memory-mapped file:
+    a key is stored in one of `ways` slots of its bucket, and the least
+    recently used or expired slot of the bucket is replaced. Writers
+    are serialized with a file lock, readers don't lock and retry
+    a slot which is being written (detected with a sequence number).
+
+    Keys longer than MAX_KEY_SIZE bytes are not cached.
+    """
+
+    def __init__(self, path: Path, slots: int, ttl: float, ways: int = 8) -> None:
+        self.path = path
+        self.ways = max(min(ways, slots), 1)
+        self.buckets = slots // self.ways
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._fd: Optional[int] = None
+        self._map: Optional[mmap.mmap] = None
+
+    @property
+    def is_open(self) -> bool:
+        """Whether the cache file is mapped."""
+        return self._map is not None
+
+    def open(self) -> None:
+        """
+        Map the cache file, creating or resetting it if its layout differs.
+
+        Does nothing if the cache is disabled with zero slots.
+        """
+        if self.buckets == 0 or self._map is not None:
+            return
+        size = FILE_HEADER_SIZE + self.buckets * self.ways * SLOT_SIZE
+        header = FILE_HEADER.pack(MAGIC, self.buckets * self.ways, SLOT_SIZE, self.ways)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, FILE_MODE)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            if (
+                os.pread(fd, FILE_HEADER.size, 0) != header
+                or os.fstat(fd).st_size != size
+            ):
+                os.ftruncate(fd, 0)
+                os.ftruncate(fd, size)
+                os.pwrite(fd, header, 0)
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        self._fd = fd
+        self._map = mmap.mmap(fd, size)
+
+    def close(self) -> None:
+        """Unmap the cache file, the cached results stay for other workers."""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def get(self, key: str) -> Optional[float]:
+        """
+        Return the cached result of the key.
+
+        :param key: normalized expression.
+        :return: the result or None if it isn't cached or has expired.
+        """
+        table = self._map
+        encoded = key.encode()
+        if table is None or len(encoded) > MAX_KEY_SIZE:
+            return None
+        key_hash = _hash_key(encoded)
+        now = time.time()
+        for offset in self._bucket(key_hash):
+            value = _read_slot(table, offset, key_hash, encoded, now)
+            if value is not None:
+                self.hits += 1
+                return value
+        self.misses += 1
+        return None
+
+    def put(self, key: str, value: float) -> None:
+        """
+        Cache the result of the key, replacing the least recently used slot.
+
+        :param key: normalized expression.
+        :param value: result of the expression.
+        """
+        table = self._map
+        encoded = key.encode()
+        if table is None or len(encoded) > MAX_KEY_SIZE:
+            return
+        key_hash = _hash_key(encoded)
+        now = time.time()
+        fcntl.flock(self._fd, fcntl.LOCK_EX)  # type: ignore
+        try:
+            offset = self._choose_slot(table, key_hash, encoded, now)
+            _write_slot(table, offset, (key_hash, now + self.ttl, now, value), encoded)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)  # type: ignore
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Counters of this worker's lookups.
+
+        :return: capacity, hits and misses.
+        """
+        return {
+            "slots": self.buckets * self.ways,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def _bucket(self, key_hash: int) -> range:
+        start = FILE_HEADER_SIZE + (key_hash % self.buckets) * self.ways * SLOT_SIZE
+        return range(start, start + self.ways * SLOT_SIZE, SLOT_SIZE)
+
+    def _choose_slot(
+        self,
+        table: mmap.mmap,
+        key_hash: int,
+        encoded: bytes,
+        now: float,
+    ) -> int:
+        victim = -1
+        victim_used = float("inf")
+        for offset in self._bucket(key_hash):
+            _, slot_hash, expires, used, _, key_size = SLOT_HEADER.unpack_from(
+                table,
+                offset,
+            )
+            if slot_hash == key_hash and _slot_key(table, offset, key_size) == encoded:
+                return offset
+            if expires < now:
+                used = 0
+            if used < victim_used:
+                victim, victim_used = offset, used
+        return victim
+
+
+def _slot_key(table: mmap.mmap, offset: int, key_size: int) -> bytes:
+    key_start = offset + SLOT_HEADER.size
+    return table[key_start : key_start + key_size]  # noqa: E203
+
+
+def _read_slot(
+    table: mmap.mmap,
+    offset: int,
+    key_hash: int,
+    encoded: bytes,
+    now: float,
+) -> Optional[float]:
+    sequence, slot_hash, expires, _, value, key_size = SLOT_HEADER.unpack_from(
+        table,
+        offset,
+    )
+    if slot_hash != key_hash or sequence % 2 or expires < now:
+        return None
+    if _slot_key(table, offset, key_size) != encoded:
+        return None
+    if SEQUENCE.unpack_from(table, offset)[0] != sequence:
+        return None
+    TIMESTAMP.pack_into(table, offset + USED_OFFSET, now)
+    return value
+
+
+def _write_slot(
+    table: mmap.mmap,
+    offset: int,
+    fields: Tuple[int, float, float, float],
+    encoded: bytes,
+) -> None:
+    # An odd sequence marks the slot as being written for lock-free readers.
+    sequence = SEQUENCE.unpack_from(table, offset)[0] + 1
+    SEQUENCE.pack_into(table, offset, sequence)
+    key_start = offset + SLOT_HEADER.size
+    table[key_start : key_start + len(encoded)] = encoded  # noqa: E203
+    SLOT_HEADER.pack_into(table, offset, sequence, *fields, len(encoded))
+    SEQUENCE.pack_into(table, offset, sequence + 1)
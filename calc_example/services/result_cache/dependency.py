@@ -0,0 +1,22 @@
+from starlette.requests import Request
+
+from calc_example.services.result_cache.cache import SharedResultCache
+
+
+async def get_result_cache(
+    request: Request,
+) -> SharedResultCache:  # pragma: no cover
+    """
+    Returns the result cache shared by the workers.
+
+    The dependency is async, so FastAPI doesn't run it in the threadpool.
+
+    You can use it like this:
+
+    >>> async def handler(cache: SharedResultCache = Depends(get_result_cache)):
+    >>>     cache.get("2+2")
+
+    :param request: current request.
+    :returns: shared result cache.
+    """
+    return request.app.state.result_cache
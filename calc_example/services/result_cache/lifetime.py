@@ -0,0 +1,28 @@
+from fastapi import FastAPI
+
+from calc_example.services.result_cache.cache import SharedResultCache
+from calc_example.settings import settings
+
+
+def init_result_cache(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Maps the result cache shared by the workers.
+
+    :param app: current fastapi application.
+    """
+    result_cache = SharedResultCache(
+        path=settings.result_cache_path,
+        slots=settings.result_cache_slots,
+        ttl=settings.result_cache_ttl,
+    )
+    result_cache.open()
+    app.state.result_cache = result_cache
+
+
+def shutdown_result_cache(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Unmaps the result cache.
+
+    :param app: current fastapi application.
+    """
+    app.state.result_cache.close()
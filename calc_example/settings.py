@@ -1,6 +1,7 @@
 import enum
 from pathlib import Path
 from tempfile import gettempdir
+from typing import List
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -18,6 +19,14 @@ class LogLevel(str, enum.Enum):  # noqa: WPS600
     FATAL = "FATAL"
 
 
+class NumericBackend(str, enum.Enum):  # noqa: WPS600
+    """Possible types of numbers of calculations."""
+
+    FLOAT = "float"
+    DECIMAL = "decimal"
+    FRACTION = "fraction"
+
+
 class Settings(BaseSettings):
     """
     Application settings.
@@ -32,12 +41,78 @@ class Settings(BaseSettings):
     workers_count: int = 1
     # Enable uvicorn reloading
     reload: bool = False
+    # Import and warm the application once in the gunicorn master,
+    # workers are forked with it instead of importing it themselves
+    preload: bool = False
 
     # Current environment
     environment: str = "dev"
 
     log_level: LogLevel = LogLevel.INFO
 
+    # Directory shared by workers to collect prometheus metrics
+    prometheus_dir: Path = TEMP_DIR / "prom"
+
+    # Maximum number of compiled expressions kept in memory
+    expression_cache_size: int = 1024
+    # Maximum number of prepared expressions with variables kept in memory
+    prepared_cache_size: int = 1024
+    # Numbers of calculations without a backend in the request
+    numeric_backend: NumericBackend = NumericBackend.FLOAT
+    # Significant digits of results of the decimal backend
+    decimal_precision: int = 28
+    # Maximum number of expressions in a single batch request
+    batch_max_size: int = 1000
+    # Maximum length of a line of a streamed request body in bytes
+    stream_max_line_length: int = 4096
+
+    # Evaluations of an expression template before it's compiled
+    # into a Python function, 0 disables the compiled tier
+    template_jit_threshold: int = 100
+    # Maximum number of expression templates tracked by the compiled tier
+    template_jit_max_templates: int = 1024
+    # Templates with more operands are never compiled
+    template_jit_max_operands: int = 64
+    # Expressions compiled on startup, their templates are compiled right away
+    warmup_expressions: List[str] = [
+        "1+1",
+        "1-1",
+        "1*1",
+        "1/1",
+        "(1+1)*1",
+        "1+1*1",
+    ]
+
+    # Maximum number of incrementally evaluated expressions of a WebSocket
+    incremental_max_sessions: int = 16
+
+    # Quantity of processes evaluating heavy work, 0 keeps everything inline
+    process_pool_size: int = 0
+    # Quantity of batch items sent to a process at once
+    process_pool_chunk_size: int = 256
+    # Smaller batches are evaluated inline
+    process_pool_min_batch_size: int = 512
+    # Shorter expressions are evaluated inline
+    process_pool_min_expression_length: int = 4096
+
+    # Queueing delay in seconds above which expensive calculations are shed,
+    # 0 disables the admission control
+    admission_target_delay: float = 0.05
+    # Queueing delay in seconds above which all calculations are shed
+    admission_max_delay: float = 0.5
+    # Calculations in flight in a worker above which expensive ones are shed
+    admission_max_in_flight: int = 256
+    # Calculations up to this cost, in operations and parentheses, are cheap
+    admission_cheap_cost: int = 4
+    # Larger bodies aren't read to estimate the cost and count as expensive
+    admission_max_body_size: int = 65536
+
+    # Results cache shared by the workers of a host, 0 slots disables it
+    result_cache_path: Path = TEMP_DIR / "calc_example_results"
+    result_cache_slots: int = 16384
+    # Time to live of a cached result in seconds
+    result_cache_ttl: float = 300
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_prefix="CALC_EXAMPLE_",
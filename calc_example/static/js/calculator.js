@@ -3,14 +3,55 @@ $(function () {
     event.preventDefault();
     calculate();
   });
+  session.connect();
 });
 
-function calculate() {
-  const firstNumber = $('#firstNumber').val();
-  const secondNumber = $('#secondNumber').val();
-  const operator = $('#operator').val();
-  const expression = firstNumber + operator + secondNumber;
+// Persistent connection to the calculation endpoint.
+// Results are matched to requests by id, so several
+// expressions can be sent without waiting for results.
+const session = {
+  socket: null,
+  nextId: 1,
+  pending: {},
+
+  connect: function () {
+    if (!('WebSocket' in window)) {
+      return;
+    }
+    const scheme = window.location.protocol === 'https:' ? 'wss://' : 'ws://';
+    const socket = new WebSocket(scheme + window.location.host + '/api/calculate/ws');
+    socket.onmessage = function (event) {
+      const data = JSON.parse(event.data);
+      const callbacks = session.pending[data.id];
+      if (callbacks) {
+        delete session.pending[data.id];
+        data.error ? callbacks.error(data.error) : callbacks.success(data);
+      }
+    };
+    socket.onclose = function () {
+      session.socket = null;
+      // Requests without a result are repeated over HTTP.
+      const pending = session.pending;
+      session.pending = {};
+      $.each(pending, function (id, callbacks) {
+        post(callbacks.expression, callbacks.success, callbacks.error);
+      });
+    };
+    session.socket = socket;
+  },
+
+  isOpen: function () {
+    return session.socket !== null && session.socket.readyState === WebSocket.OPEN;
+  },
+
+  send: function (expression, success, error) {
+    const id = session.nextId++;
+    session.pending[id] = {expression: expression, success: success, error: error};
+    session.socket.send(JSON.stringify({'id': id, 'expression': expression}));
+  }
+};
 
+function post(expression, success, error) {
   $.ajax({
     url: 'api/calculate',
     method: 'POST',
@@ -18,13 +59,31 @@ function calculate() {
       'expression': expression
     }),
     contentType: 'application/json',
-    success: function (data) {
-      $('#result').val(data.result);
-    },
+    success: success,
     error: function (err) {
       const data = JSON.parse(err.responseText);
-      alert("Error: " + data.detail[0].msg);
-      $('#calculator-form').trigger('reset');
+      error(data.detail[0].msg);
     }
   });
 }
+
+function calculate() {
+  const firstNumber = $('#firstNumber').val();
+  const secondNumber = $('#secondNumber').val();
+  const operator = $('#operator').val();
+  const expression = firstNumber + operator + secondNumber;
+
+  const success = function (data) {
+    $('#result').val(data.result);
+  };
+  const error = function (message) {
+    alert("Error: " + message);
+    $('#calculator-form').trigger('reset');
+  };
+
+  if (session.isOpen()) {
+    session.send(expression, success, error);
+  } else {
+    post(expression, success, error);
+  }
+}
@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+
+from calc_example.services.admission import AdmissionController, estimate_cost
+
+
+@pytest.fixture
+def controller():
+    return AdmissionController(
+        target_delay=0.05,
+        max_delay=0.5,
+        max_in_flight=2,
+        cheap_cost=2,
+    )
+
+
+@pytest.mark.parametrize(
+    ("expression", "expected_cost"),
+    [
+        ["2+3", 1],
+        ["42", 1],
+        ["(2+3)*4", 3],
+        ["((1+2)*(3-4))/5", 7],
+        ["a%b", 1],
+    ],
+)
+def test_estimate_cost(expression, expected_cost) -> None:
+    assert estimate_cost(expression) == expected_cost
+
+
+def test_admission_controller_admits_cheap_requests_first(controller) -> None:
+    controller.delay = 0.1
+    assert controller.is_overloaded
+    assert controller.admit(2)
+    assert not controller.admit(3)
+    assert not controller.admit(None)
+    assert controller.shed == 2
+    assert controller.retry_after == 1
+
+
+def test_admission_controller_sheds_everything_above_max_delay(controller) -> None:
+    controller.delay = 2.5
+    assert not controller.admit(1)
+    assert controller.retry_after == 3
+
+
+def test_admission_controller_limits_in_flight_requests(controller) -> None:
+    assert not controller.is_overloaded
+    controller.in_flight = 2
+    assert controller.is_overloaded
+
+
+@pytest.mark.anyio
+async def test_admission_controller_measures_queueing_delay(controller) -> None:
+    controller.delay = 1.0
+    controller.probe()
+    assert controller.delay == 1.0
+    await asyncio.sleep(0)
+    assert controller.delay < 1.0
@@ -0,0 +1,84 @@
+import gzip
+
+import pytest
+
+from calc_example.services.assets import Asset, AssetCatalog
+from calc_example.services.assets.catalog import (
+    IMMUTABLE,
+    REVALIDATE,
+    accepted_values,
+    compress,
+    hashed_name,
+)
+
+SCRIPT = b"console.log('calculator');\n" * 20
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    (tmp_path / "js").mkdir()
+    (tmp_path / "js" / "app.js").write_bytes(SCRIPT)
+    (tmp_path / "logo.png").write_bytes(b"\x89PNG")
+    return AssetCatalog(tmp_path, "/static")
+
+
+def test_hashed_name() -> None:
+    assert hashed_name("js/app.min.js", "0123") == "js/app.min.0123.js"
+
+
+@pytest.mark.parametrize(
+    ("header", "expected"),
+    [
+        ("gzip, deflate, br", {"gzip", "deflate", "br"}),
+        ("br;q=0, gzip;q=0.5", {"gzip"}),
+        ("GZIP;q=1.0, identity; q=0", {"gzip"}),
+        ("", set()),
+        ("application/msgpack;q=0, application/json", {"application/json"}),
+        ("Application/MsgPack; q=0.5", {"application/msgpack"}),
+    ],
+)
+def test_accepted_values(header, expected) -> None:
+    assert accepted_values(header) == expected
+
+
+def test_compress_skips_binary_and_larger_bodies() -> None:
+    assert compress(b"\x89PNG", "image/png") == {}
+    assert compress(b"a", "text/css") == {}
+    assert gzip.decompress(compress(SCRIPT, "text/css")["gzip"]) == SCRIPT
+
+
+def test_catalog_hashes_names(catalog) -> None:
+    url = catalog.url("js/app.js")
+    hashed = url.removeprefix("/static/")
+    assert url.startswith("/static/js/app.") and url.endswith(".js")
+    immutable = catalog.get(hashed).negotiate("gzip").headers
+    assert immutable["cache-control"] == IMMUTABLE
+    assert immutable["content-encoding"] == "gzip"
+    plain = catalog.get("js/app.js").negotiate("").headers
+    assert plain["cache-control"] == REVALIDATE
+    assert "content-encoding" not in plain
+    assert catalog.get("logo.png").negotiate("gzip").body == b"\x89PNG"
+    with pytest.raises(ValueError, match="Unknown asset"):
+        catalog.url("js/missing.js")
+
+
+def test_asset_negotiation_and_etags() -> None:
+    asset = Asset(SCRIPT, "text/javascript", IMMUTABLE)
+    identity = asset.negotiate("identity")
+    compressed = asset.negotiate("*")
+    assert identity.body == SCRIPT
+    assert identity.headers["content-type"] == "text/javascript; charset=utf-8"
+    assert compressed.encoding != "identity"
+    assert identity.headers["etag"] != compressed.headers["etag"]
+    assert asset.is_fresh(identity.headers["etag"])
+    assert asset.is_fresh(f'"other", W/{compressed.headers["etag"]}')
+    assert asset.is_fresh("*")
+    assert not asset.is_fresh('"other"')
+    assert not asset.is_fresh(None)
+
+
+def test_asset_prefers_brotli() -> None:
+    brotli = pytest.importorskip("brotli")
+    representation = Asset(SCRIPT, "text/css", IMMUTABLE).negotiate("gzip, br")
+    assert representation.encoding == "br"
+    assert brotli.decompress(representation.body) == SCRIPT
@@ -0,0 +1,58 @@
+import mmap
+
+import pytest
+import ujson
+
+from calc_example.services.bulk import evaluate_file, split_chunks
+from calc_example.web.api.calculator.views import encode_line_outcome
+
+
+def test_split_chunks_ends_at_line_separators(tmp_path) -> None:
+    path = tmp_path / "input.txt"
+    path.write_bytes(b"1+1\n22+22\n3+3\n4+4")
+    with open(path, "rb") as input_file:
+        with mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            chunks = split_chunks(data, 5)
+            assert [data[start:end] for start, end in chunks] == [
+                b"1+1\n22+22\n",
+                b"3+3\n4+4",
+            ]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_evaluate_file_keeps_order(tmp_path, workers: int) -> None:
+    input_path = tmp_path / "input.txt"
+    output_path = tmp_path / "output.ndjson"
+    expressions = [f"{number}*2" for number in range(50)]
+    expressions[7] = "1/0"
+    # Blank lines get an outcome too, so outcomes stay aligned with lines.
+    expressions[10] = ""
+    expressions[20] = "  "
+    input_path.write_text("\n".join(expressions) + "\n")
+
+    report = evaluate_file(
+        input_path,
+        output_path,
+        encode_line_outcome,
+        workers=workers,
+        chunk_size=16,
+    )
+
+    outcomes = [ujson.loads(line) for line in output_path.read_bytes().splitlines()]
+    assert report.lines == len(outcomes) == 50
+    assert outcomes[7] == {"error": "Cannot divide by zero."}
+    assert "error" in outcomes[10] and "error" in outcomes[20]
+    for number, outcome in enumerate(outcomes):
+        if number not in {7, 10, 20}:
+            assert outcome == {"result": number * 2}
+
+
+def test_evaluate_empty_file(tmp_path) -> None:
+    input_path = tmp_path / "input.txt"
+    input_path.touch()
+    output_path = tmp_path / "output.ndjson"
+
+    report = evaluate_file(input_path, output_path, encode_line_outcome, 2, 16)
+
+    assert report.lines == 0
+    assert output_path.read_bytes() == b""
@@ -6,6 +6,7 @@ from calc_example.services.calculator import (
     DivideCalculator,
     MultiplyCalculator,
     SubtractCalculator,
+    evaluate,
 )
 
 
@@ -53,3 +54,28 @@ def test_divide_calculator_with_zero_division() -> None:
     with pytest.raises(ValueError):
         calculator = DivideCalculator(2, 0)
         calculator.calculate()
+
+
+@pytest.mark.parametrize(
+    ("a", "operation", "b", "expected_result"),
+    [
+        [2, "+", 3, 5],
+        [2, "-", 3, -1],
+        [2, "*", 3, 6],
+        [2, "/", 3, 0.6667],
+    ],
+)
+def test_evaluate(a, operation, b, expected_result) -> None:
+    assert evaluate(a, operation, b) == expected_result
+
+
+@pytest.mark.parametrize(("operation", "b"), [["^", 2], ["/", 0]])
+def test_evaluate_with_invalid_arguments(operation, b) -> None:
+    with pytest.raises(ValueError):
+        evaluate(2, operation, b)
+
+
+def test_calculators_have_no_instance_dict(calculator_factory) -> None:
+    calculator = calculator_factory.from_string("2 + 2")
+    assert not hasattr(calculator, "__dict__")
+    assert not hasattr(calculator_factory, "__dict__")
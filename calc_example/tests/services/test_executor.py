@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+
+from calc_example.services.executor import EvaluationExecutor, SingleFlight
+from calc_example.web.api.calculator.views import (
+    CalculatorBatchItem,
+    evaluate_batch,
+    evaluate_expression,
+)
+
+
+@pytest.fixture
+def executor():
+    executor = EvaluationExecutor(
+        pool_size=1,
+        chunk_size=2,
+        min_batch_size=3,
+        min_expression_length=5,
+    )
+    executor.start()
+    yield executor
+    executor.shutdown()
+
+
+@pytest.mark.anyio
+async def test_executor_run_batch_in_pool(executor) -> None:
+    items = [CalculatorBatchItem(expression=f"{number}*2") for number in range(5)]
+    results = await executor.run_batch(evaluate_batch, items)
+    assert [result.result for result in results] == [0, 2, 4, 6, 8]
+
+
+@pytest.mark.anyio
+async def test_executor_run_in_pool(executor) -> None:
+    result = await executor.run(evaluate_expression, "100/8", size=5)
+    assert result.result == 12.5
+
+
+@pytest.mark.anyio
+async def test_executor_without_pool_runs_inline() -> None:
+    executor = EvaluationExecutor(
+        pool_size=0,
+        chunk_size=1,
+        min_batch_size=0,
+        min_expression_length=0,
+    )
+    executor.start()
+    assert not executor.is_running
+    result = await executor.run(evaluate_expression, "2+2", size=3)
+    assert result.result == 4
+
+
+@pytest.mark.anyio
+async def test_executor_coalesces_identical_evaluations(executor) -> None:
+    results = await asyncio.gather(
+        *(
+            executor.run(evaluate_expression, "100/8", size=5, key="100/8")
+            for _ in range(4)
+        ),
+    )
+    assert [result.result for result in results] == [12.5] * 4
+    assert executor.single_flight.stats() == {
+        "in_flight": 0,
+        "calls": 1,
+        "coalesced": 3,
+    }
+
+
+@pytest.mark.anyio
+async def test_executor_shares_errors_of_coalesced_evaluations(executor) -> None:
+    results = await asyncio.gather(
+        *(
+            executor.run(evaluate_expression, "1/0+1", size=5, key="1/0+1")
+            for _ in "ab"
+        ),
+        return_exceptions=True,
+    )
+    assert [str(result) for result in results] == ["Cannot divide by zero."] * 2
+    assert executor.single_flight.coalesced == 1
+
+
+@pytest.mark.anyio
+async def test_single_flight_survives_cancelled_caller() -> None:
+    single_flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def compute() -> int:  # noqa: WPS430
+        await release.wait()
+        return 42
+
+    leader = asyncio.ensure_future(single_flight.run("key", compute))
+    follower = asyncio.ensure_future(single_flight.run("key", compute))
+    await asyncio.sleep(0)
+    leader.cancel()
+    release.set()
+    assert await follower == 42
+    assert single_flight.stats() == {"in_flight": 0, "calls": 1, "coalesced": 1}
@@ -0,0 +1,67 @@
+import pytest
+
+from calc_example.services.calculator import (
+    IncrementalCalculator,
+    IncrementalExpression,
+)
+
+
+@pytest.mark.parametrize(
+    ("expression", "edit", "expected_expression", "expected_result"),
+    [
+        ["2+3*4", (4, 5, "10"), "2+3*10", 32],
+        ["2+3*4", (2, 2, "1"), "2+13*4", 54],
+        ["2*3-4", (1, 1, "+1"), "2+1*3-4", 1],
+        ["8-2*3", (4, 5, "3+1"), "8-2*3+1", 3],
+        ["8-(2+3)", (3, 4, "2-1"), "8-(2-1+3)", 4],
+        ["8-2-3", (2, 3, "(2"), "8-(2-3", None],
+        ["1+2", (0, 3, "7"), "7", 7],
+        ["6/2", (2, 3, "0"), "6/0", None],
+    ],
+)
+def test_incremental_expression(
+    expression,
+    edit,
+    expected_expression,
+    expected_result,
+) -> None:
+    incremental = IncrementalExpression(expression)
+    if expected_expression.count("(") != expected_expression.count(")"):
+        with pytest.raises(ValueError, match="Mismatched parentheses"):
+            incremental.apply(*edit)
+        assert incremental.expression == expression
+        return
+    incremental.apply(*edit)
+    assert incremental.expression == expected_expression
+    if expected_result is None:
+        with pytest.raises(ValueError, match="Cannot divide by zero."):
+            incremental.result  # noqa: WPS428
+    else:
+        assert incremental.result == expected_result
+
+
+def test_incremental_expression_reuses_unchanged_subtrees() -> None:
+    incremental = IncrementalExpression("(1+2)*(3+4)")
+    left = incremental.root.left
+    incremental.apply(9, 10, "5")
+    assert incremental.root.left is left
+    assert incremental.result == 24
+
+
+def test_incremental_expression_recovers_from_errors() -> None:
+    incremental = IncrementalExpression("1/0")
+    with pytest.raises(ValueError):
+        incremental.result  # noqa: WPS428
+    incremental.apply(2, 3, "4")
+    assert incremental.result == 0.25
+
+
+def test_incremental_calculator_sessions() -> None:
+    calculator = IncrementalCalculator(max_sessions=1)
+    calculator.open("a", "1+1")
+    assert calculator.edit("a", [(0, 1, "2"), (2, 3, "3")]).result == 5
+    calculator.open("b", "2+2")
+    with pytest.raises(ValueError, match="Unknown session 'a'."):
+        calculator.edit("a", [])
+    with pytest.raises(ValueError, match="Edit is out of the expression."):
+        calculator.edit("b", [(2, 4, "")])
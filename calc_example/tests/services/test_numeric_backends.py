@@ -0,0 +1,68 @@
+from decimal import Decimal
+from fractions import Fraction
+
+import pytest
+
+from calc_example.services.calculator import (
+    LRUCache,
+    RPNCalculator,
+    get_arithmetic,
+    get_rpn_calculator,
+    serialize_number,
+)
+from calc_example.settings import NumericBackend
+
+
+def _calculator(backend: NumericBackend, precision: int = 28) -> RPNCalculator:
+    return RPNCalculator(LRUCache(4), get_arithmetic(backend, precision))
+
+
+@pytest.mark.parametrize(
+    ("backend", "expression", "expected_result"),
+    [
+        [NumericBackend.FLOAT, "3/7", 0.4286],
+        [NumericBackend.DECIMAL, "3/7", Decimal("0.4285714285714285714285714286")],
+        [NumericBackend.FRACTION, "3/7", Fraction(3, 7)],
+        [NumericBackend.FRACTION, "(1/3+1/6)*4", Fraction(2)],
+        [NumericBackend.DECIMAL, "2*(3+(4-1))/4", Decimal(3)],
+        [
+            NumericBackend.FRACTION,
+            "99999999999999999999+1",
+            Fraction(10**20),
+        ],
+    ],
+)
+def test_numeric_backends(backend, expression, expected_result) -> None:
+    result = _calculator(backend).calculate(expression)
+    assert result == expected_result
+    assert type(result) is type(expected_result)
+
+
+def test_decimal_backend_precision() -> None:
+    assert _calculator(NumericBackend.DECIMAL, 5).calculate("2/3") == Decimal("0.66667")
+
+
+@pytest.mark.parametrize("backend", list(NumericBackend))
+def test_numeric_backends_with_zero_division(backend) -> None:
+    with pytest.raises(ValueError, match="Cannot divide by zero."):
+        _calculator(backend).calculate("2/(1-1)")
+
+
+def test_rpn_calculators_of_backends() -> None:
+    decimal_calculator = get_rpn_calculator(NumericBackend.DECIMAL, 28)
+    assert get_rpn_calculator(NumericBackend.DECIMAL, 28) is decimal_calculator
+    assert get_rpn_calculator(NumericBackend.FRACTION, 28).cache is not (
+        decimal_calculator.cache
+    )
+
+
+@pytest.mark.parametrize(
+    ("number", "expected_value"),
+    [
+        [0.5, 0.5],
+        [Decimal("0.50"), "0.50"],
+        [Fraction(3, 7), "3/7"],
+    ],
+)
+def test_serialize_number(number, expected_value) -> None:
+    assert serialize_number(number) == expected_value
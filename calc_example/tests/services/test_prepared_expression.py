@@ -0,0 +1,79 @@
+from fractions import Fraction
+
+import pytest
+
+from calc_example.services.calculator import (
+    LRUCache,
+    PreparedExpression,
+    RPNCalculator,
+    get_rpn_calculator,
+    make_handle,
+    parse_handle,
+)
+from calc_example.services.calculator.opcodes import VARIABLE
+from calc_example.settings import NumericBackend
+
+
+@pytest.fixture
+def rpn_calculator():
+    return RPNCalculator(cache=LRUCache(2))
+
+
+def test_prepare_numbers_variables_in_order(rpn_calculator) -> None:
+    compiled = rpn_calculator.prepare("(b + a) * b")
+    assert compiled.variables == ("b", "a")
+    assert (VARIABLE, 0) in compiled.program
+
+
+def test_prepared_expression_shares_subexpressions(rpn_calculator) -> None:
+    compiled = rpn_calculator.prepare("(a+b)*(a+b)")
+    assert compiled.slots == 1
+    assert rpn_calculator.execute(compiled, [1.0, 2.0]) == 9
+
+
+def test_prepared_expression_is_executed_without_parsing(
+    rpn_calculator,
+    monkeypatch,
+) -> None:
+    prepared = PreparedExpression(rpn_calculator, rpn_calculator.prepare("x*2+y"))
+
+    def fail(expression):
+        raise AssertionError("Parsed again")
+
+    monkeypatch.setattr(rpn_calculator, "_parse", fail)
+    assert [prepared.execute({"x": x, "y": 1}) for x in range(3)] == [1, 3, 5]
+
+
+def test_prepared_expression_checks_bindings(rpn_calculator) -> None:
+    prepared = PreparedExpression(rpn_calculator, rpn_calculator.prepare("x/y"))
+    with pytest.raises(ValueError, match="Variable 'y' is not bound."):
+        prepared.execute({"x": 1})
+    with pytest.raises(ValueError, match="Unknown variable 'z'."):
+        prepared.execute({"x": 1, "y": 2, "z": 3})
+    with pytest.raises(ValueError, match="Cannot divide by zero."):
+        prepared.execute({"x": 1, "y": 0})
+
+
+def test_compile_rejects_variables(rpn_calculator) -> None:
+    with pytest.raises(ValueError, match="Invalid character: x"):
+        rpn_calculator.compile("x+1")
+
+
+@pytest.mark.parametrize("expression", ["a(+b)", "2a+1", "()a", "(a)(b)", "a+"])
+def test_prepare_rejects_misplaced_operands(rpn_calculator, expression) -> None:
+    with pytest.raises(ValueError, match="Invalid expression"):
+        rpn_calculator.prepare(expression)
+
+
+def test_prepared_expression_with_exact_backend() -> None:
+    calculator = get_rpn_calculator(NumericBackend.FRACTION, 28)
+    prepared = PreparedExpression(calculator, calculator.prepare("x/3"))
+    assert prepared.execute({"x": 0.1}) == Fraction(1, 30)
+
+
+def test_handle_round_trip() -> None:
+    handle = make_handle("(a+b)/2", NumericBackend.DECIMAL)
+    assert "/" not in handle
+    assert parse_handle(handle) == ("(a+b)/2", NumericBackend.DECIMAL)
+    with pytest.raises(ValueError):
+        parse_handle("bm90LWEtYmFja2VuZDp4")
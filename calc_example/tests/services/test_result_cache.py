@@ -0,0 +1,73 @@
+import multiprocessing
+
+import pytest
+
+from calc_example.services.result_cache import SharedResultCache
+from calc_example.services.result_cache.cache import MAX_KEY_SIZE
+
+
+@pytest.fixture
+def result_cache(tmp_path):
+    result_cache = SharedResultCache(tmp_path / "results", slots=4, ttl=60, ways=2)
+    result_cache.open()
+    yield result_cache
+    result_cache.close()
+
+
+def _put_in_other_process(path, key, value) -> None:
+    result_cache = SharedResultCache(path, slots=4, ttl=60, ways=2)
+    result_cache.open()
+    result_cache.put(key, value)
+    result_cache.close()
+
+
+def test_result_cache_get_and_put(result_cache) -> None:
+    assert result_cache.get("2+2") is None
+    result_cache.put("2+2", 4)
+    assert result_cache.get("2+2") == 4
+    assert result_cache.stats() == {"slots": 4, "hits": 1, "misses": 1}
+
+
+def test_result_cache_is_shared_between_processes(result_cache) -> None:
+    process = multiprocessing.get_context("spawn").Process(
+        target=_put_in_other_process,
+        args=(result_cache.path, "3*3", 9),
+    )
+    process.start()
+    process.join()
+    assert result_cache.get("3*3") == 9
+
+
+def test_result_cache_ttl(tmp_path) -> None:
+    result_cache = SharedResultCache(tmp_path / "results", slots=4, ttl=-1)
+    result_cache.open()
+    result_cache.put("2+2", 4)
+    assert result_cache.get("2+2") is None
+    result_cache.close()
+
+
+def test_result_cache_evicts_least_recently_used(tmp_path) -> None:
+    result_cache = SharedResultCache(tmp_path / "results", slots=2, ttl=60, ways=2)
+    result_cache.open()
+    result_cache.put("1+1", 2)
+    result_cache.put("2+2", 4)
+    result_cache.get("1+1")
+    result_cache.put("3+3", 6)
+    assert result_cache.get("1+1") == 2
+    assert result_cache.get("2+2") is None
+    assert result_cache.get("3+3") == 6
+    result_cache.close()
+
+
+def test_result_cache_skips_long_keys(result_cache) -> None:
+    key = "1+" * MAX_KEY_SIZE + "1"
+    result_cache.put(key, 1)
+    assert result_cache.get(key) is None
+
+
+def test_disabled_result_cache(tmp_path) -> None:
+    result_cache = SharedResultCache(tmp_path / "results", slots=0, ttl=60)
+    result_cache.open()
+    result_cache.put("2+2", 4)
+    assert not result_cache.is_open
+    assert result_cache.get("2+2") is None
@@ -0,0 +1,103 @@
+import pytest
+
+from calc_example.services.calculator import LRUCache, RPNCalculator, get_rpn_calculator
+from calc_example.services.calculator.opcodes import DIVIDE, PUSH
+from calc_example.services.calculator.tokenizer import tokenize
+from calc_example.settings import NumericBackend
+
+
+@pytest.fixture
+def rpn_calculator():
+    return RPNCalculator(cache=LRUCache(2))
+
+
+@pytest.mark.parametrize(
+    ("expression", "expected_result"),
+    [
+        ["2+3", 5],
+        ["2+3*4", 14],
+        ["8/2-1", 3],
+        ["2 * 3 + 1", 7],
+        ["(2+3)*4", 20],
+        ["2*(3+(4-1))", 12],
+        ["8-3-2", 3],
+        ["3/7", 0.4286],
+    ],
+)
+def test_rpn_calculator(rpn_calculator, expression, expected_result) -> None:
+    assert rpn_calculator.calculate(expression) == expected_result
+
+
+@pytest.mark.parametrize("expression", ["2+", "a+2", "2^2", "(2+3", "2)", "()"])
+def test_rpn_calculator_with_invalid_expression(rpn_calculator, expression) -> None:
+    with pytest.raises(ValueError):
+        rpn_calculator.calculate(expression)
+
+
+def test_rpn_calculator_reuses_compiled_expression(rpn_calculator) -> None:
+    compiled = rpn_calculator.compile("2 + 3")
+    assert rpn_calculator.compile("2+3") is compiled
+    assert rpn_calculator.cache.stats() == {
+        "size": 1,
+        "maxsize": 2,
+        "hits": 1,
+        "misses": 1,
+        "evictions": 0,
+    }
+
+
+def test_rpn_calculator_cache_eviction(rpn_calculator) -> None:
+    for expression in ("1+1", "2+2", "1+1", "3+3"):
+        rpn_calculator.calculate(expression)
+    assert "1+1" in rpn_calculator.cache
+    assert "2+2" not in rpn_calculator.cache
+    assert rpn_calculator.cache.evictions == 1
+
+
+def test_rpn_calculator_with_zero_division(rpn_calculator) -> None:
+    with pytest.raises(ValueError, match="Cannot divide by zero."):
+        rpn_calculator.calculate("2/0")
+
+
+def test_rpn_calculator_cache_key_matches_tokens(rpn_calculator) -> None:
+    compiled = rpn_calculator.compile("1 2+3", tokenize("1 2+3"))
+    assert compiled.expression == "12+3"
+    assert rpn_calculator.calculate("12+3") == 15
+    assert rpn_calculator.calculate("1 2 + 3") == 15
+
+
+def test_rpn_calculator_folds_constants(rpn_calculator) -> None:
+    compiled = rpn_calculator.compile("(2+3)*4-10/4")
+    assert compiled.program == [(PUSH, 17.5)]
+    assert rpn_calculator.evaluate(compiled) == 17.5
+
+
+def test_rpn_calculator_shares_subexpressions(rpn_calculator) -> None:
+    compiled = rpn_calculator.compile("(2/0+1)*(2/0+1)")
+    assert compiled.slots == 1
+    assert [opcode for opcode, _ in compiled.program].count(DIVIDE) == 1
+    with pytest.raises(ValueError, match="Cannot divide by zero."):
+        rpn_calculator.evaluate(compiled)
+
+
+@pytest.mark.parametrize(
+    ("backend", "expression", "expected_length"),
+    [
+        [NumericBackend.FLOAT, "(1/0)*1", 3],
+        [NumericBackend.FLOAT, "1*(1/0)-0", 3],
+        [NumericBackend.FLOAT, "(1/0)+0", 5],
+        [NumericBackend.FLOAT, "(1/0)/1", 5],
+        [NumericBackend.DECIMAL, "(1/0)/1", 3],
+        [NumericBackend.DECIMAL, "(1/0)*(3/3)", 3],
+        [NumericBackend.FRACTION, "0+(1/0)/1+0", 3],
+    ],
+)
+def test_rpn_calculator_simplifications(backend, expression, expected_length) -> None:
+    calculator = get_rpn_calculator(backend, 28)
+    assert len(calculator.compile(expression).program) == expected_length
+
+
+def test_rpn_calculator_without_optimization() -> None:
+    calculator = RPNCalculator(cache=LRUCache(1), optimize=False)
+    assert len(calculator.compile("2+3*4").program) == 5
+    assert calculator.calculate("2+3*4") == 14
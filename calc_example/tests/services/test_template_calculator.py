@@ -0,0 +1,72 @@
+import pytest
+
+from calc_example.services.calculator import (
+    LRUCache,
+    RPNCalculator,
+    TemplateCalculator,
+    TemplateRegistry,
+)
+from calc_example.services.calculator.jit import generate_source, split_template
+from calc_example.services.calculator.tokenizer import tokenize
+
+
+@pytest.fixture
+def registry():
+    return TemplateRegistry(threshold=2, max_templates=2, max_operands=4)
+
+
+@pytest.fixture
+def template_calculator(registry):
+    return TemplateCalculator(RPNCalculator(cache=LRUCache(4)), registry)
+
+
+def test_split_template() -> None:
+    assert split_template(tokenize("(12+3)*4.5")) == ("(#+#)*#", [12, 3, 4.5])
+
+
+def test_generate_source() -> None:
+    compiled = RPNCalculator(cache=LRUCache(0), optimize=False).compile("(1+2)*3/4-5")
+    assert generate_source(compiled) == (
+        "def template(x0, x1, x2, x3, x4):\n"
+        "    return (divide(((x0 + x1) * x2), x3) - x4)\n"
+    )
+
+
+def test_template_calculator_promotes_hot_templates(
+    template_calculator,
+    registry,
+) -> None:
+    assert template_calculator.calculate("1+2*3") == 7
+    assert registry.promoted() == {}
+    assert template_calculator.calculate("2+3*4") == 14
+    assert registry.promoted() == {"#+#*#": 2}
+    assert template_calculator.calculate("3+4*5") == 23
+    assert template_calculator.calculate("10+1/3") == 10.3333
+    assert registry.promoted() == {"#+#*#": 3}
+    assert registry.stats() == {"templates": 2, "promoted": 1, "promotions": 1}
+
+
+def test_template_calculator_with_zero_division(template_calculator) -> None:
+    template_calculator.calculate("1/2")
+    template_calculator.calculate("1/2")
+    with pytest.raises(ValueError, match="Cannot divide by zero."):
+        template_calculator.calculate("1/0")
+
+
+def test_template_calculator_skips_large_templates(
+    template_calculator,
+    registry,
+) -> None:
+    for _ in range(3):
+        assert template_calculator.calculate("1+1+1+1+1") == 5
+    assert registry.promoted() == {}
+
+
+def test_template_calculator_warm(template_calculator, registry) -> None:
+    assert template_calculator.warm(["1+2*3", "(1 + 2)*3", "1+", "1+a"]) == 2
+    assert registry.promoted() == {"#+#*#": 0, "(#+#)*#": 0}
+    assert template_calculator.rpn_calculator.cache.get("1+2*3") is not None
+    assert template_calculator.warm(["1+2*3"]) == 1
+    assert registry.stats()["promotions"] == 2
+    assert template_calculator.calculate("2+3*4") == 14
+    assert registry.promoted() == {"#+#*#": 1, "(#+#)*#": 0}
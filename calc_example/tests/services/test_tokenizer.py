@@ -0,0 +1,32 @@
+import pytest
+
+from calc_example.services.calculator.tokenizer import Token, TokenKind, tokenize
+
+
+def test_tokenize() -> None:
+    assert tokenize(" 12.5*(ab + 3) ") == [
+        Token(TokenKind.NUMBER, "12.5", 0),
+        Token(TokenKind.OPERATOR, "*", 4),
+        Token(TokenKind.LPAREN, "(", 5),
+        Token(TokenKind.IDENTIFIER, "ab", 6),
+        Token(TokenKind.OPERATOR, "+", 8),
+        Token(TokenKind.NUMBER, "3", 9),
+        Token(TokenKind.RPAREN, ")", 10),
+    ]
+
+
+@pytest.mark.parametrize(
+    ("expression", "expected_tokens"),
+    [
+        ["2%2", [("NUMBER", "2"), ("UNKNOWN", "%"), ("NUMBER", "2")]],
+        ["2.", [("NUMBER", "2"), ("UNKNOWN", ".")]],
+        ["1.2.3", [("NUMBER", "1.2"), ("UNKNOWN", "."), ("NUMBER", "3")]],
+        [
+            "1 2\t+3",
+            [("NUMBER", "12"), ("UNKNOWN", "\t"), ("OPERATOR", "+"), ("NUMBER", "3")],
+        ],
+    ],
+)
+def test_tokenize_unknown_characters(expression, expected_tokens) -> None:
+    tokens = [(token.kind.value, token.value) for token in tokenize(expression)]
+    assert tokens == expected_tokens
@@ -0,0 +1,69 @@
+import pytest
+
+from calc_example.services.calculator import LRUCache, VectorizedCalculator
+from calc_example.services.calculator.calculator import divide
+from calc_example.services.calculator.vectorized import get_result_colors
+
+np = pytest.importorskip("numpy")
+
+
+@pytest.fixture
+def vectorized_calculator():
+    return VectorizedCalculator(cache=LRUCache(2))
+
+
+def test_vectorized_calculator(vectorized_calculator) -> None:
+    results = vectorized_calculator.calculate(
+        "a*b+c",
+        {"a": [1, 2, 3], "b": [4, 5, 6], "c": np.array([1.0, 0.0, 2.0])},
+    )
+    np.testing.assert_array_equal(results, [5, 10, 20])
+
+
+def test_vectorized_calculator_rounds_division(vectorized_calculator) -> None:
+    results = vectorized_calculator.calculate("a/7", {"a": [3, 14]})
+    np.testing.assert_array_equal(results, [0.4286, 2])
+
+
+def test_vectorized_division_rounds_like_divide(vectorized_calculator) -> None:
+    rng = np.random.default_rng(0)
+    dividends = [38310.0, *rng.integers(-10**5, 10**5, 50000).tolist()]
+    divisors = [40000.0, *(rng.integers(1, 5000, 50000) * 8).tolist()]
+    results = vectorized_calculator.calculate(
+        "a/b",
+        {"a": np.array(dividends, dtype=float), "b": np.array(divisors, dtype=float)},
+    )
+    # Python floats, round() of numpy floats rounds like np.round.
+    expected = [divide(float(a), float(b)) for a, b in zip(dividends, divisors)]
+    np.testing.assert_array_equal(results, expected)
+    assert vectorized_calculator.calculate("38310/40000", {}) == divide(38310, 40000)
+
+
+def test_vectorized_calculator_with_zero_division(vectorized_calculator) -> None:
+    with pytest.raises(ValueError, match="Cannot divide by zero."):
+        vectorized_calculator.calculate("a/b", {"a": [1, 2], "b": [1, 0]})
+
+
+@pytest.mark.parametrize("template", ["a+", "a+%", "2a+b"])
+def test_vectorized_calculator_with_invalid_template(
+    vectorized_calculator,
+    template,
+) -> None:
+    with pytest.raises(ValueError):
+        vectorized_calculator.compile(template)
+
+
+def test_vectorized_calculator_with_missing_operand(vectorized_calculator) -> None:
+    with pytest.raises(ValueError, match="Missing operand 'b'."):
+        vectorized_calculator.calculate("a+b", {"a": [1]})
+
+
+def test_vectorized_expression_variables(vectorized_calculator) -> None:
+    compiled = vectorized_calculator.compile("b * a + b")
+    assert compiled.variables == ("b", "a")
+    assert vectorized_calculator.compile("b*a+b") is compiled
+
+
+def test_get_result_colors() -> None:
+    colors = get_result_colors(np.array([6, 0.4286, -3, 0]))
+    assert colors.tolist() == ["green", "red", "red", "green"]
@@ -0,0 +1,23 @@
+import subprocess
+import sys
+
+
+def test_entrypoint_does_not_import_prometheus_client() -> None:
+    """
+    Checks that prometheus-client isn't imported before the metrics directory is set.
+
+    prometheus-client chooses the multiprocess mode on import, so
+    an import by the runner would disable it for all workers.
+    """
+    code = (
+        "import sys, calc_example.__main__; "
+        "print('prometheus_client' in sys.modules)"
+    )
+    completed = subprocess.run(
+        [sys.executable, "-c", code],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+
+    assert completed.stdout.strip() == "False"
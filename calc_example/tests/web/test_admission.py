@@ -0,0 +1,96 @@
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from starlette import status
+
+from calc_example.services.calculator.prepared import make_handle
+from calc_example.settings import NumericBackend
+
+PREPARED_PATH = f"/api/prepared/{make_handle('a+b', NumericBackend.FLOAT)}"
+
+
+@pytest.fixture
+def overloaded_app(fastapi_app: FastAPI) -> FastAPI:
+    """
+    Application of a worker with a queueing delay above the target.
+
+    :param fastapi_app: current FastAPI application.
+    :return: the application.
+    """
+    controller = fastapi_app.state.admission_controller
+    controller.delay = 0.2
+    # Probes of the requests don't bring the delay back in tests.
+    controller.probe = lambda: None
+    return fastapi_app
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    ("path", "body", "expected_status"),
+    [
+        ["/api/calculate", {"expression": "2+3"}, status.HTTP_200_OK],
+        ["/api/calculate", {"expression": "((1+2)*(3-4))/5"}, 503],
+        ["/api/calculate", {"expression": 5}, 422],
+        ["/api/calculate/batch", {"items": [{"expression": "1+1"}]}, 200],
+        ["/api/calculate/batch", {"items": [{"expression": "1+1"}] * 10}, 503],
+        [PREPARED_PATH, {"bindings": {"a": 1, "b": 2}}, status.HTTP_200_OK],
+        [PREPARED_PATH, {"bindings": [{"a": 1, "b": 2}] * 10}, 503],
+        ["/api/prepared/not-a-handle", {"bindings": {"a": 1}}, 404],
+    ],
+)
+async def test_admission_control_prefers_cheap_requests(
+    client: AsyncClient,
+    overloaded_app: FastAPI,
+    path: str,
+    body: dict,
+    expected_status: int,
+) -> None:
+    """
+    Checks that only cheap calculations are handled under overload.
+
+    :param client: client for the app.
+    :param overloaded_app: current FastAPI application.
+    :param path: path of the request.
+    :param body: body of the request.
+    :param expected_status: expected status of the response.
+    """
+    response = await client.post(path, json=body)
+
+    assert response.status_code == expected_status
+    if expected_status == status.HTTP_503_SERVICE_UNAVAILABLE:
+        assert response.headers["Retry-After"] == "1"
+        assert response.json() == {"detail": "Service is overloaded."}
+
+
+@pytest.mark.anyio
+async def test_admission_control_sheds_streams(
+    client: AsyncClient,
+    overloaded_app: FastAPI,
+) -> None:
+    """
+    Checks that streams, whose cost is unknown, are shed under overload.
+
+    :param client: client for the app.
+    :param overloaded_app: current FastAPI application.
+    """
+    response = await client.post("/api/calculate/stream", content=b"1+1\n")
+
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+
+
+@pytest.mark.anyio
+async def test_admission_control_keeps_other_paths(
+    client: AsyncClient,
+    overloaded_app: FastAPI,
+) -> None:
+    """
+    Checks that requests besides calculations are never shed.
+
+    :param client: client for the app.
+    :param overloaded_app: current FastAPI application.
+    """
+    overloaded_app.state.admission_controller.delay = 10
+
+    response = await client.get("/metrics")
+
+    assert response.status_code == status.HTTP_200_OK
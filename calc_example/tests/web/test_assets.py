@@ -0,0 +1,73 @@
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from starlette import status
+
+
+@pytest.mark.anyio
+async def test_home_page_is_pre_rendered(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+) -> None:
+    """
+    Checks that the home page references hashed assets and is revalidated.
+
+    :param client: client for the app.
+    :param fastapi_app: current FastAPI application.
+    """
+    response = await client.get("/", headers={"Accept-Encoding": "gzip"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["cache-control"] == "no-cache"
+    assert fastapi_app.state.assets.url("js/calculator.js") in response.text
+
+    not_modified = await client.get(
+        "/",
+        headers={"Accept-Encoding": "gzip", "If-None-Match": response.headers["etag"]},
+    )
+
+    assert not_modified.status_code == status.HTTP_304_NOT_MODIFIED
+    assert not_modified.content == b""
+    assert not_modified.headers["etag"] == response.headers["etag"]
+
+
+@pytest.mark.anyio
+async def test_hashed_asset_is_immutable(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+) -> None:
+    """
+    Checks that hashed assets are precompressed and cached forever.
+
+    :param client: client for the app.
+    :param fastapi_app: current FastAPI application.
+    """
+    url = fastapi_app.state.assets.url("style/calculator.css")
+
+    response = await client.get(url, headers={"Accept-Encoding": "gzip"})
+    raw = await client.get(url, headers={"Accept-Encoding": "identity"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["cache-control"].endswith("immutable")
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.headers["content-type"] == "text/css; charset=utf-8"
+    assert "content-encoding" not in raw.headers
+    assert raw.headers["etag"] != response.headers["etag"]
+    with open("calc_example/static/style/calculator.css", "rb") as css:
+        assert response.content == raw.content == css.read()
+
+
+@pytest.mark.anyio
+async def test_unhashed_and_unknown_assets(client: AsyncClient) -> None:
+    """
+    Checks that assets are still served by their names.
+
+    :param client: client for the app.
+    """
+    response = await client.get("/static/js/calculator.js")
+    missing = await client.get("/static/js/missing.js")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["cache-control"] == "no-cache"
+    assert missing.status_code == status.HTTP_404_NOT_FOUND
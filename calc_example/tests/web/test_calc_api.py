@@ -1,14 +1,32 @@
+from pathlib import Path
+
 import pytest
+import ujson
 from fastapi import FastAPI
+from fastapi.responses import UJSONResponse
 from httpx import AsyncClient
 from starlette import status
 
+from calc_example.services.bulk import evaluate_file
+from calc_example.services.calculator import LRUCache
+from calc_example.settings import NumericBackend, settings
+from calc_example.web.api.calculator import views
+from calc_example.web.api.calculator.views import (
+    encode_line_outcome,
+    make_result,
+    result_response,
+)
+
 
 @pytest.mark.anyio
 @pytest.mark.parametrize(
     ("input_data", "expected_result"),
     [
         [{"expression": "3+3"}, {"result": 6}],
+        [{"expression": "1 2+3"}, {"result": 15}],
+        [{"expression": "2+3*4"}, {"result": 14}],
+        [{"expression": "(2+3)*4"}, {"result": 20}],
+        [{"expression": "2*(3+(4-1))/4"}, {"result": 3}],
         [{"expression": "3*3"}, {"result": 9}],
         [{"expression": "3-3"}, {"result": 0}],
         [{"expression": "3/3"}, {"result": 1}],
@@ -47,10 +65,19 @@ async def test_calculator_api(
         ["+2+", "Value error, Expression should not start or end with an operator."],
         ["2%2", "Value error, Invalid character '%'."],
         ["22=", "Value error, Invalid character '='."],
+        ["2.5+1", "Value error, Invalid character '.'."],
         ["2++2", "Value error, Invalid character '+'."],
         ["22", "String should have at least 3 characters"],
         [" 22  ", "Value error, Minimum length must be 3 except a spaces."],
         ["2/0", "Cannot divide by zero."],
+        ["(2+3", "Mismatched parentheses"],
+        ["2+3)", "Mismatched parentheses"],
+        ["(2+)3", "Invalid expression"],
+        ["2(+3)", "Invalid expression"],
+        ["3()/1", "Invalid expression"],
+        ["()5+1", "Invalid expression"],
+        ["1+()2", "Invalid expression"],
+        ["(1+2)(3)", "Invalid expression"],
     ],
 )
 async def test_calculator_api_raise_error_with_wrong_expression(
@@ -74,3 +101,413 @@ async def test_calculator_api_raise_error_with_wrong_expression(
 
     res_data = response.json()
     assert res_data["detail"][0]["msg"] == expected_error_message
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    ("data", "expected_locs"),
+    [
+        [{"expression": "2++2"}, [["body", "expression"]]],
+        [{"expression": "2+a"}, [["body", "expression"]]],
+        [
+            {"expression": "2++2", "color": "maybe"},
+            [["body", "expression"], ["body", "color"]],
+        ],
+    ],
+)
+async def test_calculator_api_error_location(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    data: dict[str, str],
+    expected_locs: list[list[str]],
+) -> None:
+    """
+    Checks that expression errors are reported at the expression field.
+
+    :param client: client for the app.
+    :param fastapi_app: current FastAPI application.
+    :param data: data to be sent as input to the server.
+    :param expected_locs: expected locations of the errors.
+    """
+    url = fastapi_app.url_path_for("calculate")
+    response = await client.post(url, json=data)
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert [error["loc"] for error in response.json()["detail"]] == expected_locs
+
+
+@pytest.mark.anyio
+async def test_calculator_batch_api(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+) -> None:
+    """
+    Checks that batch items are calculated in order with separate errors.
+
+    :param client: client for the app.
+    :param fastapi_app: current FastAPI application.
+    """
+    url = fastapi_app.url_path_for("calculate_batch")
+    items = [
+        {"expression": "3+3"},
+        {"expression": "2/0"},
+        {"expression": "3/7", "color": True},
+        {"expression": "2%2"},
+    ]
+    response = await client.post(url, json={"items": items})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {
+        "results": [
+            {"result": 6},
+            {"error": "Cannot divide by zero."},
+            {"result": 0.4286, "color": "red"},
+            {"error": "Value error, Invalid character '%'."},
+        ],
+    }
+
+
+@pytest.mark.anyio
+async def test_calculator_batch_api_with_malformed_items(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+) -> None:
+    """
+    Checks that malformed items fail only their own results.
+
+    :param client: client for the app.
+    :param fastapi_app: current FastAPI application.
+    """
+    url = fastapi_app.url_path_for("calculate_batch")
+    items = [
+        {"expression": "1+1"},
+        {"expression": 5},
+        {"color": True},
+        "2+2",
+        {"expression": "2*3", "color": "maybe"},
+    ]
+    response = await client.post(url, json={"items": items})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {
+        "results": [
+            {"result": 2},
+            {"error": "Input should be a valid string"},
+            {"error": "Field required"},
+            {
+                "error": (
+                    "Input should be a valid dictionary or instance "
+                    "of CalculatorBatchItem"
+                ),
+            },
+            {"error": "Input should be a valid boolean, unable to interpret input"},
+        ],
+    }
+
+
+@pytest.mark.anyio
+async def test_calculator_batch_api_raise_error_with_too_many_items(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """
+    Checks that batches larger than the configured maximum are rejected.
+
+    :param client: client for the app.
+    :param fastapi_app: current FastAPI application.
+    :param monkeypatch: pytest monkeypatch fixture.
+    """
+    monkeypatch.setattr(settings, "batch_max_size", 1)
+    url = fastapi_app.url_path_for("calculate_batch")
+    items = [{"expression": "3+3"}, {"expression": "3+3"}]
+    response = await client.post(url, json={"items": items})
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert response.json()["detail"][0]["msg"] == (
+        "Value error, Batch size must not exceed 1 items."
+    )
+
+
+@pytest.mark.anyio
+async def test_calculator_stream_api(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+) -> None:
+    """
+    Checks that streamed lines are calculated in order.
+
+    :param client: client for the app.
+    :param fastapi_app: current FastAPI application.
+    """
+    url = fastapi_app.url_path_for("calculate_stream")
+    body = b'3+3\n{"expression": "3/7", "color": true}\n\n2/0\n{"color": 1\n3*3'
+    response = await client.post(url, content=body)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert [ujson.loads(line) for line in response.text.splitlines()] == [
+        {"result": 6},
+        {"result": 0.4286, "color": "red"},
+        {"error": "String should have at least 3 characters"},
+        {"error": "Cannot divide by zero."},
+        {"error": "Invalid JSON."},
+        {"result": 9},
+    ]
+
+
+@pytest.mark.anyio
+async def test_calculator_stream_api_aligns_with_eval_file(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    tmp_path: Path,
+) -> None:
+    """
+    Checks that the n-th streamed outcome is the outcome of the n-th line.
+
+    Blank lines get an error like in eval-file, so both give the same output.
+
+    :param client: client for the app.
+    :param fastapi_app: current FastAPI application.
+    :param tmp_path: directory for the files of eval-file.
+    """
+    body = b"\n1+1\n \n\n2*3\n  \n"
+    input_path = tmp_path / "input.txt"
+    input_path.write_bytes(body)
+    output_path = tmp_path / "output.ndjson"
+    evaluate_file(input_path, output_path, encode_line_outcome, 1, 4)
+
+    url = fastapi_app.url_path_for("calculate_stream")
+    response = await client.post(url, content=body)
+
+    assert len(response.text.splitlines()) == body.count(b"\n")
+    assert response.content == output_path.read_bytes()
+
+
+@pytest.mark.anyio
+async def test_calculator_stream_api_with_too_long_line(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """
+    Checks that a too long line fails alone and the stream continues.
+
+    :param client: client for the app.
+    :param fastapi_app: current FastAPI application.
+    :param monkeypatch: pytest monkeypatch fixture.
+    """
+    monkeypatch.setattr(settings, "stream_max_line_length", 8)
+    url = fastapi_app.url_path_for("calculate_stream")
+    response = await client.post(url, content=b"1+1\n" + b"1+" * 100 + b"1\n2+2")
+
+    assert [ujson.loads(line) for line in response.text.splitlines()] == [
+        {"result": 2},
+        {"error": "Line must not exceed 8 bytes."},
+        {"result": 4},
+    ]
+
+
+@pytest.mark.anyio
+async def test_calc_api_reuses_shared_result(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+) -> None:
+    url = fastapi_app.url_path_for("calculate")
+    fastapi_app.state.result_cache.put("40+2", 7)
+    response = await client.post(url, json={"expression": "40 + 2", "color": True})
+    assert response.json() == {"result": 7, "color": "red"}
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    ("input_data", "expected_result"),
+    [
+        [
+            {"expression": "3/7", "backend": "decimal"},
+            {"result": "0.4285714285714285714285714286"},
+        ],
+        [{"expression": "3/7+1/7", "backend": "fraction"}, {"result": "4/7"}],
+        [
+            {"expression": "8/4", "backend": "fraction", "color": True},
+            {"result": "2", "color": "green"},
+        ],
+        [{"expression": "3/7", "backend": "float"}, {"result": 0.4286}],
+    ],
+)
+async def test_calculator_api_with_backend(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    input_data: dict[str, str | bool],
+    expected_result: dict[str, str | float],
+) -> None:
+    """
+    Checks calculations with the numeric backend of the request.
+
+    :param client: client for the app.
+    :param fastapi_app: current FastAPI application.
+    :param input_data: data to be sent as input to the server.
+    :param expected_result: expected result.
+    """
+    url = fastapi_app.url_path_for("calculate")
+    response = await client.post(url, json=input_data)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == expected_result
+
+
+@pytest.mark.anyio
+async def test_calculator_api_with_configured_backend(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """
+    Checks that the configured backend is used without one in the request.
+
+    :param client: client for the app.
+    :param fastapi_app: current FastAPI application.
+    :param monkeypatch: pytest monkeypatch fixture.
+    """
+    monkeypatch.setattr(settings, "numeric_backend", NumericBackend.FRACTION)
+    url = fastapi_app.url_path_for("calculate")
+    response = await client.post(url, json={"expression": "1/3"})
+
+    assert response.json() == {"result": "1/3"}
+
+
+@pytest.mark.anyio
+async def test_batch_and_stream_with_configured_backend(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """
+    Checks that batches and streams use the configured backend.
+
+    :param client: client for the app.
+    :param fastapi_app: current FastAPI application.
+    :param monkeypatch: pytest monkeypatch fixture.
+    """
+    monkeypatch.setattr(settings, "numeric_backend", NumericBackend.FRACTION)
+    response = await client.post(
+        fastapi_app.url_path_for("calculate_batch"),
+        json={"items": [{"expression": "1/3"}, {"expression": "1/2", "color": True}]},
+    )
+    assert response.json() == {
+        "results": [{"result": "1/3"}, {"result": "1/2", "color": "red"}],
+    }
+
+    response = await client.post(
+        fastapi_app.url_path_for("calculate_stream"),
+        content=b"1/3\n2/4\n",
+    )
+    assert [ujson.loads(line) for line in response.text.splitlines()] == [
+        {"result": "1/3"},
+        {"result": "1/2"},
+    ]
+
+
+@pytest.mark.parametrize("result", [6.0, 0.4286, -3.0, 0.0])
+@pytest.mark.parametrize("color", [False, True])
+def test_result_response_matches_response_model(result: float, color: bool) -> None:
+    """
+    Checks that the pre-serialized result has the body of the response model.
+
+    :param result: result of a calculation.
+    :param color: whether the result has a color.
+    """
+    expected = UJSONResponse(make_result(result, color).model_dump())
+    response = result_response(result, color)
+
+    assert response.body == expected.body
+    assert response.media_type == expected.media_type
+
+
+def test_calculator_api_schema_documents_result(fastapi_app: FastAPI) -> None:
+    """
+    Checks that the OpenAPI schema still documents the result models.
+
+    :param fastapi_app: current FastAPI application.
+    """
+    path = fastapi_app.url_path_for("calculate")
+    operation = fastapi_app.openapi()["paths"][path]["post"]
+    schema = operation["responses"]["200"]["content"]["application/json"]["schema"]
+
+    assert schema == {
+        "anyOf": [
+            {"$ref": "#/components/schemas/CalculatorResult"},
+            {"$ref": "#/components/schemas/CalculatorResultWithColor"},
+        ],
+        "title": "Response Calculate Api Calculate Post",
+    }
+
+
+@pytest.mark.anyio
+async def test_prepared_expression_api(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+) -> None:
+    response = await client.post(
+        fastapi_app.url_path_for("prepare"),
+        json={"expression": "(a + b) * 2"},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    prepared = response.json()
+    assert prepared["variables"] == ["a", "b"]
+
+    url = fastapi_app.url_path_for("execute_prepared", handle=prepared["handle"])
+    response = await client.post(url, json={"bindings": {"a": 1, "b": 2}})
+    assert response.json() == {"result": 6}
+
+    response = await client.post(
+        url,
+        json={"bindings": [{"a": 1, "b": 2}, {"a": 1}]},
+    )
+    assert response.json() == {
+        "results": [{"result": 6}, {"error": "Variable 'b' is not bound."}],
+    }
+
+
+@pytest.mark.anyio
+async def test_prepared_expression_api_without_cache(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(views, "prepared_cache", LRUCache(0))
+    response = await client.post(
+        fastapi_app.url_path_for("prepare"),
+        json={"expression": "a*2"},
+    )
+    assert response.json()["variables"] == ["a"]
+
+    url = fastapi_app.url_path_for("execute_prepared", handle=response.json()["handle"])
+    response = await client.post(url, json={"bindings": {"a": 4}})
+    assert response.json() == {"result": 8}
+
+
+@pytest.mark.anyio
+async def test_prepared_expression_api_errors(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+) -> None:
+    response = await client.post(
+        fastapi_app.url_path_for("prepare"),
+        json={"expression": "a%2"},
+    )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert [error["loc"] for error in response.json()["detail"]] == [
+        ["body", "expression"],
+    ]
+
+    response = await client.post(
+        fastapi_app.url_path_for("prepare"),
+        json={"expression": "a(+b)"},
+    )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert response.json()["detail"][0]["msg"] == "Invalid expression"
+
+    url = fastapi_app.url_path_for("execute_prepared", handle="not-a-handle")
+    response = await client.post(url, json={"bindings": {"a": 1}})
+    assert response.status_code == status.HTTP_404_NOT_FOUND
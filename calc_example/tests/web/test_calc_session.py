@@ -0,0 +1,89 @@
+import ujson
+from fastapi import FastAPI
+from starlette.testclient import TestClient
+
+from calc_example.settings import settings
+
+
+def test_calc_session(fastapi_app: FastAPI) -> None:
+    with TestClient(fastapi_app).websocket_connect("/api/calculate/ws") as websocket:
+        websocket.send_text(ujson.dumps({"id": 1, "expression": "2+3"}))
+        websocket.send_text(ujson.dumps({"id": "b", "expression": "3", "color": True}))
+        websocket.send_text(
+            ujson.dumps({"id": 3, "expression": "(1+2)*3", "color": True}),
+        )
+        assert websocket.receive_json() == {"id": 1, "result": 5}
+        assert websocket.receive_json() == {
+            "id": "b",
+            "error": "String should have at least 3 characters",
+        }
+        assert websocket.receive_json() == {"id": 3, "result": 9, "color": "red"}
+
+
+def test_calc_session_with_invalid_messages(fastapi_app: FastAPI) -> None:
+    with TestClient(fastapi_app).websocket_connect("/api/calculate/ws") as websocket:
+        websocket.send_text("2+2")
+        assert websocket.receive_json() == {"error": "Invalid JSON."}
+        websocket.send_text(ujson.dumps({"id": 2}))
+        assert websocket.receive_json() == {
+            "id": 2,
+            "error": "Value error, Expression or edits are required.",
+        }
+        max_length = settings.stream_max_line_length
+        websocket.send_text(" " * (max_length + 1))
+        assert websocket.receive_json() == {
+            "error": f"Message must not exceed {max_length} characters.",
+        }
+
+
+def test_calc_session_with_edits(fastapi_app: FastAPI) -> None:
+    with TestClient(fastapi_app).websocket_connect("/api/calculate/ws") as websocket:
+        websocket.send_json({"id": 1, "session": "a", "expression": "2 + 3 * 4"})
+        assert websocket.receive_json() == {"id": 1, "result": 14}
+        websocket.send_json(
+            {"id": 2, "session": "a", "edits": [{"start": 4, "end": 5, "text": "10"}]},
+        )
+        assert websocket.receive_json() == {"id": 2, "result": 32}
+        websocket.send_json(
+            {"id": 3, "session": "a", "edits": [{"start": 0, "end": 0, "text": "("}]},
+        )
+        assert websocket.receive_json() == {"id": 3, "error": "Mismatched parentheses"}
+        websocket.send_json(
+            {
+                "id": 4,
+                "session": "a",
+                "color": True,
+                "edits": [
+                    {"start": 0, "end": 0, "text": "("},
+                    {"start": 4, "end": 4, "text": ")"},
+                ],
+            },
+        )
+        assert websocket.receive_json() == {"id": 4, "result": 50, "color": "green"}
+        websocket.send_json(
+            {"id": 5, "session": "a", "edits": [{"start": 0, "end": 1, "text": "."}]},
+        )
+        assert websocket.receive_json() == {
+            "id": 5,
+            "error": "Value error, Invalid character '.'.",
+        }
+        websocket.send_json({"id": 6, "session": "b", "edits": []})
+        assert websocket.receive_json() == {"id": 6, "error": "Unknown session 'b'."}
+        websocket.send_json(
+            {"id": 7, "session": "a", "edits": [{"start": 0, "end": 8, "text": "1"}]},
+        )
+        assert websocket.receive_json() == {
+            "id": 7,
+            "error": "String should have at least 3 characters",
+        }
+        websocket.send_json(
+            {"id": 8, "session": "a", "edits": [{"start": 6, "end": 8, "text": ""}]},
+        )
+        assert websocket.receive_json() == {
+            "id": 8,
+            "error": (
+                "Value error, Expression should not start or end with an operator."
+            ),
+        }
+        websocket.send_json({"id": 9, "session": "a", "edits": []})
+        assert websocket.receive_json() == {"id": 9, "result": 50}
@@ -0,0 +1,152 @@
+import math
+import struct
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from starlette import status
+
+from calc_example.web.api.calculator.encoding import JSON, MSGPACK
+
+msgpack = pytest.importorskip("msgpack")
+
+MSGPACK_HEADERS = {"Content-Type": MSGPACK}
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    ("headers", "body", "expected_type"),
+    [
+        [MSGPACK_HEADERS, {"expression": "3+3"}, MSGPACK],
+        [{**MSGPACK_HEADERS, "Accept": JSON}, {"expression": "3+3"}, JSON],
+        [{"Accept": f"{MSGPACK}, application/json;q=0.5"}, None, MSGPACK],
+        [{"Accept": "*/*"}, None, JSON],
+    ],
+)
+async def test_calculator_api_negotiation(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    headers,
+    body,
+    expected_type,
+) -> None:
+    """
+    Checks that requests and responses are MessagePack or JSON as negotiated.
+
+    :param client: client for the app.
+    :param fastapi_app: current FastAPI application.
+    :param headers: headers of the request.
+    :param body: MessagePack body or None to send JSON.
+    :param expected_type: media type of the response.
+    """
+    url = fastapi_app.url_path_for("calculate")
+    if body is None:
+        response = await client.post(url, json={"expression": "3+3"}, headers=headers)
+    else:
+        response = await client.post(url, content=msgpack.packb(body), headers=headers)
+
+    assert response.status_code == status.HTTP_200_OK
+    if expected_type == MSGPACK:
+        assert response.headers["content-type"] == MSGPACK
+        assert msgpack.unpackb(response.content) == {"result": 6.0}
+    else:
+        assert response.headers["content-type"] == JSON
+        assert response.json() == {"result": 6.0}
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    ("body", "expected_status"),
+    [
+        [msgpack.packb({"expression": "3+a"}), status.HTTP_422_UNPROCESSABLE_ENTITY],
+        [msgpack.packb({"expression": "3/0"}), status.HTTP_422_UNPROCESSABLE_ENTITY],
+        [msgpack.packb({"expression": 3}), status.HTTP_422_UNPROCESSABLE_ENTITY],
+        [b"\xc1", status.HTTP_400_BAD_REQUEST],
+    ],
+)
+async def test_calculator_api_msgpack_errors(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    body: bytes,
+    expected_status: int,
+) -> None:
+    """
+    Checks that malformed MessagePack requests get the errors of JSON requests.
+
+    :param client: client for the app.
+    :param fastapi_app: current FastAPI application.
+    :param body: MessagePack body.
+    :param expected_status: status of the response.
+    """
+    url = fastapi_app.url_path_for("calculate")
+    response = await client.post(url, content=body, headers=MSGPACK_HEADERS)
+
+    assert response.status_code == expected_status
+    assert response.json()["detail"]
+
+
+@pytest.mark.anyio
+async def test_calculator_batch_api_msgpack(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+) -> None:
+    """
+    Checks that batch results are packed into float64 numbers.
+
+    :param client: client for the app.
+    :param fastapi_app: current FastAPI application.
+    """
+    url = fastapi_app.url_path_for("calculate_batch")
+    items = [
+        {"expression": "3+3"},
+        {"expression": "2/0"},
+        {"expression": "3/7", "color": True},
+    ]
+    response = await client.post(
+        url,
+        content=msgpack.packb({"items": items}),
+        headers=MSGPACK_HEADERS,
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    content = msgpack.unpackb(response.content, strict_map_key=False)
+    first, second, third = struct.unpack("<3d", content["results"])
+    assert (first, third) == (6, 0.4286)
+    assert math.isnan(second)
+    assert content["errors"] == {1: "Cannot divide by zero."}
+    assert content["colors"] == {2: "red"}
+
+
+def test_calculator_api_schema_documents_msgpack(fastapi_app: FastAPI) -> None:
+    """
+    Checks that the OpenAPI schema documents MessagePack responses.
+
+    :param fastapi_app: current FastAPI application.
+    """
+    for name in ("calculate", "calculate_batch"):
+        path = fastapi_app.url_path_for(name)
+        operation = fastapi_app.openapi()["paths"][path]["post"]
+        assert MSGPACK in operation["responses"]["200"]["content"]
+
+
+@pytest.mark.anyio
+async def test_admission_control_estimates_msgpack_cost(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+) -> None:
+    """
+    Checks that expensive MessagePack batches are shed under overload.
+
+    :param client: client for the app.
+    :param fastapi_app: current FastAPI application.
+    """
+    controller = fastapi_app.state.admission_controller
+    controller.delay = 0.2
+    controller.probe = lambda: None
+    response = await client.post(
+        fastapi_app.url_path_for("calculate_batch"),
+        content=msgpack.packb({"items": [{"expression": "1+1"}] * 10}),
+        headers=MSGPACK_HEADERS,
+    )
+
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
@@ -0,0 +1,79 @@
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from prometheus_client import REGISTRY
+from starlette import status
+
+from calc_example.services.metrics import record_worker_start
+from calc_example.web.metrics import get_route_path
+
+
+@pytest.mark.anyio
+async def test_metrics(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+) -> None:
+    """
+    Checks that requests, errors and stages are exposed on /metrics.
+
+    :param client: client for the app.
+    :param fastapi_app: current FastAPI application.
+    """
+    url = fastapi_app.url_path_for("calculate")
+    await client.post(url, json={"expression": "3+3"})
+    await client.post(url, json={"expression": "3/0"})
+    await client.post(url, json={"expression": "3%0"})
+
+    response = await client.get("/metrics")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert (
+        'calc_example_requests_total{method="POST",path="/api/calculate",status="200"}'
+        in response.text
+    )
+    assert 'calc_example_errors_total{type="ValueError"}' in response.text
+    assert 'calc_example_errors_total{type="RequestValidationError"}' in response.text
+    assert 'calc_example_stage_duration_seconds_count{stage="evaluation"}' in (
+        response.text
+    )
+
+
+@pytest.mark.anyio
+async def test_worker_first_request(client: AsyncClient) -> None:
+    """
+    Checks that a worker reports its time to the first request once.
+
+    :param client: client for the app.
+    """
+    sample = ("calc_example_worker_first_request_seconds", {"preloaded": "true"})
+    record_worker_start(preloaded=True)
+
+    await client.get("/metrics")
+    first_request = REGISTRY.get_sample_value(*sample)
+    await client.get("/metrics")
+
+    assert first_request is not None
+    assert REGISTRY.get_sample_value(*sample) == first_request
+
+
+def test_route_path_of_matched_endpoint(fastapi_app: FastAPI) -> None:
+    """
+    Checks that routes aren't scanned for requests with a matched endpoint.
+
+    :param fastapi_app: current FastAPI application.
+    """
+    route = next(
+        route
+        for route in fastapi_app.router.routes
+        if getattr(route, "path", None) == "/api/calculate"
+    )
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/not/scanned",
+        "app": fastapi_app,
+        "endpoint": route.endpoint,  # type: ignore
+    }
+
+    assert get_route_path(scope) == "/api/calculate"
+    assert get_route_path({**scope, "endpoint": None}) == "unmatched"
@@ -0,0 +1,18 @@
+from calc_example.web.api.calculator.streaming import LineReader
+
+
+def test_line_reader_joins_lines_across_chunks() -> None:
+    reader = LineReader(max_length=16)
+    lines = []
+    for chunk in (b"1+", b"1\n\n 2", b"+2 \r\n3+", b"3"):
+        lines.extend(reader.feed(chunk))
+    lines.extend(reader.close())
+    assert lines == [b"1+1", b"", b"2+2", b"3+3"]
+
+
+def test_line_reader_skips_too_long_line() -> None:
+    reader = LineReader(max_length=4)
+    lines = reader.feed(b"1+1\n12345")
+    lines.extend(reader.feed(b"678\n2+2\n"))
+    assert lines == [b"1+1", None, b"2+2"]
+    assert reader.close() == []
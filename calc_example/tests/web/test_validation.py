@@ -0,0 +1,60 @@
+import pytest
+import ujson
+
+from calc_example.web.api.calculator.validation import find_error, prevalidate_body
+
+
+@pytest.mark.parametrize(
+    ("expression", "expected_error"),
+    [
+        ["2+2", None],
+        ["(1 + 2) * 3", None],
+        ["2", "String should have at least 3 characters"],
+        [" 2 ", "Value error, Minimum length must be 3 except a spaces."],
+        ["2.5+1", "Value error, Invalid character '.'."],
+        ["+2+a", "Value error, Invalid character 'a'."],
+        ["2+3-", "Value error, Expression should not start or end with an operator."],
+        ["2+ *3", "Value error, Invalid character '+'."],
+        ["(2+3", "Mismatched parentheses"],
+        ["2+3)", "Mismatched parentheses"],
+        [")2+3(", "Invalid expression"],
+        ["2(+3)", "Invalid expression"],
+        ["3()/1", "Invalid expression"],
+        ["()5+1", "Invalid expression"],
+        ["1+()2", "Invalid expression"],
+        ["(1+2)(3)", "Invalid expression"],
+        ["2+(3", "Mismatched parentheses"],
+        ["(2))+((3", "Mismatched parentheses"],
+    ],
+)
+def test_find_error(expression, expected_error) -> None:
+    error = find_error(expression)
+    assert (error and error.msg) == expected_error
+
+
+def test_prevalidate_body() -> None:
+    response = prevalidate_body(b'{"expression": "2++2"}')
+    assert response.status_code == 422
+    assert ujson.loads(response.body) == {
+        "detail": [
+            {
+                "type": "value_error",
+                "loc": ["body", "expression"],
+                "msg": "Value error, Invalid character '+'.",
+            },
+        ],
+    }
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        b'{"expression": "2+2"}',
+        b'{"expression": "2++2", "color": "yes"}',
+        b'{"expression": 22}',
+        b"[]",
+        b"2++2",
+    ],
+)
+def test_prevalidate_body_leaves_body_for_model(body) -> None:
+    assert prevalidate_body(body) is None
@@ -0,0 +1,207 @@
+from typing import Any, Collection, Dict, List, Optional, Tuple
+
+import ujson
+from fastapi import FastAPI
+from starlette import status
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from calc_example.services.admission import AdmissionController, estimate_cost
+from calc_example.services.calculator.prepared import parse_handle
+from calc_example.settings import settings
+from calc_example.web.api.calculator.encoding import decode_body
+
+CALCULATE_PATH = "/api/calculate"
+BATCH_PATH = "/api/calculate/batch"
+# The stream is read while it's evaluated, so its cost is never known.
+CALCULATE_PATHS = frozenset((CALCULATE_PATH, BATCH_PATH, "/api/calculate/stream"))
+# Executions of prepared expressions, the handle follows the prefix.
+PREPARED_PATH = "/api/prepared/"
+CALCULATE_PREFIXES = (PREPARED_PATH,)
+
+OVERLOADED_BODY = ujson.dumps({"detail": "Service is overloaded."}).encode()
+
+
+def _prepared_expressions(path: str, payload: Dict[str, Any]) -> List[Any]:
+    try:
+        expression, _ = parse_handle(path.removeprefix(PREPARED_PATH))
+    except ValueError:
+        return []
+    bindings = payload.get("bindings")
+    executions = len(bindings) if isinstance(bindings, list) else 1
+    return [expression] * executions
+
+
+def _expressions(path: str, payload: Any) -> List[Any]:
+    if not isinstance(payload, dict):
+        return []
+    if path == CALCULATE_PATH:
+        return [payload.get("expression")]
+    if path.startswith(PREPARED_PATH):
+        return _prepared_expressions(path, payload)
+    items = payload.get("items")
+    if not isinstance(items, list):
+        return []
+    return [
+        item.get("expression") if isinstance(item, dict) else None for item in items
+    ]
+
+
+def request_cost(
+    path: str,
+    messages: List[Message],
+    content_type: Optional[str] = None,
+) -> Optional[int]:
+    """
+    Estimates the cost of a calculation request from its body.
+
+    Malformed requests are cheap, they are rejected by the validation.
+    An execution of a prepared expression costs as much as the expression
+    of its handle, once for every set of bindings.
+
+    :param path: path of the request.
+    :param messages: messages with the whole body, empty if it wasn't read.
+    :param content_type: value of the Content-Type header.
+    :return: the cost or None if it's unknown.
+    """
+    if not messages:
+        return None
+    if path not in {CALCULATE_PATH, BATCH_PATH} and not path.startswith(PREPARED_PATH):
+        return None
+    body = b"".join(message.get("body", b"") for message in messages)
+    try:
+        payload = decode_body(body, content_type)
+    except ValueError:
+        return 1
+    costs = [
+        estimate_cost(expression) if isinstance(expression, str) else 1
+        for expression in _expressions(path, payload)
+    ]
+    return max(sum(costs), 1)
+
+
+async def read_body(scope: Scope, receive: Receive, max_size: int) -> List[Message]:
+    """
+    Reads the messages of a body declared small enough by its content length.
+
+    :param scope: scope of the request.
+    :param receive: receive function of the request.
+    :param max_size: maximum length of the body to read.
+    :return: the messages, empty if the body wasn't read.
+    """
+    headers = dict(scope["headers"])
+    try:
+        length = int(headers[b"content-length"])
+    except (KeyError, ValueError):
+        return []
+    if length > max_size:
+        return []
+    messages = []
+    while True:  # noqa: WPS457
+        message = await receive()
+        messages.append(message)
+        if message["type"] != "http.request" or not message.get("more_body"):
+            return messages
+
+
+def replay(messages: List[Message], receive: Receive) -> Receive:
+    """
+    Receive function returning already read messages first.
+
+    :param messages: the read messages.
+    :param receive: receive function of the request.
+    :return: the receive function for the application.
+    """
+    pending = list(reversed(messages))
+
+    async def replayed_receive() -> Message:  # noqa: WPS430
+        if pending:
+            return pending.pop()
+        return await receive()
+
+    return replayed_receive
+
+
+class AdmissionMiddleware:
+    """
+    Sheds calculation requests of an overloaded worker with 503.
+
+    Requests are admitted without looking at them until the worker
+    is overloaded. Then the body is read to estimate the cost with
+    the tokenizer, and only cheap requests are handled.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        controller: AdmissionController,
+        max_body_size: int,
+        paths: Collection[str] = CALCULATE_PATHS,
+        prefixes: Tuple[str, ...] = CALCULATE_PREFIXES,
+    ) -> None:
+        self.app = app
+        self.controller = controller
+        self.max_body_size = max_body_size
+        self.paths = paths
+        self.prefixes = prefixes
+
+    def is_controlled(self, path: str) -> bool:
+        """
+        Whether requests to the path are calculations under admission control.
+
+        :param path: path of the request.
+        :return: whether the path is a calculation path or has its prefix.
+        """
+        return path in self.paths or path.startswith(self.prefixes)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.is_controlled(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+        controller = self.controller
+        controller.probe()
+        if controller.is_overloaded:
+            messages = await read_body(scope, receive, self.max_body_size)
+            content_type = Headers(scope=scope).get("content-type")
+            cost = request_cost(scope["path"], messages, content_type)
+            if not controller.admit(cost):
+                await self._reject(scope, receive, send)
+                return
+            receive = replay(messages, receive)
+        controller.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            controller.in_flight -= 1
+
+    async def _reject(self, scope: Scope, receive: Receive, send: Send) -> None:
+        response = Response(
+            OVERLOADED_BODY,
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            headers={"Retry-After": str(self.controller.retry_after)},
+            media_type="application/json",
+        )
+        await response(scope, receive, send)
+
+
+def register_admission_control(app: FastAPI) -> None:
+    """
+    Add the admission control of calculations, unless it's disabled.
+
+    :param app: current fastapi application.
+    """
+    if settings.admission_target_delay <= 0:
+        return
+    controller = AdmissionController(
+        target_delay=settings.admission_target_delay,
+        max_delay=settings.admission_max_delay,
+        max_in_flight=settings.admission_max_in_flight,
+        cheap_cost=settings.admission_cheap_cost,
+    )
+    app.state.admission_controller = controller
+    app.add_middleware(
+        AdmissionMiddleware,
+        controller=controller,
+        max_body_size=settings.admission_max_body_size,
+    )
@@ -0,0 +1,166 @@
+from typing import Any, Callable, Coroutine, Dict, Optional
+
+import ujson
+from fastapi import HTTPException
+from fastapi.routing import APIRoute
+from starlette import status
+from starlette.requests import Request
+from starlette.responses import Response
+
+from calc_example.services.assets.catalog import accepted_values
+
+try:
+    import msgpack  # noqa: WPS433 (Found nested import)
+except ImportError:
+    msgpack = None  # type: ignore  # noqa: WPS440 (variables overlap)
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+MSGPACK_TYPES = frozenset(
+    (MSGPACK, "application/x-msgpack", "application/vnd.msgpack"),
+)
+# Documents the MessagePack variant of a route in the OpenAPI schema.
+MSGPACK_CONTENT: Dict[str, Any] = {"content": {MSGPACK: {}}}
+
+_json_content_type = (b"content-type", JSON.encode())
+
+
+def _media_type(header: Optional[str]) -> str:
+    if not header:
+        return ""
+    return header.partition(";")[0].strip().lower()
+
+
+def is_msgpack(request: Request) -> bool:
+    """
+    Whether the body of the request is MessagePack.
+
+    :param request: current request.
+    :return: True for MessagePack content types.
+    """
+    return _media_type(request.headers.get("content-type")) in MSGPACK_TYPES
+
+
+def decode_body(body: bytes, content_type: Optional[str]) -> Any:
+    """
+    Decodes a JSON or MessagePack body.
+
+    :param body: the body.
+    :param content_type: value of the Content-Type header.
+    :return: the decoded body.
+    :raises ValueError: if the body can't be decoded.
+    """
+    if _media_type(content_type) not in MSGPACK_TYPES:
+        return ujson.loads(body)
+    if msgpack is None:
+        raise ValueError("MessagePack isn't supported.")
+    return msgpack.unpackb(body, raw=False)
+
+
+def response_media_type(request: Request) -> str:
+    """
+    Chooses the media type of the response.
+
+    MessagePack is sent if the client accepts it, clients without
+    a preference get a response in the format of their request.
+
+    :param request: current request.
+    :return: MSGPACK or JSON.
+    """
+    if msgpack is None:
+        return JSON
+    accept = request.headers.get("accept")
+    if not accept or accept.strip() == "*/*":
+        return MSGPACK if isinstance(request, MessagePackRequest) else JSON
+    if MSGPACK_TYPES & accepted_values(accept):
+        return MSGPACK
+    return JSON
+
+
+def encode(content: Any, media_type: str) -> bytes:
+    """
+    Encodes a response body.
+
+    :param content: JSON compatible content, bytes are only allowed in MessagePack.
+    :param media_type: MSGPACK or JSON.
+    :return: the body.
+    """
+    if media_type == MSGPACK:
+        return msgpack.packb(content)
+    return ujson.dumps(
+        content,
+        ensure_ascii=False,
+        escape_forward_slashes=False,
+    ).encode()
+
+
+def encoded_response(content: Any, media_type: str) -> Response:
+    """
+    Builds a response with the encoded content.
+
+    :param content: JSON compatible content.
+    :param media_type: MSGPACK or JSON.
+    :return: the response.
+    """
+    return Response(encode(content, media_type), media_type=media_type)
+
+
+class MessagePackRequest(Request):
+    """
+    A request with a MessagePack body.
+
+    It's presented to FastAPI as a JSON request, so its body is
+    validated by the same models, without converting it to JSON.
+    """
+
+    def __init__(self, request: Request) -> None:
+        headers = [
+            header
+            for header in request.scope["headers"]
+            if header[0] != b"content-type"
+        ]
+        headers.append(_json_content_type)
+        super().__init__({**request.scope, "headers": headers}, request.receive)
+
+    async def json(self) -> Any:
+        """
+        Decodes the MessagePack body.
+
+        :return: the decoded body.
+        """
+        if not hasattr(self, "_json"):  # noqa: WPS421
+            self._json = msgpack.unpackb(  # noqa: WPS120
+                await self.body(),
+                raw=False,
+            )
+        return self._json  # noqa: WPS120
+
+
+def decode_request(request: Request) -> Request:
+    """
+    Wraps a MessagePack request for the handler of a route.
+
+    :param request: current request.
+    :return: the request to handle.
+    :raises HTTPException: if the body is MessagePack but it isn't supported.
+    """
+    if not is_msgpack(request):
+        return request
+    if msgpack is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Install calc_example with the 'msgpack' extra.",
+        )
+    return MessagePackRequest(request)
+
+
+class MessagePackRoute(APIRoute):
+    """A route which accepts MessagePack bodies as well as JSON ones."""
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+
+        async def decoded_handler(request: Request) -> Response:  # noqa: WPS430
+            return await handler(decode_request(request))
+
+        return decoded_handler
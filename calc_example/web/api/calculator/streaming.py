@@ -0,0 +1,100 @@
+from typing import AsyncIterator, List, Optional
+
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+
+class BodyStreamingResponse(StreamingResponse):
+    """
+    Streaming response which is produced while the request body is read.
+
+    StreamingResponse listens for the client disconnect by calling
+    `receive` concurrently with streaming, which steals body messages
+    from a generator that is still reading the request. Here only the
+    generator reads from `receive`, and a disconnect surfaces there
+    as `ClientDisconnect`.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+class LineReader:
+    """
+    Splits chunks of a body into lines, keeping at most one line in memory.
+
+    Every line is reported, blank ones as empty bytes, so the n-th
+    reported line is the n-th line of the body. Lines longer than
+    `max_length` bytes are dropped up to the next line separator
+    and reported as None.
+    """
+
+    def __init__(self, max_length: int) -> None:
+        self.max_length = max_length
+        self._buffer = bytearray()
+        self._overflow = False
+
+    def feed(self, chunk: bytes) -> List[Optional[bytes]]:
+        """
+        Consume a chunk of the body.
+
+        :param chunk: next chunk of the body.
+        :return: stripped lines completed by this chunk.
+        """
+        lines: List[Optional[bytes]] = []
+        view = memoryview(chunk)
+        start = 0
+        end = chunk.find(b"\n")
+        while end != -1:
+            self._append(view[start:end])
+            self._take(lines)
+            start = end + 1
+            end = chunk.find(b"\n", start)
+        self._append(view[start:])
+        return lines
+
+    def close(self) -> List[Optional[bytes]]:
+        """
+        Finish the body.
+
+        :return: the last line if it wasn't terminated by a separator.
+        """
+        lines: List[Optional[bytes]] = []
+        if self._buffer or self._overflow:
+            self._take(lines)
+        return lines
+
+    def _append(self, data: memoryview) -> None:
+        if self._overflow:
+            return
+        if len(self._buffer) + len(data) > self.max_length:
+            self._overflow = True
+            self._buffer.clear()
+            return
+        self._buffer += data
+
+    def _take(self, lines: List[Optional[bytes]]) -> None:
+        lines.append(None if self._overflow else bytes(self._buffer.strip()))
+        self._buffer.clear()
+        self._overflow = False
+
+
+async def iter_lines(
+    chunks: AsyncIterator[bytes],
+    max_length: int,
+) -> AsyncIterator[Optional[bytes]]:
+    """
+    Split a stream of body chunks into lines.
+
+    :param chunks: chunks of the body.
+    :param max_length: maximum length of a line in bytes.
+    :yield: stripped lines, or None for lines that are too long.
+    """
+    reader = LineReader(max_length)
+    async for chunk in chunks:
+        for line in reader.feed(chunk):
+            yield line
+    for last_line in reader.close():
+        yield last_line
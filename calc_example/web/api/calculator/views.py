@@ -1,15 +1,110 @@
-import re
+import math
+import struct
+from decimal import Decimal
 from enum import Enum
+from fractions import Fraction
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel, Field, field_validator
+import ujson
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Request,
+    WebSocket,
+    WebSocketDisconnect,
+)
+from pydantic import (
+    BaseModel,
+    Field,
+    PrivateAttr,
+    ValidationError,
+    field_validator,
+    model_validator,
+)
 from starlette import status
+from starlette.responses import Response
 
-from calc_example.services.calculator import CalculatorFactory
+from calc_example.services.calculator import (
+    IncrementalCalculator,
+    IncrementalExpression,
+    PreparedExpression,
+    TemplateCalculator,
+    get_rpn_calculator,
+    make_handle,
+    parse_handle,
+    prepared_cache,
+    serialize_number,
+)
+from calc_example.services.calculator.numeric import Number
+from calc_example.services.calculator.tokenizer import (
+    Token,
+    TokenKind,
+    tokenize,
+    tokens_to_text,
+)
+from calc_example.services.executor import EvaluationExecutor
+from calc_example.services.executor.dependency import get_executor
+from calc_example.services.metrics import record_error, record_error_type, stage_timer
+from calc_example.services.result_cache import SharedResultCache
+from calc_example.services.result_cache.dependency import get_result_cache
+from calc_example.settings import NumericBackend, settings
+from calc_example.web.api.calculator.encoding import (
+    JSON,
+    MSGPACK,
+    MSGPACK_CONTENT,
+    MessagePackRoute,
+    encode,
+    encoded_response,
+    response_media_type,
+)
+from calc_example.web.api.calculator.streaming import BodyStreamingResponse, iter_lines
+from calc_example.web.api.calculator.validation import (
+    INVALID_CHAR_ERROR,
+    MIN_LENGTH_ERROR,
+    OPERATOR_EDGE_ERROR,
+    PrevalidatedRoute,
+    error_response,
+    evaluation_error,
+    find_error,
+)
 
 router = APIRouter()
+template_calculator = TemplateCalculator()
 
-ALLOWED_OPERATORS = "+-*/"
+ALLOWED_TOKEN_KINDS = frozenset(
+    (TokenKind.NUMBER, TokenKind.OPERATOR, TokenKind.LPAREN, TokenKind.RPAREN),
+)
+# Prepared expressions may also have variables.
+PREPARED_TOKEN_KINDS = ALLOWED_TOKEN_KINDS | {TokenKind.IDENTIFIER}
+UNKNOWN_HANDLE_ERROR = "Unknown prepared expression."
+
+
+class TokenizedExpression(str):  # noqa: WPS600
+    """
+    Validated expression text with the tokens it was validated with.
+
+    Field validators can't set attributes of the model,
+    so the tokens travel with the value to model_post_init.
+    """
+
+    tokens: List[Token]
+
+    def __new__(cls, expression: str, tokens: List[Token]) -> "TokenizedExpression":
+        text = super().__new__(cls, expression)
+        text.tokens = tokens
+        return text
 
 
 class CalculatorInput(BaseModel):
@@ -19,81 +114,275 @@ class CalculatorInput(BaseModel):
     Attributes:
         expression (str): mathematical operation to execute.
         color (bool): whether to determine a color based on the result.
+        backend (NumericBackend, optional): type of numbers of the calculation,
+            the configured one by default.
     """
 
     expression: str = Field(
         min_length=3,
-        description="Math expression a+b. Allowed integers and operators '+ - * / ",
+        description=(
+            "Math expression like (a+b)*c. "
+            "Allowed integers, parentheses and operators '+ - * / "
+        ),
     )
     color: bool = False
+    backend: Optional[NumericBackend] = Field(
+        default=None,
+        description=(
+            "Type of numbers: 'float' rounds divisions to 4 places, 'decimal' "
+            "keeps the configured significant digits, 'fraction' is exact."
+        ),
+    )
+
+    _tokens: List[Token] = PrivateAttr(default_factory=list)
 
     @field_validator("expression")
     @classmethod
-    def validate_length(cls, expression: str) -> str:
+    def validate_expression(cls, expression: str) -> str:
         """
-        Validate the length of the mathematical operation.
+        Validate the mathematical operation using a single tokenization.
+
+        The tokens are kept on the model, so that the calculator
+        doesn't need to scan the expression again.
 
         Parameters:
             expression (str): mathematical operation.
 
         Returns:
-            The validated mathematical operation.
+            The validated mathematical operation without spaces.
 
         Raises:
             ValueError: If the mathematical operation has less than 3 characters,
-            excluding spaces.
+            excluding spaces, includes a character that is not an integer,
+            parenthesis or operator, starts or ends with an operator or includes
+            two operators in a row.
         """
-        expression = expression.replace(" ", "")
-        if len(expression) < 3:
-            raise ValueError("Minimum length must be 3 except a spaces.")
-        return expression
+        with stage_timer("parsing"):
+            tokens = tokenize(expression)
+        with stage_timer("validation"):
+            expression = tokens_to_text(tokens)
+            if len(expression) < 3:
+                raise ValueError(MIN_LENGTH_ERROR)
+            _validate_chars(tokens)
+            _validate_operators(tokens)
+        return TokenizedExpression(expression, tokens)
 
-    @field_validator("expression")
+    def model_post_init(self, __context: Any) -> None:
+        """Move the tokens of the validated expression to the model."""
+        if isinstance(self.expression, TokenizedExpression):
+            self._tokens = self.expression.tokens
+            self.expression = str(self.expression)
+
+    @property
+    def tokens(self) -> List[Token]:
+        """Tokens of the validated expression."""
+        return self._tokens
+
+
+def _validate_chars(
+    tokens: List[Token],
+    allowed_kinds: FrozenSet[TokenKind] = ALLOWED_TOKEN_KINDS,
+) -> None:
+    """
+    Validate that the tokens consist of integers, parentheses and operators only.
+
+    Parameters:
+        tokens (list[Token]): tokens of the mathematical operation.
+        allowed_kinds (frozenset[TokenKind], optional): kinds of valid tokens.
+            Defaults to integers, parentheses and operators.
+
+    Raises:
+        ValueError: If a token includes a character that is not an integer,
+        parenthesis or operator.
+    """
+    for token in tokens:
+        invalid_char = None
+        if token.kind is TokenKind.NUMBER and "." in token.value:
+            invalid_char = "."
+        elif token.kind not in allowed_kinds:
+            invalid_char = token.value[0]
+        if invalid_char:
+            raise ValueError(INVALID_CHAR_ERROR.format(char=invalid_char))
+
+
+def _validate_operators(tokens: List[Token]) -> None:
+    """
+    Validate the placement of operators in the tokens.
+
+    Parameters:
+        tokens (list[Token]): tokens of the mathematical operation.
+
+    Raises:
+        ValueError: If the mathematical operation starts or ends with an operator
+        or includes two operators in a row.
+    """
+    if TokenKind.OPERATOR in {tokens[0].kind, tokens[-1].kind}:
+        raise ValueError(OPERATOR_EDGE_ERROR)
+    for token, next_token in zip(tokens, tokens[1:]):
+        if token.kind is next_token.kind is TokenKind.OPERATOR:
+            raise ValueError(INVALID_CHAR_ERROR.format(char=token.value))
+
+
+class CalculatorBatchItem(BaseModel):
+    """
+    A class to represent a single unvalidated item of a batch.
+
+    Items are validated one by one, so that a bad expression
+    only fails its own item instead of the whole batch.
+
+    Attributes:
+        expression (str): mathematical operation to execute.
+        color (bool): whether to determine a color based on the result.
+    """
+
+    expression: str
+    color: bool = False
+
+
+class CalculatorBatchInput(BaseModel):
+    """
+    A class to represent the input of a batch calculation.
+
+    Items are left unvalidated here, each one is validated as
+    a CalculatorBatchItem when it's evaluated, so a malformed
+    item gets an error in its own result.
+
+    Attributes:
+        items (list): objects with the fields of CalculatorBatchItem,
+            executed in order.
+    """
+
+    items: List[Any] = Field(
+        description="Objects with the fields of CalculatorBatchItem.",
+    )
+
+    @field_validator("items")
     @classmethod
-    def validate_allowed_chars(cls, expression: str) -> str:
+    def validate_batch_size(cls, items: List[Any]) -> List[Any]:
         """
-        Validate the character of the mathematical operation.
+        Validate the number of expressions in the batch.
 
         Parameters:
-            expression (str): mathematical operation.
+            items (list): unvalidated items of the batch.
 
         Returns:
-            The validated mathematical operation.
+            The validated expressions.
 
         Raises:
-            ValueError: If the mathematical operation includes a character that
-            is not an integer or operator.
+            ValueError: If the batch is larger than the configured maximum.
         """
-        for char in expression:
-            if char.isdigit() or char in ALLOWED_OPERATORS:
-                continue
-            raise ValueError(f"Invalid character '{char}'.")
-        return expression
+        if len(items) > settings.batch_max_size:
+            raise ValueError(
+                f"Batch size must not exceed {settings.batch_max_size} items.",
+            )
+        return items
+
+
+class PreparedInput(BaseModel):
+    """
+    A class to represent an expression with variables to prepare.
+
+    Attributes:
+        expression (str): mathematical operation with variables, e.g. (a+b)*2.
+        backend (NumericBackend, optional): type of numbers of the executions,
+            the configured one by default.
+    """
+
+    expression: str = Field(
+        min_length=1,
+        description=(
+            "Math expression like (a+b)*2. Allowed integers, variables, "
+            "parentheses and operators '+ - * / "
+        ),
+    )
+    backend: Optional[NumericBackend] = None
+
+    _tokens: List[Token] = PrivateAttr(default_factory=list)
 
     @field_validator("expression")
     @classmethod
-    def validate_operators(cls, expression: str) -> str:
+    def validate_expression(cls, expression: str) -> str:
         """
-        Validate the operator of the mathematical operation.
+        Validate the mathematical operation with variables in a single tokenization.
 
         Parameters:
-            expression (str): mathematical operation.
+            expression (str): mathematical operation with variables.
 
         Returns:
-            The validated mathematical operation.
+            The validated mathematical operation without spaces.
 
         Raises:
-            ValueError: If the mathematical operation starts or ends with an operator or includes an invalid character in operation.
+            ValueError: If the mathematical operation is empty, excluding spaces,
+            includes a character that is not an integer, variable, parenthesis
+            or operator, starts or ends with an operator or includes
+            two operators in a row.
         """
-        if expression[0] in ALLOWED_OPERATORS or expression[-1] in ALLOWED_OPERATORS:
-            raise ValueError("Expression should not start or end with an operator.")
-        parts = re.split("([+\-*/^])", expression)
-        for index, part in enumerate(parts):
-            if part.isdigit():
-                continue
-            if part in ALLOWED_OPERATORS and parts[index + 1] in ALLOWED_OPERATORS:
-                raise ValueError(f"Invalid character '{part}'.")
-        return expression
+        tokens = tokenize(expression)
+        if not tokens:
+            raise ValueError("Expression must not be empty.")
+        _validate_chars(tokens, PREPARED_TOKEN_KINDS)
+        _validate_operators(tokens)
+        return TokenizedExpression(tokens_to_text(tokens), tokens)
+
+    def model_post_init(self, __context: Any) -> None:
+        """Move the tokens of the validated expression to the model."""
+        if isinstance(self.expression, TokenizedExpression):
+            self._tokens = self.expression.tokens
+            self.expression = str(self.expression)
+
+    @property
+    def tokens(self) -> List[Token]:
+        """Tokens of the validated expression."""
+        return self._tokens
+
+
+class PreparedExecution(BaseModel):
+    """
+    A class to represent values of variables of a prepared expression.
+
+    Attributes:
+        bindings (dict[str, float] | list[dict[str, float]]): values by variable
+            name, a list executes the expression once for every item.
+    """
+
+    bindings: Union[Dict[str, float], List[Dict[str, float]]]
+
+    @field_validator("bindings")
+    @classmethod
+    def validate_batch_size(
+        cls,
+        bindings: Union[Dict[str, float], List[Dict[str, float]]],
+    ) -> Union[Dict[str, float], List[Dict[str, float]]]:
+        """
+        Validate the number of executions.
+
+        Parameters:
+            bindings (dict[str, float] | list[dict[str, float]]): the bindings.
+
+        Returns:
+            The validated bindings.
+
+        Raises:
+            ValueError: If there are more executions than the configured maximum.
+        """
+        if isinstance(bindings, list) and len(bindings) > settings.batch_max_size:
+            raise ValueError(
+                f"Batch size must not exceed {settings.batch_max_size} items.",
+            )
+        return bindings
+
+
+class PreparedResult(BaseModel):
+    """
+    A class to represent a prepared expression.
+
+    Attributes:
+        handle (str): identifier of the expression for executions.
+        variables (list[str]): names of variables in the order of appearance.
+    """
+
+    handle: str
+    variables: List[str]
 
 
 class CalculatorResult(BaseModel):
@@ -101,10 +390,11 @@ class CalculatorResult(BaseModel):
     A class to represent the result of a calculator.
 
     Attributes:
-        result (float): the result of a mathematical operation.
+        result (float | str): the result of a mathematical operation,
+            a string for the decimal and fraction backends.
     """
 
-    result: float
+    result: Union[float, str]
 
 
 class CalculatorResultWithColor(CalculatorResult):
@@ -119,6 +409,97 @@ class CalculatorResultWithColor(CalculatorResult):
     color: str
 
 
+class CalculatorBatchItemResult(BaseModel):
+    """
+    A class to represent the outcome of a single batch item.
+
+    Attributes:
+        result (float | str, optional): the result of a mathematical operation,
+            a string for the decimal and fraction backends.
+        color (str, optional): a color determined based on the parity of the result.
+        error (str, optional): the reason the item could not be calculated.
+    """
+
+    result: Optional[Union[float, str]] = None
+    color: Optional[str] = None
+    error: Optional[str] = None
+
+
+class CalculatorBatchResult(BaseModel):
+    """
+    A class to represent the result of a batch calculation.
+
+    Attributes:
+        results (list[CalculatorBatchItemResult]): outcomes in the input order.
+    """
+
+    results: List[CalculatorBatchItemResult]
+
+
+class ExpressionEdit(BaseModel):
+    """
+    A class to represent a replacement of a range of an expression.
+
+    Attributes:
+        start (int): start of the range in the expression without spaces.
+        end (int): end of the range, exclusive.
+        text (str): new text of the range.
+    """
+
+    start: int = Field(ge=0)
+    end: int = Field(ge=0)
+    text: str = ""
+
+
+class CalculatorSessionMessage(CalculatorBatchItem):
+    """
+    A class to represent an expression sent over a WebSocket session.
+
+    With a session name, the expression is kept on the connection and
+    later messages can send edits of it instead of the whole expression.
+
+    Attributes:
+        id (int | str, optional): identifier echoed back with the result.
+        expression (str, optional): mathematical operation to execute.
+        session (str, optional): name of the incrementally evaluated expression.
+        edits (list[ExpressionEdit], optional): edits of the session's expression.
+    """
+
+    id: Optional[Union[int, str]] = None
+    expression: Optional[str] = None  # type: ignore
+    session: Optional[str] = None
+    edits: Optional[List[ExpressionEdit]] = None
+
+    @model_validator(mode="after")
+    def validate_content(self) -> "CalculatorSessionMessage":
+        """
+        Validate that the message has an expression or edits of a session.
+
+        Returns:
+            The validated message.
+
+        Raises:
+            ValueError: If the message has neither an expression nor edits,
+            or has edits without a session.
+        """
+        if self.edits is not None and self.session is None:
+            raise ValueError("Edits require a session.")
+        if self.expression is None and self.edits is None:
+            raise ValueError("Expression or edits are required.")
+        return self
+
+
+class CalculatorSessionResult(CalculatorBatchItemResult):
+    """
+    A class to represent the outcome of an expression of a WebSocket session.
+
+    Attributes:
+        id (int | str, optional): identifier of the message.
+    """
+
+    id: Optional[Union[int, str]] = None
+
+
 class Color(Enum):
     """
     An enumeration to represent colors.
@@ -128,48 +509,691 @@ class Color(Enum):
     GREEN = "green"
 
 
-def get_result_color(result: float) -> Color:
+def get_result_color(result: Number) -> Color:
     """
     Determines the color based on the parity of the result.
     Returns "red" for odd results and "green" for even results.
     """
+    if isinstance(result, Decimal):
+        # The remainder of a decimal is limited by the precision.
+        result = Fraction(result)
     return Color.RED if result % 2 else Color.GREEN
 
 
 def evaluate_expression(
     expression: str,
     color: bool = False,
+    tokens: Optional[List[Token]] = None,
+    backend: NumericBackend = NumericBackend.FLOAT,
 ) -> CalculatorResult | CalculatorResultWithColor:
     """
-    Evaluates a mathematical operation, and optionally determine a color based on the result.
+    Evaluates a mathematical operation, and optionally determine a color
+    based on the result.
+
+    Parameters:
+        expression (str): mathematical operation to execute.
+        color (bool, optional): whether to determine a color based on the result.
+            Defaults to False.
+        tokens (list[Token], optional): already tokenized operation. Defaults to None.
+        backend (NumericBackend, optional): type of numbers. Defaults to float.
+
+    Returns:
+        The result of the mathematical operation, optionally with a color.
+    """
+    return make_result(evaluate_result(expression, tokens, backend), color)
+
+
+def evaluate_result(
+    expression: str,
+    tokens: Optional[List[Token]] = None,
+    backend: NumericBackend = NumericBackend.FLOAT,
+) -> Number:
+    """
+    Evaluates a mathematical operation.
 
     Parameters:
         expression (str): mathematical operation to execute.
-        color (bool, optional): whether to determine a color based on the result. Defaults to False.
+        tokens (list[Token], optional): already tokenized operation. Defaults to None.
+        backend (NumericBackend, optional): type of numbers. Defaults to float.
+
+    Returns:
+        The result of the mathematical operation.
+    """
+    if backend is NumericBackend.FLOAT:
+        return template_calculator.calculate(expression, tokens)
+    calculator = get_rpn_calculator(backend, settings.decimal_precision)
+    return calculator.calculate(expression, tokens)
+
+
+def warm_calculators(expressions: Iterable[str]) -> None:
+    """
+    Compiles expressions, so requests with them or their templates are fast.
+
+    Parameters:
+        expressions (Iterable[str]): expressions of expected requests.
+    """
+    expressions = list(expressions)
+    template_calculator.warm(expressions)
+    if settings.numeric_backend is NumericBackend.FLOAT:
+        return
+    calculator = get_rpn_calculator(
+        settings.numeric_backend, settings.decimal_precision
+    )
+    for expression in expressions:
+        try:
+            calculator.compile(expression)
+        except ValueError:
+            continue
+
+
+def make_result(
+    result: Number,
+    color: bool = False,
+) -> CalculatorResult | CalculatorResultWithColor:
+    """
+    Builds the response for a result, optionally with a color.
+
+    Parameters:
+        result (Number): the result of a mathematical operation.
+        color (bool, optional): whether to determine a color based on the result.
+            Defaults to False.
 
     Returns:
         The result of the mathematical operation, optionally with a color.
     """
-    factory = CalculatorFactory()
-    calculator = factory.from_string(expression)
-    result = calculator.calculate()
+    value = serialize_number(result)
     if color:
         result_color = get_result_color(result)
-        return CalculatorResultWithColor(result=result, color=result_color.value)
-    return CalculatorResult(result=result)
+        return CalculatorResultWithColor(result=value, color=result_color.value)
+    return CalculatorResult(result=value)
+
+
+def result_response(
+    result: Number,
+    color: bool = False,
+    media_type: str = JSON,
+) -> Response:
+    """
+    Builds the serialized response for a result, optionally with a color.
+
+    The body is the same as the one of the response model, but neither
+    the model nor its validation against response_model are involved.
+
+    Parameters:
+        result (Number): the result of a mathematical operation.
+        color (bool, optional): whether to determine a color based on the result.
+            Defaults to False.
+        media_type (str, optional): JSON or MSGPACK. Defaults to JSON.
+
+    Returns:
+        The response with the result.
+    """
+    content: Dict[str, Any] = {"result": serialize_number(result)}
+    if color:
+        content["color"] = get_result_color(result).value
+    return encoded_response(content, media_type)
+
+
+def batch_response(
+    results: List[CalculatorBatchItemResult],
+    media_type: str,
+) -> Union[CalculatorBatchResult, Response]:
+    """
+    Builds the response of a batch in the format the client accepts.
+
+    In MessagePack, results are a single binary of little-endian
+    float64 numbers, NaN for failed items, and errors and colors
+    are maps from the index of an item, e.g.
+    {"results": <24 bytes>, "errors": {1: "Cannot divide by zero."}},
+    which msgpack clients unpack with strict_map_key=False.
+    Exact results of the decimal and fraction backends are
+    strings, so they are sent in the layout of the JSON response.
+
+    Parameters:
+        results (list[CalculatorBatchItemResult]): outcomes in the input order.
+        media_type (str): JSON or MSGPACK.
+
+    Returns:
+        The model for JSON or the packed response for MessagePack.
+    """
+    if media_type != MSGPACK:
+        return CalculatorBatchResult(results=results)
+    if any(isinstance(item.result, str) for item in results):
+        # Exact results aren't packed into float64 numbers.
+        batch = CalculatorBatchResult(results=results)
+        return encoded_response(batch.model_dump(exclude_none=True), media_type)
+    values = [math.nan if item.result is None else item.result for item in results]
+    content: Dict[str, Any] = {"results": struct.pack(f"<{len(values)}d", *values)}
+    errors = {index: item.error for index, item in enumerate(results) if item.error}
+    colors = {index: item.color for index, item in enumerate(results) if item.color}
+    if errors:
+        content["errors"] = errors
+    if colors:
+        content["colors"] = colors
+    return encoded_response(content, media_type)
+
+
+def evaluate_item(
+    expression: str,
+    color: bool = False,
+    backend: Optional[NumericBackend] = None,
+) -> CalculatorBatchItemResult:
+    """
+    Validates and evaluates a single expression, capturing the error instead of raising.
+
+    Parameters:
+        expression (str): mathematical operation to execute.
+        color (bool, optional): whether to determine a color. Defaults to False.
+        backend (NumericBackend, optional): type of numbers,
+            the configured one by default.
+
+    Returns:
+        The result of the mathematical operation or the reason it failed.
+    """
+    error = find_error(expression)
+    if error is not None:
+        record_error_type("ValidationError" if error.loc else "ValueError")
+        return CalculatorBatchItemResult(error=error.msg)
+    try:
+        data = CalculatorInput(expression=expression, color=color)
+        outcome = evaluate_expression(
+            data.expression,
+            data.color,
+            data.tokens,
+            backend or settings.numeric_backend,
+        )
+    except ValidationError as e:
+        record_error(e)
+        return CalculatorBatchItemResult(error=e.errors()[0]["msg"])
+    except ValueError as e:
+        record_error(e)
+        return CalculatorBatchItemResult(error=str(e))
+    return CalculatorBatchItemResult(**outcome.model_dump())
+
+
+def evaluate_batch_item(item: Any) -> CalculatorBatchItemResult:
+    """
+    Validates an item of a batch or a stream and evaluates its expression.
+
+    Parameters:
+        item (Any): decoded item, e.g. a dict with the fields of
+            CalculatorBatchItem.
+
+    Returns:
+        The result of the mathematical operation, or the reason
+        the item is invalid or the operation failed.
+    """
+    try:
+        data = CalculatorBatchItem.model_validate(item)
+    except ValidationError as e:
+        record_error(e)
+        return CalculatorBatchItemResult(error=e.errors()[0]["msg"])
+    return evaluate_item(data.expression, data.color)
+
+
+def evaluate_batch(items: Sequence[Any]) -> List[CalculatorBatchItemResult]:
+    """
+    Evaluates expressions of a batch, keeping a separate error for each failed item.
+
+    Parameters:
+        items (Sequence[Any]): unvalidated items with expressions to execute.
+
+    Returns:
+        The outcome of every item in the input order.
+    """
+    return [evaluate_batch_item(item) for item in items]
+
+
+def evaluate_line(line: bytes) -> CalculatorBatchItemResult:
+    """
+    Evaluates a single line of a stream.
+
+    A line is either a JSON object with the same fields as
+    CalculatorBatchItem or a plain expression.
+
+    Parameters:
+        line (bytes): stripped line of the request body or of a file.
+
+    Returns:
+        The result of the mathematical operation or the reason it failed.
+    """
+    text = line.decode("utf-8", errors="replace")
+    if not text.startswith("{"):
+        return evaluate_item(text)
+    try:
+        item = ujson.loads(text)
+    except ValueError:
+        return CalculatorBatchItemResult(error="Invalid JSON.")
+    return evaluate_batch_item(item)
+
+
+def encode_line_outcome(line: Optional[bytes]) -> bytes:
+    """
+    Evaluates a line of a stream or a file into an NDJSON line.
+
+    Parameters:
+        line (bytes | None): stripped line, blank lines are errors,
+            None if the line was dropped for its length.
+
+    Returns:
+        The outcome of the line as JSON, terminated by a line separator.
+    """
+    max_length = settings.stream_max_line_length
+    if line is None or len(line) > max_length:
+        outcome = CalculatorBatchItemResult(
+            error=f"Line must not exceed {max_length} bytes.",
+        )
+    else:
+        outcome = evaluate_line(line)
+    return encode(outcome.model_dump(exclude_none=True), JSON) + b"\n"
+
+
+def evaluate_edits(
+    message: CalculatorSessionMessage,
+    sessions: IncrementalCalculator,
+) -> CalculatorBatchItemResult:
+    """
+    Opens or edits an incrementally evaluated expression and evaluates it.
+
+    Parameters:
+        message (CalculatorSessionMessage): message with a session name.
+        sessions (IncrementalCalculator): expressions of the connection.
+
+    Returns:
+        The result of the edited expression or the reason it failed.
+    """
+    backend = settings.numeric_backend
+    try:
+        expression = _apply_session_message(message, sessions)
+        if backend is NumericBackend.FLOAT:
+            result: Number = expression.result
+        else:
+            # Partial results of the incremental tree are floats.
+            result = evaluate_result(expression.expression, backend=backend)
+    except ValidationError as e:
+        record_error(e)
+        return CalculatorBatchItemResult(error=e.errors()[0]["msg"])
+    except ValueError as e:
+        record_error(e)
+        return CalculatorBatchItemResult(error=str(e))
+    return CalculatorBatchItemResult(**make_result(result, message.color).model_dump())
+
+
+def _apply_session_message(
+    message: CalculatorSessionMessage,
+    sessions: IncrementalCalculator,
+) -> IncrementalExpression:
+    """
+    Opens the session with the expression of the message and applies its edits.
+
+    Parameters:
+        message (CalculatorSessionMessage): message with a session name.
+        sessions (IncrementalCalculator): expressions of the connection.
+
+    Returns:
+        The edited expression of the session.
+
+    Raises:
+        ValueError: If the expression or the edited expression is invalid,
+        or the session is unknown.
+    """
+    session = str(message.session)
+    if message.expression is not None:
+        data = CalculatorInput(expression=message.expression, color=message.color)
+        sessions.open(session, data.expression)
+    edits = [(edit.start, edit.end, edit.text) for edit in message.edits or []]
+    return sessions.edit(session, edits, _validate_edited)
+
+
+def _validate_edited(expression: str) -> None:
+    """
+    Validates an edited expression with the rules of CalculatorInput.
+
+    Parameters:
+        expression (str): the expression after the edits.
+
+    Raises:
+        ValidationError: If the expression is invalid.
+    """
+    CalculatorInput(expression=expression)
+
+
+def _read_message(text: str) -> CalculatorSessionMessage | CalculatorSessionResult:
+    """
+    Decodes a message of a WebSocket session.
+
+    Parameters:
+        text (str): JSON object with the same fields as CalculatorSessionMessage.
+
+    Returns:
+        The message, or the reason it can't be read with its identifier if known.
+    """
+    max_length = settings.stream_max_line_length
+    if len(text) > max_length:
+        return CalculatorSessionResult(
+            error=f"Message must not exceed {max_length} characters.",
+        )
+    try:
+        payload = ujson.loads(text)
+    except ValueError:
+        return CalculatorSessionResult(error="Invalid JSON.")
+    try:
+        return CalculatorSessionMessage.model_validate(payload)
+    except ValidationError as e:
+        return CalculatorSessionResult(
+            id=_get_message_id(payload),
+            error=e.errors()[0]["msg"],
+        )
+
+
+def evaluate_message(
+    text: str,
+    sessions: IncrementalCalculator,
+) -> CalculatorSessionResult:
+    """
+    Evaluates a single message of a WebSocket session.
+
+    Parameters:
+        text (str): JSON object with the same fields as CalculatorSessionMessage.
+        sessions (IncrementalCalculator): expressions of the connection.
+
+    Returns:
+        The result of the mathematical operation or the reason it failed,
+        with the identifier of the message if it could be read.
+    """
+    message = _read_message(text)
+    if isinstance(message, CalculatorSessionResult):
+        return message
+    if message.session is None:
+        outcome = evaluate_item(str(message.expression), message.color)
+    else:
+        outcome = evaluate_edits(message, sessions)
+    return CalculatorSessionResult(id=message.id, **outcome.model_dump())
+
+
+def _get_message_id(payload: Any) -> Optional[Union[int, str]]:
+    """
+    Gets the identifier of an invalid message, so the client can match the error.
+
+    Parameters:
+        payload (Any): decoded message.
+
+    Returns:
+        The identifier if it's an integer or a string.
+    """
+    if not isinstance(payload, dict):
+        return None
+    message_id = payload.get("id")
+    return message_id if isinstance(message_id, (int, str)) else None
+
+
+def prepare_expression(data: PreparedInput) -> Tuple[str, PreparedExpression]:
+    """
+    Compiles an expression with variables and keeps it for executions.
+
+    The prepared expression is returned rather than read back from
+    the cache, which may have evicted it or may not keep anything.
+
+    Parameters:
+        data (PreparedInput): the validated expression.
+
+    Returns:
+        The handle of the prepared expression and the expression.
+
+    Raises:
+        ValueError: If the expression is malformed.
+    """
+    backend = data.backend or settings.numeric_backend
+    handle = make_handle(data.expression, backend)
+    prepared = prepared_cache.get(handle)
+    if prepared is None:
+        calculator = get_rpn_calculator(backend, settings.decimal_precision)
+        compiled = calculator.prepare(data.expression, data.tokens)
+        prepared = PreparedExpression(calculator, compiled)
+        prepared_cache.put(handle, prepared)
+    return handle, prepared
+
+
+def get_prepared(handle: str) -> PreparedExpression:
+    """
+    Finds a prepared expression, preparing it again if this worker doesn't have it.
+
+    Parameters:
+        handle (str): handle returned by prepare_expression.
+
+    Returns:
+        The prepared expression.
+
+    Raises:
+        ValueError: If the handle isn't a handle of a valid expression.
+    """
+    prepared = prepared_cache.get(handle)
+    if prepared is not None:
+        return prepared
+    expression, backend = parse_handle(handle)
+    try:
+        data = PreparedInput(expression=expression, backend=backend)
+    except ValidationError as e:
+        raise ValueError(UNKNOWN_HANDLE_ERROR) from e
+    return prepare_expression(data)[1]
+
+
+def execute_bindings(
+    prepared: PreparedExpression,
+    bindings: List[Dict[str, float]],
+) -> List[CalculatorBatchItemResult]:
+    """
+    Executes a prepared expression with every set of bindings.
+
+    Parameters:
+        prepared (PreparedExpression): the prepared expression.
+        bindings (list[dict[str, float]]): values of variables of every execution.
+
+    Returns:
+        The outcome of every execution in the input order.
+    """
+    results = []
+    for values in bindings:
+        try:
+            result = serialize_number(prepared.execute(values))
+        except ValueError as e:
+            record_error(e)
+            results.append(CalculatorBatchItemResult(error=str(e)))
+        else:
+            results.append(CalculatorBatchItemResult(result=result))
+    return results
+
+
+def execute_binding(
+    prepared: PreparedExpression,
+    bindings: Dict[str, float],
+    media_type: str,
+) -> Response:
+    """
+    Executes a prepared expression with a single set of bindings.
+
+    Parameters:
+        prepared (PreparedExpression): the prepared expression.
+        bindings (dict[str, float]): values of variables.
+        media_type (str): JSON or MSGPACK.
+
+    Returns:
+        The response with the result or the reason the execution failed.
+    """
+    try:
+        result = prepared.execute(bindings)
+    except ValueError as e:
+        record_error(e)
+        return error_response(evaluation_error(str(e)))
+    return result_response(result, media_type=media_type)
+
+
+async def stream_results(request: Request) -> AsyncIterator[bytes]:
+    """
+    Evaluates lines of the request body as they arrive.
+
+    The body is pulled only when the previous result was
+    sent, so a slow client slows down reading of the input.
+
+    Parameters:
+        request (Request): the streaming request.
+
+    Yields:
+        NDJSON lines with results in the input order.
+    """
+    async for line in iter_lines(request.stream(), settings.stream_max_line_length):
+        yield encode_line_outcome(line)
 
 
-@router.post("/calculate", response_model=CalculatorResult | CalculatorResultWithColor)
 async def calculate(
     data: CalculatorInput,
-) -> CalculatorResult | CalculatorResultWithColor:
+    request: Request,
+    executor: EvaluationExecutor = Depends(get_executor),
+    result_cache: SharedResultCache = Depends(get_result_cache),
+) -> Response:
     """
     Calculates the result of an expression and returns it.
+
+    Results computed by any worker are reused from the shared result cache.
+    Malformed expressions are rejected by PrevalidatedRoute before
+    the input model is built.
+    """
+    backend = data.backend or settings.numeric_backend
+    result: Optional[Number] = None
+    # The shared result cache only keeps float results.
+    if backend is NumericBackend.FLOAT:
+        result = result_cache.get(data.expression)
+    if result is None:
+        try:
+            result = await executor.run(
+                evaluate_result,
+                data.expression,
+                data.tokens,
+                backend,
+                size=len(data.expression),
+                key=(data.expression, backend),
+            )
+        except ValueError as e:
+            record_error(e)
+            return error_response(evaluation_error(str(e)))
+        if isinstance(result, float):
+            result_cache.put(data.expression, result)
+    # FastAPI doesn't validate returned responses against response_model,
+    # which only documents the result in the OpenAPI schema here.
+    return result_response(result, data.color, response_media_type(request))
+
+
+router.add_api_route(
+    "/calculate",
+    calculate,
+    methods=["POST"],
+    response_model=CalculatorResult | CalculatorResultWithColor,
+    responses={200: MSGPACK_CONTENT},
+    route_class_override=PrevalidatedRoute,
+)
+
+
+async def calculate_batch(
+    data: CalculatorBatchInput,
+    request: Request,
+    executor: EvaluationExecutor = Depends(get_executor),
+) -> Union[CalculatorBatchResult, Response]:
+    """
+    Calculates the results of a batch of expressions and returns them in order.
+    """
+    results = await executor.run_batch(evaluate_batch, data.items)
+    return batch_response(results, response_media_type(request))
+
+
+router.add_api_route(
+    "/calculate/batch",
+    calculate_batch,
+    methods=["POST"],
+    response_model=CalculatorBatchResult,
+    response_model_exclude_none=True,
+    responses={200: MSGPACK_CONTENT},
+    route_class_override=MessagePackRoute,
+)
+
+
+@router.post("/calculate/stream", response_class=BodyStreamingResponse)
+async def calculate_stream(request: Request) -> BodyStreamingResponse:
+    """
+    Calculates newline-delimited expressions and streams results back as NDJSON.
+    """
+    return BodyStreamingResponse(
+        stream_results(request),
+        media_type="application/x-ndjson",
+    )
+
+
+@router.post("/prepared", response_model=PreparedResult)
+async def prepare(data: PreparedInput) -> Union[PreparedResult, Response]:
+    """
+    Compiles an expression with variables once for later executions.
     """
     try:
-        return evaluate_expression(data.expression, data.color)
+        handle, prepared = prepare_expression(data)
     except ValueError as e:
-        raise HTTPException(
-            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-            detail=[{"msg": str(e)}],
-        )
+        record_error(e)
+        return error_response(evaluation_error(str(e)))
+    return PreparedResult(handle=handle, variables=list(prepared.variables))
+
+
+async def execute_prepared(
+    handle: str,
+    data: PreparedExecution,
+    request: Request,
+) -> Union[CalculatorBatchResult, Response]:
+    """
+    Executes a prepared expression with values of its variables.
+
+    A single set of bindings returns the result, a list of them
+    returns a result or an error for every item in order.
+    """
+    try:
+        prepared = get_prepared(handle)
+    except ValueError:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, UNKNOWN_HANDLE_ERROR)
+    media_type = response_media_type(request)
+    if isinstance(data.bindings, list):
+        results = execute_bindings(prepared, data.bindings)
+        return batch_response(results, media_type)
+    return execute_binding(prepared, data.bindings, media_type)
+
+
+router.add_api_route(
+    "/prepared/{handle}",
+    execute_prepared,
+    methods=["POST"],
+    response_model=CalculatorResult | CalculatorBatchResult,
+    response_model_exclude_none=True,
+    responses={200: MSGPACK_CONTENT},
+    route_class_override=MessagePackRoute,
+)
+
+
+@router.websocket("/calculate/ws")
+async def calculate_session(websocket: WebSocket) -> None:
+    """
+    Calculates expressions sent over a persistent WebSocket connection.
+
+    Every message is a JSON object like {"id": 1, "expression": "2+2"},
+    results are sent back in the order of messages with the same id, so
+    clients can send several expressions without waiting for results.
+
+    A message with a session name, e.g. {"session": "a", "expression": "2+2"},
+    keeps the expression on the connection; later messages like
+    {"session": "a", "edits": [{"start": 2, "end": 3, "text": "20"}]}
+    re-evaluate only the edited part of it.
+    """
+    await websocket.accept()
+    sessions = IncrementalCalculator(settings.incremental_max_sessions)
+    try:
+        while True:  # noqa: WPS457
+            outcome = evaluate_message(await websocket.receive_text(), sessions)
+            await websocket.send_text(
+                ujson.dumps(outcome.model_dump(exclude_none=True)),
+            )
+    except WebSocketDisconnect:
+        return
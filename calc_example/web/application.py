@@ -2,10 +2,16 @@ from importlib import metadata
 
 from fastapi import FastAPI
 from fastapi.responses import UJSONResponse
-from starlette.staticfiles import StaticFiles
 
+from calc_example.web.admission import register_admission_control
 from calc_example.web.api.router import api_router
-from calc_example.web.lifetime import register_shutdown_event, register_startup_event
+from calc_example.web.assets import register_assets
+from calc_example.web.lifetime import (
+    register_shutdown_event,
+    register_startup_event,
+    warm_up,
+)
+from calc_example.web.metrics import register_metrics, setup_metrics_middleware
 from calc_example.web.web_app.route_web_app import router as web_app_router
 
 
@@ -26,14 +32,38 @@ def get_app() -> FastAPI:
         default_response_class=UJSONResponse,
     )
 
-    app.mount("/static", StaticFiles(directory="calc_example/static"), name="static")
+    # Serves precompressed static assets and the pre-rendered home page.
+    register_assets(app)
 
     # Adds startup and shutdown events.
     register_startup_event(app)
     register_shutdown_event(app)
 
+    # Adds /metrics endpoint and error counters.
+    register_metrics(app)
+
+    # Sheds calculations of an overloaded worker.
+    register_admission_control(app)
+
+    # Records all requests, so it's the outermost middleware.
+    setup_metrics_middleware(app)
+
     # Main router for the API.
     app.include_router(router=api_router, prefix="/api")
     app.include_router(router=web_app_router, prefix="")
 
     return app
+
+
+def get_preloaded_app() -> FastAPI:
+    """
+    Get FastAPI application prepared for its first request.
+
+    This is the constructor of the preload mode, it's called
+    once by the gunicorn master before workers are forked.
+
+    :return: application.
+    """
+    app = get_app()
+    warm_up(app)
+    return app
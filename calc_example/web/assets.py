@@ -0,0 +1,90 @@
+from pathlib import Path
+
+from fastapi import FastAPI, HTTPException
+from starlette import status
+from starlette.requests import Request
+from starlette.responses import Response
+
+from calc_example.services.assets import Asset, AssetCatalog
+from calc_example.services.assets.catalog import REVALIDATE
+
+STATIC_DIR = Path("calc_example/static")
+TEMPLATES_DIR = Path("calc_example/templates")
+STATIC_PREFIX = "/static"
+HOME_TEMPLATE = "calculator_page.html"
+
+
+def render_page(catalog: AssetCatalog, name: str) -> bytes:
+    """
+    Renders a page template once, with hashed URLs of the assets.
+
+    Templates reference assets with ``static_url("js/app.js")``.
+
+    :param catalog: assets referenced by the page.
+    :param name: name of the template.
+    :return: the rendered page.
+    """
+    from jinja2 import Environment, FileSystemLoader  # noqa: WPS433
+
+    environment = Environment(
+        loader=FileSystemLoader(TEMPLATES_DIR),
+        autoescape=True,
+    )
+    environment.globals["static_url"] = catalog.url
+    return environment.get_template(name).render().encode()
+
+
+def asset_response(asset: Asset, request: Request) -> Response:
+    """
+    Builds a response with the representation the client accepts.
+
+    A client which has the current representation gets 304,
+    everything is answered from memory.
+
+    :param asset: the asset.
+    :param request: current request.
+    :return: the response.
+    """
+    representation = asset.negotiate(request.headers.get("accept-encoding", ""))
+    if asset.is_fresh(request.headers.get("if-none-match")):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers=representation.not_modified_headers,
+        )
+    return Response(representation.body, headers=representation.headers)
+
+
+async def static_asset(request: Request) -> Response:
+    """
+    Serves a static asset by its name or hashed name.
+
+    :param request: current request.
+    :return: the response.
+    :raises HTTPException: if the asset is unknown.
+    """
+    asset = request.app.state.assets.get(request.path_params["path"])
+    if asset is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    return asset_response(asset, request)
+
+
+def register_assets(app: FastAPI) -> None:
+    """
+    Load static assets and render the home page into memory.
+
+    :param app: current fastapi application.
+    """
+    catalog = AssetCatalog(STATIC_DIR, STATIC_PREFIX)
+    app.state.assets = catalog
+    app.state.home_page = Asset(
+        render_page(catalog, HOME_TEMPLATE),
+        "text/html",
+        REVALIDATE,
+    )
+    app.add_route(
+        f"{STATIC_PREFIX}/{{path:path}}",
+        static_asset,
+        methods=["GET", "HEAD"],
+        name="static",
+        include_in_schema=False,
+    )
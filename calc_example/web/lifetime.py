@@ -2,6 +2,29 @@ from typing import Awaitable, Callable
 
 from fastapi import FastAPI
 
+from calc_example.services.executor.lifetime import init_executor, shutdown_executor
+from calc_example.services.result_cache.lifetime import (
+    init_result_cache,
+    shutdown_result_cache,
+)
+from calc_example.settings import settings
+from calc_example.web.api.calculator.views import warm_calculators
+
+
+def warm_up(app: FastAPI) -> None:
+    """
+    Prepares the application for its first request.
+
+    In the preload mode it's called by the gunicorn master,
+    so forked workers start with the built middleware stack
+    and compiled expressions.
+
+    :param app: the fastAPI application.
+    """
+    if app.middleware_stack is None:
+        app.middleware_stack = app.build_middleware_stack()
+    warm_calculators(settings.warmup_expressions)
+
 
 def register_startup_event(
     app: FastAPI,
@@ -18,9 +41,9 @@ def register_startup_event(
 
     @app.on_event("startup")
     async def _startup() -> None:  # noqa: WPS430
-        app.middleware_stack = None
-        app.middleware_stack = app.build_middleware_stack()
-        pass  # noqa: WPS420
+        warm_up(app)
+        init_executor(app)
+        init_result_cache(app)
 
     return _startup
 
@@ -37,6 +60,7 @@ def register_shutdown_event(
 
     @app.on_event("shutdown")
     async def _shutdown() -> None:  # noqa: WPS430
-        pass  # noqa: WPS420
+        shutdown_executor(app)
+        shutdown_result_cache(app)
 
     return _shutdown
@@ -0,0 +1,155 @@
+import os
+import time
+from typing import Any, Dict
+
+from fastapi import FastAPI, Request
+from fastapi.exception_handlers import request_validation_exception_handler
+from fastapi.exceptions import RequestValidationError
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    generate_latest,
+)
+from prometheus_client.multiprocess import MultiProcessCollector
+from starlette.responses import Response
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from calc_example.services.metrics import (
+    REQUEST_LATENCY,
+    REQUESTS,
+    record_error,
+    record_first_request,
+)
+
+
+def _route_paths(app: FastAPI) -> Dict[Any, str]:
+    """
+    Path templates of the routes of the application by endpoint.
+
+    The mapping is built on the first request, when all routes are added.
+
+    :param app: current fastapi application.
+    :return: path templates by endpoint.
+    """
+    paths = getattr(app.state, "route_paths", None)
+    if paths is None:
+        paths = {}
+        for route in reversed(app.router.routes):
+            endpoint = getattr(route, "endpoint", None)
+            if endpoint is not None:
+                paths[endpoint] = route.path  # type: ignore
+        app.state.route_paths = paths
+    return paths
+
+
+def get_route_path(scope: Scope) -> str:
+    """
+    Find the path template of the route which handles the request.
+
+    Templates are used as labels instead of raw paths,
+    so the quantity of time series stays bounded. The router
+    puts the endpoint of the matched route into the scope, so
+    routes are only scanned for requests without an endpoint,
+    e.g. static files or requests rejected by a middleware.
+
+    :param scope: scope of the request.
+    :return: path template or "unmatched".
+    """
+    path = _route_paths(scope["app"]).get(scope.get("endpoint"))
+    if path is not None:
+        return path
+    for route in scope["app"].router.routes:
+        match, _ = route.matches(scope)
+        if match is Match.FULL:
+            return route.path  # type: ignore
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    """Records quantity, latency and failures of HTTP requests."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:  # noqa: WPS430
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as exc:
+            record_error(exc)
+            raise
+        finally:
+            path = get_route_path(scope)
+            REQUEST_LATENCY.labels(scope["method"], path).observe(
+                time.perf_counter() - start,
+            )
+            REQUESTS.labels(scope["method"], path, status_code).inc()
+            record_first_request()
+
+
+async def validation_error_handler(
+    request: Request,
+    exc: RequestValidationError,
+) -> Response:
+    """
+    Count request validation errors and build the default response.
+
+    :param request: current request.
+    :param exc: validation error.
+    :return: the default FastAPI validation error response.
+    """
+    record_error(exc)
+    return await request_validation_exception_handler(request, exc)
+
+
+async def metrics(request: Request) -> Response:
+    """
+    Expose metrics in the Prometheus text format.
+
+    When PROMETHEUS_MULTIPROC_DIR is set, metrics of all
+    gunicorn workers are collected from that directory.
+
+    :param request: current request.
+    :return: metrics of the application.
+    """
+    registry = REGISTRY
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        MultiProcessCollector(registry)
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+
+
+def register_metrics(app: FastAPI) -> None:
+    """
+    Add the metrics endpoint and the validation error counter.
+
+    :param app: current fastapi application.
+    """
+    app.add_route("/metrics", metrics, include_in_schema=False)
+    app.add_exception_handler(RequestValidationError, validation_error_handler)
+
+
+def setup_metrics_middleware(app: FastAPI) -> None:
+    """
+    Add the request metrics middleware.
+
+    It's added last, so it's the outermost one and
+    also records requests rejected by other middlewares.
+
+    :param app: current fastapi application.
+    """
+    app.add_middleware(MetricsMiddleware)
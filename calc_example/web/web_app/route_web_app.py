@@ -1,24 +1,27 @@
 from fastapi import APIRouter, Request
-from fastapi.templating import Jinja2Templates
+from starlette.responses import Response
+
+from calc_example.web.assets import asset_response
 
-templates = Jinja2Templates(directory="calc_example/templates")
 router = APIRouter(include_in_schema=False)
 
 
-@router.get("/")
 async def home(
     request: Request,
-):
+) -> Response:
     """
     This method is used to handle the home page request.
 
+    The page is rendered once on startup, see register_assets.
+
     Parameters:
     - request (Request): The FastAPI Request object.
     Returns:
-    - TemplateResponse: The rendered HTML template response using
-    the Jinja2 template engine.
+    - Response: The pre-rendered HTML page, compressed if the client
+    accepts it, or 304 if the client has the current page.
     """
-    return templates.TemplateResponse(
-        "calculator_page.html",
-        {"request": request},
-    )
+    return asset_response(request.app.state.home_page, request)
+
+
+# A plain route, as the page doesn't need validation or dependencies.
+router.add_route("/", home, methods=["GET"], include_in_schema=False)